@@ -8,10 +8,23 @@ This module provides the three core functions needed by the agent loop:
 
 from __future__ import annotations
 
+import io
+import mmap
+import os
 import re
+import shutil
+import signal
 import subprocess
-import tempfile
+import threading
+from collections import OrderedDict, deque
+from collections.abc import Callable, Iterator, Mapping
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache, partial
+from itertools import islice
 from pathlib import Path
+from types import MappingProxyType
+from typing import TypeVar
 
 from agent.types import (
     AgentState,
@@ -21,6 +34,7 @@ from agent.types import (
     Phase,
 )
 from agent.profiles import Profile
+from agent.llm_cache import cached_call_model
 
 # Try to import the DeepSeek client
 try:
@@ -45,6 +59,73 @@ except ImportError:
 
 logger = get_logger(__name__)
 
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Upper bound on threads used for batched file reads and searches
+_MAX_IO_WORKERS = 8
+
+# Test runs get their own process group on POSIX so timeouts can kill the tree
+_POSIX = os.name == "posix"
+
+# Search binaries are resolved once; a missing one is skipped without spawning
+_RG_PATH = shutil.which("rg")
+_GREP_PATH = shutil.which("grep")
+
+# ripgrep worker threads per search; batched searches already run in parallel
+_RG_THREADS = min(os.cpu_count() or 4, 8)
+
+# Directories the Python search fallback never descends into (hidden
+# directories are skipped separately)
+_IGNORED_DIRS = frozenset({
+    '__pycache__', 'node_modules', 'venv', '.git', 'build', 'dist',
+    '.venv', '.tox', '.mypy_cache', '.pytest_cache', '.idea', 'target',
+})
+
+# The Python search fallback skips generated protobuf modules and any file
+# over 1 MiB, which are rarely what a query is after and costly to scan
+_SKIP_SUFFIXES = ('_pb2.py', '_pb2_grpc.py')
+_SEARCH_MAX_FILE_SIZE = 1024 * 1024
+
+# Only the most recent actions are kept; searches are also indexed in
+# state.notes["searched_terms"] so lookups don't rescan history
+_ACTION_HISTORY_LEN = 200
+
+# Precompiled patterns for identifier extraction and search-term cleanup
+_SNAKE_RE = re.compile(r'\b([a-z][a-z0-9]*(?:_[a-z0-9]+)+)\b')
+_CAMEL_RE = re.compile(r'\b([A-Z][a-z]+(?:[A-Z][a-z]+)+)\b')
+_MODULE_RE = re.compile(r'\b([a-z][a-z0-9]*(?:\.[a-z][a-z0-9]*)+)\b')
+_BACKTICK_RE = re.compile(r'`([^`]+)`')
+# Underscores become spaces; backticks, emphasis and punctuation are dropped
+_CLEAN_TABLE = str.maketrans(
+    {"_": " "} | {c: None for c in "`*'\".,;:!?()[]{}<>"}
+)
+_KEYWORD_RE = re.compile(r'\b[A-Za-z]{6,}\b')
+
+# Unified diff lines and hunk headers. The line patterns run over "\n" + diff
+# so each starts with a literal newline the regex engine can scan for,
+# which is much faster than a MULTILINE "^" tried at every position.
+# "---"/"+++" lines never count as removals or additions.
+_REMOVAL_LINE_RE = re.compile(r'\n-(?!--)([^\n]*)')
+_ADDITION_LINE_RE = re.compile(r'\n\+(?!\+\+)([^\n]*)')
+_FILE_HEADER_LINE_RE = re.compile(r'\n(?:--- a/|\+\+\+ b/)([^\n]*)')
+_GIT_HEADER_LINE_RE = re.compile(r'\ndiff --git')
+_HUNK_START_RE = re.compile(r'@@ -(\d+)')
+
+# Tool name -> request kind. Each branch is a lookahead over the whole name,
+# so kinds keep their priority (search, then inspect, then run) no matter
+# where in the name the keyword appears; m.lastgroup names the kind.
+_TOOL_DISPATCH = re.compile(
+    r'(?=.*?(?P<search>grep|search|find|rg))|'
+    r'(?=.*?(?P<inspect>read|cat|view))|'
+    r'(?=.*?(?P<run>test|pytest|run))',
+    re.DOTALL,
+)
+
+# Files are shown to the model with line numbers, capped at 150 lines each
+_MAX_PROMPT_FILE_LINES = 150
+_LINE_PREFIXES = tuple(f"{i:4}: " for i in range(1, _MAX_PROMPT_FILE_LINES + 1))
+
 
 # =============================================================================
 # HELPER FUNCTIONS
@@ -52,47 +133,34 @@ logger = get_logger(__name__)
 
 def _clean_search_term(term: str) -> str:
     """Clean a search term by removing punctuation and formatting characters."""
-    # Remove markdown formatting
-    term = term.replace("`", "").replace("*", "").replace("_", " ").replace("__", " ")
-    # Remove common punctuation
-    term = re.sub(r"['\"`.,;:!?\(\)\[\]\{\}<>]", "", term)
-    # Clean up whitespace
-    term = term.strip()
-    return term
+    return term.translate(_CLEAN_TABLE).strip()
 
 
-def _extract_code_identifiers(text: str) -> list[str]:
+def _extract_code_identifiers(text: str, limit: int = 20) -> list[str]:
     """Extract likely code identifiers from problem text."""
-    identifiers = []
-    
-    # Find function/method names (word_word pattern)
-    snake_case = re.findall(r'\b([a-z][a-z0-9]*(?:_[a-z0-9]+)+)\b', text)
-    identifiers.extend(snake_case)
-    
-    # Find class names (CamelCase)
-    camel_case = re.findall(r'\b([A-Z][a-z]+(?:[A-Z][a-z]+)+)\b', text)
-    identifiers.extend(camel_case)
-    
-    # Find module paths (word.word.word)
-    module_paths = re.findall(r'\b([a-z][a-z0-9]*(?:\.[a-z][a-z0-9]*)+)\b', text)
-    identifiers.extend(module_paths)
-    
-    # Find backtick-wrapped code
-    backtick_code = re.findall(r'`([^`]+)`', text)
-    for code in backtick_code:
-        clean = _clean_search_term(code)
-        if len(clean) > 3 and clean.replace("_", "").isalnum():
-            identifiers.append(clean)
-    
-    # Remove duplicates while preserving order
+    def candidates():
+        # Function/method names (word_word), class names (CamelCase),
+        # module paths (word.word.word), in that priority order
+        for pattern in (_SNAKE_RE, _CAMEL_RE, _MODULE_RE):
+            for m in pattern.finditer(text):
+                yield m.group(1)
+        # Backtick-wrapped code
+        for m in _BACKTICK_RE.finditer(text):
+            clean = _clean_search_term(m.group(1))
+            if len(clean) > 3 and clean.replace("_", "").isalnum():
+                yield clean
+    
+    # Remove duplicates while preserving order, stopping at the limit
     seen = set()
     unique = []
-    for ident in identifiers:
-        if ident not in seen and len(ident) > 3:
+    for ident in candidates():
+        if len(ident) > 3 and ident not in seen:
             seen.add(ident)
             unique.append(ident)
+            if len(unique) >= limit:
+                break
     
-    return unique[:20]  # Limit to 20
+    return unique
 
 
 # =============================================================================
@@ -123,7 +191,12 @@ def propose(profile: Profile, state: AgentState) -> Proposal:
     )
     
     try:
-        response = call_model(prompt, temperature=base_temp)
+        if HAS_DEEPSEEK:
+            response = cached_call_model(prompt, base_temp, call_model)
+        else:
+            # The stub reply must never be cached, or it would be replayed
+            # once the real client is installed
+            response = call_model(prompt, temperature=base_temp)
     except Exception as e:
         logger.error("DeepSeek call failed", error=str(e))
         return _fallback_proposal(state, str(e))
@@ -138,7 +211,7 @@ def _fallback_proposal(state: AgentState, error: str) -> Proposal:
     # In LOCALIZE, try to search for keywords from problem statement
     if state.phase == Phase.LOCALIZE:
         # Extract potential search terms from problem
-        keywords = [w for w in problem.split() if len(w) > 5 and w.isalpha()][:3]
+        keywords = _first_keywords(problem, 3)
         if keywords:
             return Proposal(
                 kind="search",
@@ -154,113 +227,192 @@ def _fallback_proposal(state: AgentState, error: str) -> Proposal:
         evidence=[],
     )
 
+def _first_keywords(text: str, n: int = 3) -> list[str]:
+    """Return the first n purely alphabetic words of six or more letters."""
+    out = []
+    for m in _KEYWORD_RE.finditer(text):
+        out.append(m.group(0))
+        if len(out) >= n:
+            break
+    return out
+
+
+@lru_cache(maxsize=64)
+def _prompt_prefix(problem: str, phase: Phase) -> str:
+    """Build the stable prompt prefix (task + phase instruction).
+    
+    The prefix only depends on the problem statement and phase, so it is
+    memoized and stays byte-identical across rounds, which lets provider-side
+    prompt caches reuse the prefill.
+    """
+    # Task context - most important, then the current phase with detailed
+    # instructions up front so the LLM knows what to do
+    return "\n".join((
+        f"# 🎯 TASK\n{problem}",
+        f"\n# 📋 CURRENT PHASE: {phase.value}",
+        _get_phase_instruction(phase),
+    ))
+
+
 def _build_prompt(profile: Profile, state: AgentState) -> str:
     """Build a comprehensive prompt with history for DeepSeek."""
-    parts = []
-    
-    # Task context - most important
-    problem = state.notes.get("problem_statement", "")
-    parts.append(f"# 🎯 TASK\n{problem}")
-    
-    # Current phase with detailed instructions - up front so LLM knows what to do
-    parts.append(f"\n# 📋 CURRENT PHASE: {state.phase.value}")
-    parts.append(_get_phase_instruction(state.phase))
+    notes = state.notes
+    phase = state.phase
+    problem = notes.get("problem_statement", "")
+    last_contents = notes.get("last_file_contents") or {}
+    prefix = _prompt_prefix(problem, phase)
+    
+    # Dynamic tail - changes from round to round. Every section is written
+    # straight into one growing buffer, newline-separated.
+    buf = io.StringIO()
+    w = buf.write
+    w(prefix)
     
     # For PATCH_CANDIDATES, explicitly show which file to edit
-    if state.phase == Phase.PATCH_CANDIDATES:
-        last_contents = state.notes.get("last_file_contents", {})
-        if last_contents:
-            source_files = [f for f in last_contents.keys() if not '/test' in f and not 'test_' in f]
-            if source_files:
-                main_file = source_files[0]
-                parts.append(f"\n# 🎯 FILE TO EDIT: {main_file}")
-                parts.append("Generate a patch for this file based on the content shown below.")
+    if phase == Phase.PATCH_CANDIDATES and last_contents:
+        main_file = next(
+            (f for f in last_contents if not any(s in f for s in ('/test', 'test_'))),
+            None,
+        )
+        if main_file:
+            w(f"\n\n# 🎯 FILE TO EDIT: {main_file}")
+            w("\nGenerate a patch for this file based on the content shown below.")
     
     # File contents from last read - SHOW PROMINENTLY WITH LINE NUMBERS
-    last_contents = state.notes.get("last_file_contents", {})
     if last_contents:
-        parts.append("\n# 📄 FILE CONTENTS (use exact text for your diff)")
-        for fname, content in list(last_contents.items())[:3]:
-            # Skip test files in PATCH_CANDIDATES to reduce confusion
-            if state.phase == Phase.PATCH_CANDIDATES and ('test_' in fname or '/test' in fname):
-                parts.append(f"\n## ⚠️ SKIP: {fname} (test file - do not edit)")
-                continue
-            # Add line numbers to help with diff generation
-            lines = content.split("\n")[:150]  # Limit to 150 lines
-            numbered_lines = [f"{i+1:4}: {line}" for i, line in enumerate(lines)]
-            numbered_content = "\n".join(numbered_lines)
-            parts.append(f"\n## ✅ {fname}\n```\n{numbered_content}\n```")
+        w(_file_contents_section(profile, state, last_contents, len(prefix)))
     
     # Budget status - show urgency
     remaining_rounds = profile.max_rounds - state.budget.round_idx
-    parts.append(f"\n# ⏱️ BUDGET: {remaining_rounds} rounds remaining")
+    w(f"\n\n# ⏱️ BUDGET: {remaining_rounds} rounds remaining")
     if remaining_rounds <= 2:
-        parts.append("⚠️ LOW BUDGET - Generate a patch NOW!")
+        w("\n⚠️ LOW BUDGET - Generate a patch NOW!")
     
     # Localization hits - files that likely need changes
-    if state.localization_hits:
-        source_hits = [h for h in state.localization_hits if not 'test' in h.get('file', '').lower()]
+    hits = state.localization_hits
+    if hits:
+        source_hits = [h for h in hits if not 'test' in h.get('file', '').lower()]
         if source_hits:
-            parts.append("\n# 📍 LIKELY BUG LOCATIONS")
+            w("\n\n# 📍 LIKELY BUG LOCATIONS")
             for hit in source_hits[:5]:
-                parts.append(f"- {hit.get('file', 'unknown')}: {hit.get('reason', '')}")
+                w(f"\n- {hit.get('file', 'unknown')}: {hit.get('reason', '')}")
     
     # Add history of what was already done (compact)
-    if "action_history" not in state.notes:
-        state.notes["action_history"] = []
-    
-    history = state.notes.get("action_history", [])
+    history = _action_history(notes)
     if history:
-        parts.append(f"\n# 📜 HISTORY (last {min(len(history), 5)} actions)")
-        for h in history[-5:]:
-            parts.append(f"- {h}")
+        w(f"\n\n# 📜 HISTORY (last {min(len(history), 5)} actions)")
+        for h in islice(history, max(len(history) - 5, 0), None):
+            w(f"\n- {h}")
     
     # Last failures - important for diagnosis
-    if state.last_failures:
-        parts.append("\n# ❌ LAST TEST FAILURES")
-        for f in state.last_failures[:3]:
-            parts.append(f"- {f.nodeid}: {f.message[:100]}")
+    last_failures = state.last_failures
+    if last_failures:
+        w("\n\n# ❌ LAST TEST FAILURES")
+        for f in last_failures[:3]:
+            w(f"\n- {f.nodeid}: {f.message[:100]}")
     
     # Last gate rejection
-    if "last_gate_reject" in state.notes:
-        parts.append(f"\n# ⛔ LAST REJECTION: {state.notes['last_gate_reject']}")
+    last_reject = notes.get("last_gate_reject")
+    if last_reject is not None:
+        w(f"\n\n# ⛔ LAST REJECTION: {last_reject}")
     
     # Force source edit guidance after multiple test file rejects
-    if state.notes.get("force_source_edit"):
-        parts.append("\n# 🚨 CRITICAL: Your last patches tried to edit TEST files!")
-        parts.append("You MUST edit SOURCE code files only. Look for:")
-        parts.append("- Files in src/, lib/, or the main package (not tests/)")
-        parts.append("- The file containing the bug, not the file testing it")
-        parts.append("- Implementation code with the broken logic")
+    if notes.get("force_source_edit"):
+        w("\n\n# 🚨 CRITICAL: Your last patches tried to edit TEST files!")
+        w("\nYou MUST edit SOURCE code files only. Look for:")
+        w("\n- Files in src/, lib/, or the main package (not tests/)")
+        w("\n- The file containing the bug, not the file testing it")
+        w("\n- Implementation code with the broken logic")
     
     # Outcome learning hints - show similar past patches
-    if "last_diff" in state.notes:
+    last_diff = notes.get("last_diff")
+    if last_diff is not None:
         try:
             from agent.outcome_learning import predict_patch_success, get_outcome_learner
-            last_diff = state.notes["last_diff"]
             pred = predict_patch_success(last_diff)
             if pred < 0.3:
-                parts.append("\n# ⚠️ WARNING: Similar patches have low success rates")
-                parts.append("Consider a different approach to this fix.")
+                w("\n\n# ⚠️ WARNING: Similar patches have low success rates")
+                w("\nConsider a different approach to this fix.")
             
             # Show similar patches if available
             learner = get_outcome_learner()
             similar = learner.get_similar_patches(last_diff, limit=2)
             if similar:
-                parts.append("\n# 📊 SIMILAR PAST PATCHES:")
+                w("\n\n# 📊 SIMILAR PAST PATCHES:")
                 for patch in similar:
                     status = "✅ SUCCESS" if patch["success"] else "❌ FAILED"
-                    parts.append(f"- {status}: {patch['patterns'][:3]}")
+                    w(f"\n- {status}: {patch['patterns'][:3]}")
         except Exception:
             pass  # Outcome learning not available
     
-    return "\n".join(parts)
+    return buf.getvalue()
 
 
-def _get_phase_instruction(phase: Phase) -> str:
-    """Get detailed instruction for current phase."""
-    instructions = {
-        Phase.INGEST: """
+def _file_contents_section(
+    profile: Profile,
+    state: AgentState,
+    last_contents: dict[str, str],
+    used: int,
+) -> str:
+    """Render the line-numbered file contents block of the prompt.
+    
+    ``used`` is the number of prompt characters already spent before this
+    block; contents are trimmed to stay within profile.max_prompt_chars.
+    
+    Numbering up to three files is the most expensive part of prompt
+    building, and its inputs rarely change between rounds (retries after a
+    rejection, searches that don't read new files). The last rendering is
+    kept in state.notes and reused while the inputs are unchanged.
+    """
+    notes = state.notes
+    patching = state.phase == Phase.PATCH_CANDIDATES
+    localized = {h.get("file") for h in state.localization_hits}
+    key = (
+        patching,
+        tuple(f in localized for f in last_contents),
+        used,
+        profile.max_prompt_chars,
+    )
+    cached = notes.get("_file_contents_render")
+    if cached is not None and cached[0] is last_contents and cached[1] == key:
+        return cached[2]
+    
+    buf = io.StringIO()
+    w = buf.write
+    w("\n\n# 📄 FILE CONTENTS (use exact text for your diff)")
+    # Localized files first, then stop once the prompt budget is spent
+    items = sorted(last_contents.items(), key=lambda kv: kv[0] not in localized)
+    for fname, content in islice(items, 3):
+        # Skip test files in PATCH_CANDIDATES to reduce confusion
+        if patching and ('test_' in fname or '/test' in fname):
+            w(f"\n\n## ⚠️ SKIP: {fname} (test file - do not edit)")
+            continue
+        # Add line numbers to help with diff generation
+        lines = content.split("\n", _MAX_PROMPT_FILE_LINES)[:_MAX_PROMPT_FILE_LINES]
+        # Each numbered line costs its text plus a 6-char prefix and a newline
+        kept = 0
+        for line in lines:
+            cost = len(line) + 7
+            if used + cost > profile.max_prompt_chars:
+                break
+            used += cost
+            kept += 1
+        if not kept:
+            break
+        lines = lines[:kept]
+        numbered_content = "\n".join(p + line for p, line in zip(_LINE_PREFIXES, lines))
+        w(f"\n\n## ✅ {fname}\n```\n")
+        w(numbered_content)
+        w("\n```")
+    
+    text = buf.getvalue()
+    notes["_file_contents_render"] = (last_contents, key, text)
+    return text
+
+
+# Phase instructions are static; build the mapping once at import time.
+_PHASE_INSTRUCTIONS: Mapping[Phase, str] = MappingProxyType({
+    Phase.INGEST: """
 ## PHASE: INGEST - Understand the Problem
 
 Read the problem statement and identify:
@@ -270,7 +422,7 @@ Read the problem statement and identify:
 
 OUTPUT: {"mode": "tool_request", "requests": [{"tool": "sandbox.read_file", "args": {"path": "<most_likely_source_file>"}}], "why": "Reading source to understand current behavior"}
 """,
-        Phase.LOCALIZE: """
+    Phase.LOCALIZE: """
 ## PHASE: LOCALIZE - Find the Bug Location
 
 You've read some code. Now pinpoint the EXACT location of the bug.
@@ -283,7 +435,7 @@ OUTPUT: {"mode": "tool_request", "requests": [{"tool": "sandbox.grep", "args": {
 
 IMPORTANT: Focus on SOURCE files in src/, lib/, or the main package directory. Avoid test/ directories.
 """,
-        Phase.PLAN: """
+    Phase.PLAN: """
 ## PHASE: PLAN - Design the Fix
 
 Based on what you've read, plan the minimal fix:
@@ -296,7 +448,7 @@ If you need more info, read another file. Otherwise, proceed to generate a patch
 
 OUTPUT: Continue reading OR proceed to patch generation
 """,
-        Phase.PATCH_CANDIDATES: """
+    Phase.PATCH_CANDIDATES: """
 ## PHASE: PATCH_CANDIDATES - Generate the Fix
 
 ⚠️ YOU MUST OUTPUT A PATCH NOW. No more reading files.
@@ -328,7 +480,7 @@ DIFF FORMAT:
 EXAMPLE (fixing a comparison bug):
 {"mode": "patch", "diff": "--- a/mylib/core.py\\n+++ b/mylib/core.py\\n@@ -42,3 +42,3 @@\\n     def compare(self, x, y):\\n-        return x == y\\n+        return x is y\\n", "why": "Changed equality to identity comparison as required"}
 """,
-        Phase.TEST_STAGE: """
+    Phase.TEST_STAGE: """
 ## PHASE: TEST_STAGE - Verify the Fix
 
 Run the relevant tests to confirm your fix works.
@@ -337,7 +489,7 @@ OUTPUT: {"mode": "tool_request", "requests": [{"tool": "sandbox.run_command", "a
 
 If no specific test is mentioned, run: pytest -x --tb=short
 """,
-        Phase.DIAGNOSE: """
+    Phase.DIAGNOSE: """
 ## PHASE: DIAGNOSE - Analyze Test Failures
 
 Tests failed. Analyze WHY:
@@ -349,7 +501,7 @@ Tests failed. Analyze WHY:
 
 OUTPUT: Read the failing test file or the patched source file
 """,
-        Phase.MINIMIZE: """
+    Phase.MINIMIZE: """
 ## PHASE: MINIMIZE - Clean Up
 
 Ensure your fix is minimal:
@@ -359,15 +511,19 @@ Ensure your fix is minimal:
 
 OUTPUT: Final verification or adjusted patch
 """,
-        Phase.FINALIZE: """
+    Phase.FINALIZE: """
 ## PHASE: FINALIZE - Complete
 
 Tests pass! Finalize the solution.
 
 OUTPUT: {"mode": "feature_summary", "summary": "Fixed [problem] by [change made]", "completion_status": "complete"}
 """,
-    }
-    return instructions.get(phase, "Proceed with the task.")
+})
+
+
+def _get_phase_instruction(phase: Phase) -> str:
+    """Get detailed instruction for current phase."""
+    return _PHASE_INSTRUCTIONS.get(phase, "Proceed with the task.")
 
 
 def _parse_response_to_proposal(response: dict, state: AgentState) -> Proposal:
@@ -375,14 +531,14 @@ def _parse_response_to_proposal(response: dict, state: AgentState) -> Proposal:
     mode = response.get("mode", "tool_request")
     why = response.get("why", "")
     
+    notes = state.notes
     # Track this action in history
-    if "action_history" not in state.notes:
-        state.notes["action_history"] = []
+    history = _action_history(notes)
     
     if mode == "patch":
         diff = response.get("diff", "")
         files = _extract_files_from_diff(diff)
-        state.notes["action_history"].append(f"Generated patch for {files}")
+        history.append(f"Generated patch for {files}")
         return Proposal(
             kind="edit",
             rationale=why or "Generated patch",
@@ -395,40 +551,60 @@ def _parse_response_to_proposal(response: dict, state: AgentState) -> Proposal:
         if not requests:
             return _infer_proposal_from_phase(state, why)
         
-        # Parse all requests
+        # The first request decides the proposal kind
         first_req = requests[0]
         tool = first_req.get("tool", "")
         args = first_req.get("args", {})
         
         # Determine proposal kind and inputs
-        if any(kw in tool for kw in ["grep", "search", "find", "rg"]):
-            query = args.get("query", args.get("pattern", ""))
-            state.notes["action_history"].append(f"Search: {query}")
+        kind = _tool_kind(tool)
+        if kind == "search":
+            # Batch every search request in the response into one proposal
+            queries = []
+            for req in _requests_of_kind(requests, "search"):
+                req_args = req.get("args", {})
+                q = req_args.get("query", req_args.get("pattern", ""))
+                if q and q not in queries:
+                    queries.append(q)
+            query = queries[0] if queries else args.get("query", args.get("pattern", ""))
+            for q in queries or [query]:
+                _record_search(notes, "Search", q)
+            inputs = {"query": query}
+            if len(queries) > 1:
+                inputs["queries"] = queries
             return Proposal(
                 kind="search",
-                rationale=why or f"Search for: {query}",
-                inputs={"query": query},
+                rationale=why or f"Search for: {', '.join(queries) or query}",
+                inputs=inputs,
                 evidence=[],
             )
         
-        elif any(kw in tool for kw in ["read", "cat", "view"]):
-            path = args.get("path", args.get("file", ""))
-            # Avoid re-reading the same file
-            files_read = state.notes.get("files_read", [])
-            if path in files_read:
+        elif kind == "inspect":
+            # Batch every read request in the response into one proposal,
+            # skipping files we have already read
+            files_read = notes.get("files_read", [])
+            paths = []
+            for req in _requests_of_kind(requests, "inspect"):
+                req_args = req.get("args", {})
+                p = req_args.get("path", req_args.get("file", ""))
+                if p not in files_read and p not in paths:
+                    paths.append(p)
+            if not paths:
+                path = args.get("path", args.get("file", ""))
                 # Force a search instead
                 return _infer_proposal_from_phase(state, f"Already read {path}, trying search")
-            state.notes["action_history"].append(f"Read: {path}")
+            for p in paths:
+                history.append(f"Read: {p}")
             return Proposal(
                 kind="inspect",
-                rationale=why or f"Read file: {path}",
-                inputs={"files": [path]},
+                rationale=why or f"Read file: {', '.join(paths)}",
+                inputs={"files": paths},
                 evidence=[],
             )
         
-        elif any(kw in tool for kw in ["test", "pytest", "run"]):
+        elif kind == "run":
             cmd = args.get("command", args.get("cmd", "pytest"))
-            state.notes["action_history"].append(f"Run: {cmd}")
+            history.append(f"Run: {cmd}")
             return Proposal(
                 kind="run_tests",
                 rationale=why or f"Run tests: {cmd}",
@@ -448,7 +624,7 @@ def _parse_response_to_proposal(response: dict, state: AgentState) -> Proposal:
             return _infer_proposal_from_phase(state, why)
     
     elif mode == "feature_summary":
-        state.notes["action_history"].append("Finalize")
+        history.append("Finalize")
         return Proposal(
             kind="finalize",
             rationale=why or "Task complete",
@@ -462,25 +638,52 @@ def _parse_response_to_proposal(response: dict, state: AgentState) -> Proposal:
     return _infer_proposal_from_phase(state, why)
 
 
+def _action_history(notes: dict) -> deque[str]:
+    """Return the bounded action history, creating it on first use."""
+    history = notes.get("action_history")
+    if history is None:
+        history = notes["action_history"] = deque(maxlen=_ACTION_HISTORY_LEN)
+    return history
+
+
+def _record_search(notes: dict, label: str, term: str) -> None:
+    """Record a search in the action history and the searched-term index."""
+    _action_history(notes).append(f"{label}: {term}")
+    notes.setdefault("searched_terms", set()).add(term)
+
+
+def _tool_kind(tool: str) -> str | None:
+    """Classify a tool name as "search", "inspect", "run", or None."""
+    m = _TOOL_DISPATCH.match(tool)
+    return m.lastgroup if m else None
+
+
+def _requests_of_kind(requests: list[dict], kind: str) -> list[dict]:
+    """Select the tool requests whose tool name classifies as kind."""
+    return [req for req in requests if _tool_kind(req.get("tool", "")) == kind]
+
+
 def _infer_proposal_from_phase(state: AgentState, why: str) -> Proposal:
     """Infer a sensible proposal based on current phase when parsing fails."""
-    problem = state.notes.get("problem_statement", "")
-    files_read = state.notes.get("files_read", [])
-    history = state.notes.get("action_history", [])
-    last_contents = state.notes.get("last_file_contents", {})
+    notes = state.notes
+    phase = state.phase
+    problem = notes.get("problem_statement", "")
+    files_read = notes.get("files_read", [])
+    last_contents = notes.get("last_file_contents", {})
+    history = _action_history(notes)
     
     # Use regex-based extraction for clean code identifiers
     code_terms = _extract_code_identifiers(problem)
     
     # Check if we've already searched these terms
-    searched_terms = [h.split(": ")[-1] for h in history if "search" in h.lower()]
+    searched_terms = notes.get("searched_terms", set())
     unsearched_terms = [t for t in code_terms if t not in searched_terms]
     
     # CRITICAL: In PATCH_CANDIDATES phase with file contents - force edit proposal
-    if state.phase == Phase.PATCH_CANDIDATES and last_contents and files_read:
+    if phase == Phase.PATCH_CANDIDATES and last_contents and files_read:
         # We have read files and have content - generate a placeholder edit
-        first_file = list(last_contents.keys())[0]
-        state.notes["action_history"].append(f"Forcing edit for: {first_file}")
+        first_file = next(iter(last_contents))
+        history.append(f"Forcing edit for: {first_file}")
         return Proposal(
             kind="edit",
             rationale="Generating patch based on analyzed file contents",
@@ -492,9 +695,9 @@ def _infer_proposal_from_phase(state: AgentState, why: str) -> Proposal:
         )
     
     # In LOCALIZE, PLAN phases - try searching if we have clean terms
-    if state.phase in [Phase.LOCALIZE, Phase.PLAN] and unsearched_terms:
+    if phase in [Phase.LOCALIZE, Phase.PLAN] and unsearched_terms:
         term = unsearched_terms[0]
-        state.notes["action_history"].append(f"Inferred search: {term}")
+        _record_search(notes, "Inferred search", term)
         return Proposal(
             kind="search",
             rationale=why or f"Search for code term: {term}",
@@ -507,7 +710,7 @@ def _infer_proposal_from_phase(state: AgentState, why: str) -> Proposal:
         for hit in state.localization_hits:
             fname = hit.get("file", "")
             if fname and fname not in files_read:
-                state.notes["action_history"].append(f"Inferred read: {fname}")
+                history.append(f"Inferred read: {fname}")
                 return Proposal(
                     kind="inspect",
                     rationale=why or f"Read localized file: {fname}",
@@ -516,12 +719,12 @@ def _infer_proposal_from_phase(state: AgentState, why: str) -> Proposal:
                 )
     
     # Try fallback search terms if no code identifiers found
-    if state.phase in [Phase.LOCALIZE, Phase.PLAN, Phase.PATCH_CANDIDATES]:
+    if phase in [Phase.LOCALIZE, Phase.PLAN, Phase.PATCH_CANDIDATES]:
         # Search for common patterns
         fallback_terms = ["def ", "class ", "import "]
         for term in fallback_terms:
             if term not in searched_terms:
-                state.notes["action_history"].append(f"Fallback search: {term}")
+                _record_search(notes, "Fallback search", term)
                 return Proposal(
                     kind="search",
                     rationale=f"Searching for {term.strip()} patterns",
@@ -530,9 +733,10 @@ def _infer_proposal_from_phase(state: AgentState, why: str) -> Proposal:
                 )
     
     # Only fall back to problem_statement once
-    ps_reads = sum(1 for h in history if "problem_statement" in h.lower())
+    ps_reads = notes.get("problem_statement_reads", 0)
     if ps_reads < 1:
-        state.notes["action_history"].append("Read problem_statement")
+        notes["problem_statement_reads"] = ps_reads + 1
+        history.append("Read problem_statement")
         return Proposal(
             kind="inspect",
             rationale=why or "Review problem statement",
@@ -541,8 +745,8 @@ def _infer_proposal_from_phase(state: AgentState, why: str) -> Proposal:
         )
     
     # Force finalize if we've exhausted all options
-    if state.phase in [Phase.PATCH_CANDIDATES, Phase.PLAN]:
-        state.notes["action_history"].append("Force finalize - no more actions")
+    if phase in [Phase.PATCH_CANDIDATES, Phase.PLAN]:
+        history.append("Force finalize - no more actions")
         return Proposal(
             kind="finalize",
             rationale="Exhausted search options",
@@ -551,7 +755,7 @@ def _infer_proposal_from_phase(state: AgentState, why: str) -> Proposal:
         )
     
     # Generic search as absolute last resort
-    state.notes["action_history"].append("Generic search: error")
+    _record_search(notes, "Generic search", "error")
     return Proposal(
         kind="search",
         rationale="Searching for error patterns",
@@ -562,13 +766,22 @@ def _infer_proposal_from_phase(state: AgentState, why: str) -> Proposal:
 
 def _extract_files_from_diff(diff: str) -> list[str]:
     """Extract file paths from a unified diff."""
-    files = []
-    for line in diff.split("\n"):
-        if line.startswith("+++ b/") or line.startswith("--- a/"):
-            path = line[6:].strip()
+    # Walk the diff with find() rather than split() so we never materialize
+    # a list of every line in a large patch
+    files: set[str] = set()
+    start = 0
+    n = len(diff)
+    while start < n:
+        nl = diff.find("\n", start)
+        end = n if nl < 0 else nl
+        if diff.startswith(("+++ b/", "--- a/"), start, end):
+            path = diff[start + 6:end].strip()
             if path and path != "/dev/null":
-                files.append(path)
-    return list(set(files))
+                files.add(path)
+        if nl < 0:
+            break
+        start = nl + 1
+    return list(files)
 
 
 # =============================================================================
@@ -582,7 +795,7 @@ def gate(profile: Profile, state: AgentState, proposal: Proposal) -> GateDecisio
     if proposal.kind not in allowed_kinds:
         return GateDecision(
             accept=False,
-            reason=f"Action '{proposal.kind}' not allowed in phase {state.phase.value}. Allowed: {allowed_kinds}",
+            reason=f"Action '{proposal.kind}' not allowed in phase {state.phase.value}. Allowed: {list(allowed_kinds)}",
         )
     
     # 2. Check budget constraints
@@ -610,57 +823,111 @@ def gate(profile: Profile, state: AgentState, proposal: Proposal) -> GateDecisio
                 reason=f"Too many files ({len(files)} > {profile.max_files_touched})",
             )
         
-        forbidden_dirs = ["vendor/", "node_modules/", ".venv/", "dist/", "build/", "target/"]
+        # One pass over the diff yields its files, its size and any
+        # forbidden-directory hit
+        diff = proposal.inputs.get("diff", "")
+        diff_files, diff_lines, forbidden_hit = _scan_diff(diff)
+        
         for f in files:
-            for forbidden in forbidden_dirs:
-                if f.startswith(forbidden) or f"/{forbidden}" in f:
-                    return GateDecision(
-                        accept=False,
-                        reason=f"Cannot edit forbidden directory: {forbidden}",
-                    )
+            hit = _forbidden_dir_hit(f)
+            if hit:
+                forbidden_hit = hit
+                break
+        if forbidden_hit:
+            return GateDecision(
+                accept=False,
+                reason=f"Cannot edit forbidden directory: {forbidden_hit}",
+            )
         
-        diff = proposal.inputs.get("diff", "")
-        diff_lines = len([line for line in diff.split("\n") 
-                         if line.startswith("+") or line.startswith("-")])
         if diff_lines > profile.max_diff_lines:
             return GateDecision(
                 accept=False,
                 reason=f"Diff too large ({diff_lines} > {profile.max_diff_lines} lines)",
             )
-    
-    # 4. Check test modification constraint
-    if profile.forbid_test_modifications and proposal.kind == "edit":
-        files = proposal.inputs.get("files", [])
-        diff = proposal.inputs.get("diff", "")
         
-        # Also extract files from diff if files list is empty
-        if not files and diff:
-            files = _extract_files_from_diff(diff)
-        
-        for f in files:
-            if "test" in f.lower() or f.startswith("tests/") or "test_" in f:
-                state.notes["last_gate_reject"] = f"Cannot edit test files: {f}"
-                return GateDecision(
-                    accept=False,
-                    reason=f"Test modification forbidden by profile: {f}. Edit source code instead.",
-                )
+        # 4. Check test modification constraint
+        if profile.forbid_test_modifications:
+            # Also use files from the diff if files list is empty
+            if not files and diff:
+                files = list(diff_files)
+            
+            for f in files:
+                if _TEST_RE.search(f):
+                    state.notes["last_gate_reject"] = f"Cannot edit test files: {f}"
+                    return GateDecision(
+                        accept=False,
+                        reason=f"Test modification forbidden by profile: {f}. Edit source code instead.",
+                    )
     
     return GateDecision(accept=True, reason="All constraints satisfied")
 
 
-def _allowed_kinds_for_phase(phase: Phase) -> list[str]:
+_FORBIDDEN_PREFIXES = ("vendor/", "node_modules/", ".venv/", "dist/", "build/", "target/")
+_FORBIDDEN_CONTAINS = tuple("/" + p for p in _FORBIDDEN_PREFIXES)
+
+# Test paths: tests/ or testing/ directories, test_*.py, *_test.py, conftest.py
+_TEST_RE = re.compile(
+    r'(?:^|/)(?:tests?/|testing/|test_|conftest\.py$)|_test\.py$',
+    re.IGNORECASE,
+)
+
+
+def _forbidden_dir_hit(path: str) -> str | None:
+    """Return the forbidden directory that path lives under, if any."""
+    # Fast path: a single C-level prefix check plus a few substring scans
+    if not path.startswith(_FORBIDDEN_PREFIXES) and not any(c in path for c in _FORBIDDEN_CONTAINS):
+        return None
+    for d in _FORBIDDEN_PREFIXES:
+        if path.startswith(d) or f"/{d}" in path:
+            return d
+    return None
+
+
+def _scan_diff(diff: str) -> tuple[set[str], int, str | None]:
+    """Scan a unified diff once for everything the gate needs.
+    
+    Returns:
+        Tuple of (files touched, number of +/- lines excluding file headers,
+        first forbidden directory touched or None)
+    """
+    files: set[str] = set()
+    changed = 0
+    forbidden_hit = None
+    start = 0
+    n = len(diff)
+    while start < n:
+        nl = diff.find("\n", start)
+        end = n if nl < 0 else nl
+        if diff.startswith(("+++ b/", "--- a/"), start, end):
+            path = diff[start + 6:end].strip()
+            if path and path != "/dev/null":
+                files.add(path)
+                if forbidden_hit is None:
+                    forbidden_hit = _forbidden_dir_hit(path)
+        elif diff.startswith(("+", "-"), start, end) and not diff.startswith(("+++", "---"), start, end):
+            changed += 1
+        if nl < 0:
+            break
+        start = nl + 1
+    return files, changed, forbidden_hit
+
+
+_ALLOWED_KINDS: Mapping[Phase, tuple[str, ...]] = MappingProxyType({
+    Phase.INGEST: ("inspect", "search"),
+    Phase.LOCALIZE: ("inspect", "search"),
+    Phase.PLAN: ("inspect", "search", "edit"),  # Allow edit from PLAN
+    Phase.PATCH_CANDIDATES: ("edit", "inspect", "search"),
+    Phase.TEST_STAGE: ("run_tests", "inspect"),
+    Phase.DIAGNOSE: ("inspect", "search", "edit"),
+    Phase.MINIMIZE: ("edit", "inspect", "run_tests"),
+    Phase.FINALIZE: ("finalize", "run_tests"),
+    Phase.DONE: (),
+})
+
+
+def _allowed_kinds_for_phase(phase: Phase) -> tuple[str, ...]:
     """Get allowed proposal kinds for a given phase."""
-    return {
-        Phase.INGEST: ["inspect", "search"],
-        Phase.LOCALIZE: ["inspect", "search"],
-        Phase.PLAN: ["inspect", "search", "edit"],  # Allow edit from PLAN
-        Phase.PATCH_CANDIDATES: ["edit", "inspect", "search"],
-        Phase.TEST_STAGE: ["run_tests", "inspect"],
-        Phase.DIAGNOSE: ["inspect", "search", "edit"],
-        Phase.MINIMIZE: ["edit", "inspect", "run_tests"],
-        Phase.FINALIZE: ["finalize", "run_tests"],
-        Phase.DONE: [],
-    }.get(phase, ["inspect"])
+    return _ALLOWED_KINDS.get(phase, ("inspect",))
 
 
 # =============================================================================
@@ -685,6 +952,99 @@ def execute(profile: Profile, state: AgentState, proposal: Proposal) -> ExecResu
         return ExecResult(status="fail", summary=f"Unknown proposal kind: {proposal.kind}")
 
 
+def _map_io(fn: Callable[[T], R], items: list[T]) -> list[R]:
+    """Apply an I/O-bound fn to items, on a thread pool when there are several.
+    
+    Results come back in input order; the first exception is re-raised.
+    """
+    if len(items) <= 1:
+        return [fn(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(_MAX_IO_WORKERS, len(items))) as executor:
+        return list(executor.map(fn, items))
+
+
+# File contents shared by inspect and the edit helpers, keyed by
+# (path, mtime_ns, size) so a changed file is never served stale. Guarded
+# by a lock because batched reads run on worker threads.
+_FILE_CACHE: OrderedDict[tuple[str, int, int], str] = OrderedDict()
+_FILE_CACHE_LOCK = threading.Lock()
+_FILE_CACHE_SIZE = 256
+_INSPECT_MAX_CHARS = 8000
+
+
+def _cached_read_text(path: Path, st: os.stat_result | None = None) -> str:
+    """Return the text of path, from memory when it hasn't changed on disk."""
+    if st is None:
+        st = path.stat()
+    key = (str(path), st.st_mtime_ns, st.st_size)
+    text = _lookup_file_text(key)
+    if text is not None:
+        return text
+    
+    text = path.read_text()
+    _cache_file_text(key, text)
+    return text
+
+
+def _write_cached_text(path: Path, text: str) -> None:
+    """Write text to path and record it so the next read is served from memory."""
+    path.write_text(text)
+    st = path.stat()
+    _cache_file_text((str(path), st.st_mtime_ns, st.st_size), text)
+
+
+def _lookup_file_text(key: tuple[str, int, int]) -> str | None:
+    with _FILE_CACHE_LOCK:
+        text = _FILE_CACHE.get(key)
+        if text is not None:
+            _FILE_CACHE.move_to_end(key)
+        return text
+
+
+def _cache_file_text(key: tuple[str, int, int], text: str) -> None:
+    with _FILE_CACHE_LOCK:
+        _FILE_CACHE[key] = text
+        _FILE_CACHE.move_to_end(key)
+        if len(_FILE_CACHE) > _FILE_CACHE_SIZE:
+            _FILE_CACHE.popitem(last=False)
+
+
+def _safe_read_text(path: Path, limit: int = _INSPECT_MAX_CHARS) -> str:
+    """Return the first limit characters of path, decoded as UTF-8.
+    
+    Only the bytes that can contribute to those characters are read, so a
+    large file costs no more than a small one. Undecodable bytes are
+    dropped and newlines are normalised the way read_text() does.
+    """
+    # A UTF-8 character is at most 4 bytes
+    with path.open("rb") as fh:
+        data = fh.read(limit * 4)
+    text = data.decode("utf-8", "ignore")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text[:limit]
+
+
+def _safe_read(path: Path) -> tuple[str, bool]:
+    """Read a file for inspect, returning (content, ok) instead of raising.
+    
+    Files already in the shared cache are served from memory; anything else
+    is read only up to the inspect limit and not cached, since a truncated
+    text is no use to the edit helpers.
+    """
+    try:
+        st = path.stat()
+    except OSError:
+        return "File not found", False
+    try:
+        text = _lookup_file_text((str(path), st.st_mtime_ns, st.st_size))
+        if text is not None:
+            return text[:_INSPECT_MAX_CHARS], True
+        return _safe_read_text(path), True
+    except Exception as e:
+        return f"Error reading: {e}", False
+
+
 def _exec_inspect(state: AgentState, proposal: Proposal) -> ExecResult:
     """Execute an inspect proposal."""
     workdir = Path(state.repo.workdir)
@@ -705,26 +1065,22 @@ def _exec_inspect(state: AgentState, proposal: Proposal) -> ExecResult:
         contents = {}
         files_read = state.notes.get("files_read", [])
         
-        for f in files:
-            path = workdir / f
-            if path.exists():
-                try:
-                    file_content = path.read_text()[:8000]
-                    contents[f] = file_content
-                    if f not in files_read:
-                        files_read.append(f)
-                except Exception as e:
-                    contents[f] = f"Error reading: {e}"
-            else:
-                contents[f] = "File not found"
+        hits = state.localization_hits
+        
+        # Batched proposals read their files concurrently
+        results = _map_io(_safe_read, [workdir / f for f in files])
+        for f, (file_content, ok) in zip(files, results):
+            contents[f] = file_content
+            if ok and f not in files_read:
+                files_read.append(f)
         
         state.notes["files_read"] = files_read
         state.notes["last_file_contents"] = contents
         
         # Add to localization hits if file contains useful info
-        for fname in contents:
-            if contents[fname] != "File not found":
-                state.localization_hits.append({
+        for fname, file_content in contents.items():
+            if file_content != "File not found":
+                hits.append({
                     "file": fname,
                     "reason": "file read",
                     "type": "read",
@@ -741,95 +1097,199 @@ def _exec_inspect(state: AgentState, proposal: Proposal) -> ExecResult:
 
 
 def _exec_search(state: AgentState, proposal: Proposal) -> ExecResult:
-    """Execute a search proposal using ripgrep, grep, or Python fallback."""
+    """Execute a search proposal using ripgrep, grep, or Python fallback.
+    
+    A batched proposal carries every query in ``inputs["queries"]``;
+    ``inputs["query"]`` always holds the first one.
+    """
     workdir = Path(state.repo.workdir)
     query = proposal.inputs.get("query", "")
+    queries = proposal.inputs.get("queries") or ([query] if query else [])
     
-    if not query:
+    if not queries:
         return ExecResult(status="fail", summary="No search query provided")
     
-    files = []
-    
-    # Try ripgrep first
+    # Batched proposals run their queries concurrently
     try:
-        result = subprocess.run(
-            ["rg", "-l", "--max-count", "5", query],
-            cwd=workdir,
-            capture_output=True,
-            text=True,
-            timeout=30,
-            check=False,
-        )
-        if result.returncode == 0 and result.stdout.strip():
-            files = [f.strip() for f in result.stdout.strip().split("\n") if f.strip()][:20]
-    except FileNotFoundError:
-        pass  # rg not available
-    
-    # Try grep if rg didn't work
-    if not files:
-        try:
-            result = subprocess.run(
-                ["grep", "-rl", "--include=*.py", query, "."],
-                cwd=workdir,
-                capture_output=True,
-                text=True,
-                timeout=30,
-                check=False,
-            )
-            if result.returncode == 0 and result.stdout.strip():
-                files = [f.strip() for f in result.stdout.strip().split("\n") if f.strip()][:20]
-        except FileNotFoundError:
-            pass  # grep not available
-    
-    # Python fallback - walk directory and search
-    if not files:
-        try:
-            for root, dirs, filenames in workdir.walk():
-                # Skip hidden and common non-code directories
-                dirs[:] = [d for d in dirs if not d.startswith('.') and d not in [
-                    '__pycache__', 'node_modules', 'venv', '.git', 'build', 'dist'
-                ]]
-                
-                for fname in filenames:
-                    if not fname.endswith('.py'):
-                        continue
-                    fpath = root / fname
-                    try:
-                        content = fpath.read_text(errors='ignore')
-                        if query in content:
-                            rel_path = str(fpath.relative_to(workdir))
-                            files.append(rel_path)
-                            if len(files) >= 20:
-                                break
-                    except Exception:
-                        pass
-                if len(files) >= 20:
-                    break
-        except Exception as e:
-            return ExecResult(status="fail", summary=f"Python search failed: {e}")
+        results = _map_io(partial(_search_files, workdir), queries)
+    except Exception as e:
+        return ExecResult(status="fail", summary=f"Python search failed: {e}")
+    matches = dict(zip(queries, results))
     
     # Update localization hits
-    for f in files:
-        state.localization_hits.append({
-            "file": f,
-            "reason": f"match for '{query}'",
-            "type": "search",
-        })
+    files = []
+    for q, found in matches.items():
+        for f in found:
+            state.localization_hits.append({
+                "file": f,
+                "reason": f"match for '{q}'",
+                "type": "search",
+            })
+            if f not in files:
+                files.append(f)
+    
+    label = f"'{queries[0]}'" if len(queries) == 1 else str(queries)
+    metrics = {"query": queries[0], "matches": files}
+    if len(queries) > 1:
+        metrics["queries"] = queries
     
     if files:
         return ExecResult(
             status="ok",
-            summary=f"Found {len(files)} files matching '{query}': {files[:5]}",
+            summary=f"Found {len(files)} files matching {label}: {files[:5]}",
             artifacts=files,
-            metrics={"query": query, "matches": files},
+            metrics=metrics,
         )
     else:
         return ExecResult(
             status="ok",
-            summary=f"No files found matching '{query}'",
+            summary=f"No files found matching {label}",
             artifacts=[],
-            metrics={"query": query, "matches": []},
+            metrics=metrics,
+        )
+
+
+def _search_files(workdir: Path, query: str) -> list[str]:
+    """Find up to 20 .py files containing query using ripgrep, grep, or Python.
+    
+    The query is matched literally by all three backends.
+    """
+    files = []
+    
+    # Try ripgrep first
+    if _RG_PATH:
+        files = _stream_matches(
+            [
+                _RG_PATH, "-l", "--fixed-strings", "--type", "py",
+                "--max-count", "5", "--max-columns", "1000",
+                "--threads", str(_RG_THREADS), "--", query,
+            ],
+            workdir,
+        )
+    
+    # Try grep if rg didn't work
+    if not files and _GREP_PATH:
+        files = _stream_matches(
+            [_GREP_PATH, "-rlF", "--include=*.py", "--", query, "."],
+            workdir,
         )
+    
+    # Python fallback - walk directory and search
+    if not files:
+        needle = query.encode("utf-8", "ignore")
+        for abs_path, rel_path in _walk_py_files(workdir):
+            if _file_contains(abs_path, needle):
+                files.append(rel_path)
+                if len(files) >= 20:
+                    break
+    
+    return files
+
+
+def _stream_matches(
+    cmd: list[str],
+    workdir: Path,
+    limit: int = 20,
+    timeout: float = 30,
+) -> list[str]:
+    """Run a files-with-matches search, returning as soon as limit paths arrive.
+    
+    Output is consumed line by line and the process is stopped once enough
+    paths are collected, instead of waiting for it to scan the whole tree.
+    A search that runs to completion with a non-zero exit yields nothing.
+    """
+    proc = subprocess.Popen(
+        cmd,
+        cwd=workdir,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+    )
+    watchdog = threading.Timer(timeout, proc.kill)
+    watchdog.start()
+    files = []
+    try:
+        for line in proc.stdout:
+            path = line.strip()
+            if path:
+                files.append(path)
+                if len(files) >= limit:
+                    _stop_process(proc)
+                    return files
+    except BaseException:
+        _stop_process(proc)
+        raise
+    finally:
+        watchdog.cancel()
+        proc.stdout.close()
+    
+    return files if proc.wait() == 0 else []
+
+
+def _stop_process(proc: subprocess.Popen) -> None:
+    """Terminate a process, escalating to kill if it lingers."""
+    if proc.poll() is not None:
+        return
+    proc.terminate()
+    try:
+        proc.wait(timeout=1)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+
+def _walk_py_files(workdir: Path) -> Iterator[tuple[str, str]]:
+    """Yield (absolute, relative) paths of .py files under workdir.
+    
+    Same top-down order as os.walk, but driven by os.scandir with an explicit
+    stack so entry types come from the cached dirent instead of extra stats.
+    """
+    stack = [(str(workdir), "")]
+    while stack:
+        dirpath, rel_dir = stack.pop()
+        subdirs = []
+        try:
+            with os.scandir(dirpath) as it:
+                for entry in it:
+                    name = entry.name
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            # Skip hidden and common non-code directories
+                            if not name.startswith('.') and name not in _IGNORED_DIRS:
+                                subdirs.append((entry.path, rel_dir + name + "/"))
+                        elif (
+                            name.endswith('.py')
+                            and not name.endswith(_SKIP_SUFFIXES)
+                            and entry.is_file()
+                        ):
+                            yield entry.path, rel_dir + name
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+        # Reversed so subdirectories are popped in listing order
+        stack.extend(reversed(subdirs))
+
+
+def _file_contains(path: str, needle: bytes, small_size: int = 64 * 1024) -> bool:
+    """Check whether a file contains needle without decoding it.
+    
+    Small files are read in one go; larger ones are memory-mapped and
+    searched in place, so the scan stops at the first hit and the file is
+    never copied into a Python bytes object. Files over
+    _SEARCH_MAX_FILE_SIZE are never searched.
+    """
+    try:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size > _SEARCH_MAX_FILE_SIZE:
+                return False
+            if size <= small_size:
+                return needle in f.read()
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return mm.find(needle) >= 0
+    except (OSError, ValueError):
+        return False
 
 
 def _exec_edit(state: AgentState, proposal: Proposal) -> ExecResult:
@@ -840,8 +1300,11 @@ def _exec_edit(state: AgentState, proposal: Proposal) -> ExecResult:
     if not diff:
         return ExecResult(status="fail", summary="No diff provided")
     
+    # Classify the diff once; every helper below works off the same record
+    parsed = _parse_diff(diff)
+    
     # Validate patch before attempting to apply
-    is_valid, error = _validate_patch(diff)
+    is_valid, error = _validate_patch(parsed)
     if not is_valid:
         logger.warning("Invalid patch detected", error=error)
         return ExecResult(
@@ -851,7 +1314,7 @@ def _exec_edit(state: AgentState, proposal: Proposal) -> ExecResult:
         )
     
     # Validate patch produces valid Python syntax
-    is_valid, error = _validate_patch_syntax(diff, workdir)
+    is_valid, error = _validate_patch_syntax(parsed, workdir)
     if not is_valid:
         logger.warning("Patch syntax validation failed", error=error)
         return ExecResult(
@@ -861,94 +1324,161 @@ def _exec_edit(state: AgentState, proposal: Proposal) -> ExecResult:
         )
     
     # Try to repair common patch issues
-    diff = _repair_patch(diff)
+    diff = _repair_patch(parsed)
     
     try:
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".patch", delete=False) as f:
-            f.write(diff)
-            patch_path = f.name
+        # A 3-way merge can only leave conflict markers behind when the diff
+        # names blob ids, so only then snapshot the files it touches
+        snapshot = _snapshot_files(workdir, parsed.files) if _names_blobs(diff) else None
         
-        # Check first
+        # Apply in one shot with --3way for more lenient patching; there is
+        # no separate --check probe. The patch is fed on stdin.
         result = subprocess.run(
-            ["git", "apply", "--check", patch_path],
+            ["git", "apply", "--3way"],
+            input=diff,
             cwd=workdir,
             capture_output=True,
             text=True,
             check=False,
+            timeout=60,
         )
         
         if result.returncode != 0:
+            if snapshot is not None and "with conflicts" in result.stderr:
+                _restore_snapshot(workdir, snapshot)
+            
             # Log the failed patch for debugging
             logger.warning(
-                "Patch check failed",
+                "Patch apply failed",
                 error=result.stderr[:500],
                 diff_preview=diff[:500],
             )
             
             # Try to apply as a direct file edit if patch fails
-            edit_result = _try_direct_edit(state, proposal, diff)
+            edit_result = _try_direct_edit(state, proposal, parsed)
             if edit_result:
                 return edit_result
             
             # Try structured SEARCH/REPLACE approach
-            structured_result = _try_structured_edit(state, proposal, diff)
+            structured_result = _try_structured_edit(state, proposal, parsed)
             if structured_result:
                 return structured_result
             
             return ExecResult(
                 status="fail",
-                summary=f"Patch check failed: {result.stderr[:200]}",
+                summary=f"Patch apply failed: {result.stderr[:200]}",
                 metrics={"stderr": result.stderr, "diff": diff[:1000]},
             )
         
-        # Apply with --3way for more lenient patching
-        result = subprocess.run(
-            ["git", "apply", "--3way", patch_path],
-            cwd=workdir,
-            capture_output=True,
-            text=True,
-            check=False,
+        files = proposal.inputs.get("files", [])
+        state.budget.patch_attempts += 1
+        return ExecResult(
+            status="ok",
+            summary=f"Patch applied successfully ({len(files)} files)",
+            artifacts=files,
         )
-        
-        if result.returncode == 0:
-            files = proposal.inputs.get("files", [])
-            state.budget.patch_attempts += 1
-            return ExecResult(
-                status="ok",
-                summary=f"Patch applied successfully ({len(files)} files)",
-                artifacts=files,
-            )
-        else:
-            return ExecResult(status="fail", summary=f"Patch apply failed: {result.stderr[:200]}")
     except Exception as e:
         return ExecResult(status="fail", summary=f"Edit failed: {e}")
 
 
-def _validate_patch(diff: str) -> tuple[bool, str]:
+def _names_blobs(diff: str) -> bool:
+    """Whether a diff carries ``index <blob>..<blob>`` lines."""
+    return diff.startswith("index ") or "\nindex " in diff
+
+
+def _snapshot_files(workdir: Path, files: list[str]) -> dict[str, str | None]:
+    """Capture the current text of files (None for missing ones)."""
+    snapshot = {}
+    for f in files:
+        try:
+            snapshot[f] = _cached_read_text(workdir / f)
+        except (OSError, UnicodeDecodeError):
+            snapshot[f] = None
+    return snapshot
+
+
+def _restore_snapshot(workdir: Path, snapshot: dict[str, str | None]) -> None:
+    """Undo a conflicted ``git apply --3way``.
+    
+    --3way implies --index, so before the apply the index matched the
+    working tree. Resetting the paths and re-adding the snapshot puts both
+    back the way they were.
+    """
+    paths = list(snapshot)
+    subprocess.run(
+        ["git", "reset", "-q", "--", *paths],
+        cwd=workdir, capture_output=True, check=False,
+    )
+    for f, text in snapshot.items():
+        path = workdir / f
+        if text is None:
+            path.unlink(missing_ok=True)
+        else:
+            _write_cached_text(path, text)
+    existing = [f for f, text in snapshot.items() if text is not None]
+    if existing:
+        subprocess.run(
+            ["git", "add", "--", *existing],
+            cwd=workdir, capture_output=True, check=False,
+        )
+
+
+@dataclass(slots=True)
+class ParsedDiff:
+    """A unified diff with its lines classified once up front.
+    
+    Attributes:
+        lines: Raw diff lines (split on newlines, nothing stripped)
+        files: Paths from ``--- a/`` and ``+++ b/`` headers, first-seen order
+        current_file: Path from the last header line, tab suffix removed
+        additions: Added lines with the ``+`` prefix stripped
+        removals: Removed lines with the ``-`` prefix stripped
+        headers_present: Whether the diff has a ``diff --git`` line
+    """
+    
+    lines: list[str]
+    files: list[str] = field(default_factory=list)
+    current_file: str | None = None
+    additions: list[str] = field(default_factory=list)
+    removals: list[str] = field(default_factory=list)
+    headers_present: bool = False
+
+
+def _parse_diff(diff: str) -> ParsedDiff:
+    """Classify every line of a unified diff.
+    
+    Each category is pulled out by one compiled scan, so the per-line work
+    happens inside the regex engine rather than in a Python loop.
+    """
+    text = "\n" + diff
+    parsed = ParsedDiff(
+        lines=diff.split("\n"),
+        additions=_ADDITION_LINE_RE.findall(text),
+        removals=_REMOVAL_LINE_RE.findall(text),
+        headers_present=_GIT_HEADER_LINE_RE.search(text) is not None,
+    )
+    files = parsed.files
+    
+    for path in _FILE_HEADER_LINE_RE.findall(text):
+        parsed.current_file = path.split("\t")[0]
+        path = path.strip()
+        if path and path != "/dev/null" and path not in files:
+            files.append(path)
+    
+    return parsed
+
+
+def _validate_patch(parsed: ParsedDiff) -> tuple[bool, str]:
     """Validate that a patch contains actual changes.
     
     Returns:
         Tuple of (is_valid, error_message)
     """
-    if not diff or not diff.strip():
+    if not any(line.strip() for line in parsed.lines):
         return False, "Empty diff"
     
-    lines = diff.split("\n")
-    removals = []
-    additions = []
-    
-    for line in lines:
-        # Skip headers and context
-        if line.startswith("---") or line.startswith("+++") or line.startswith("@@"):
-            continue
-        if line.startswith("diff --git"):
-            continue
-        
-        # Collect actual changes
-        if line.startswith("-") and not line.startswith("---"):
-            removals.append(line[1:])  # Strip the - prefix
-        elif line.startswith("+") and not line.startswith("+++"):
-            additions.append(line[1:])  # Strip the + prefix
+    removals = parsed.removals
+    additions = parsed.additions
     
     if not removals and not additions:
         return False, "No changes in diff (no + or - lines)"
@@ -974,7 +1504,7 @@ def _validate_patch(diff: str) -> tuple[bool, str]:
     return True, ""
 
 
-def _validate_patch_syntax(diff: str, workdir: Path) -> tuple[bool, str]:
+def _validate_patch_syntax(parsed: ParsedDiff, workdir: Path) -> tuple[bool, str]:
     """Validate that Python patches produce valid syntax.
     
     Applies the patch virtually and parses the result as AST.
@@ -984,8 +1514,7 @@ def _validate_patch_syntax(diff: str, workdir: Path) -> tuple[bool, str]:
     """
     import ast
     
-    # Extract files from diff
-    files = _extract_files_from_diff(diff)
+    files = parsed.files
     if not files:
         return True, ""  # Can't validate without file info
     
@@ -999,8 +1528,8 @@ def _validate_patch_syntax(diff: str, workdir: Path) -> tuple[bool, str]:
             continue
         
         try:
-            original = full_path.read_text()
-            patched = _simulate_patch(original, diff, file_path)
+            original = _cached_read_text(full_path)
+            patched = _simulate_patch(original, parsed.lines, file_path)
             
             if patched is None:
                 continue  # Could not simulate patch
@@ -1015,14 +1544,13 @@ def _validate_patch_syntax(diff: str, workdir: Path) -> tuple[bool, str]:
     return True, ""
 
 
-def _simulate_patch(original: str, diff: str, file_path: str) -> str | None:
+def _simulate_patch(original: str, diff_lines: list[str], file_path: str) -> str | None:
     """Simulate applying a patch to content without actually writing.
     
     Returns:
         Patched content or None if simulation failed
     """
     lines = original.splitlines(keepends=True)
-    diff_lines = diff.split("\n")
     
     # Find hunks for this file
     in_file = False
@@ -1030,25 +1558,25 @@ def _simulate_patch(original: str, diff: str, file_path: str) -> str | None:
     current_hunk = None
     
     for line in diff_lines:
-        if line.startswith("--- a/") or line.startswith("--- "):
-            in_file = file_path in line
-        elif line.startswith("+++ b/") or line.startswith("+++ "):
+        prefix = line[:4]
+        if prefix == "--- " or prefix == "+++ ":
             in_file = file_path in line
-        elif line.startswith("@@") and in_file:
+        elif not in_file:
+            continue
+        elif prefix[:2] == "@@":
             # Parse hunk header: @@ -start,len +start,len @@
-            import re
-            match = re.match(r"@@ -(\d+)", line)
+            match = _HUNK_START_RE.match(line)
             if match:
                 start_line = int(match.group(1))
                 current_hunk = {"start": start_line - 1, "removals": [], "additions": []}
                 hunks.append(current_hunk)
-        elif current_hunk is not None and in_file:
-            if line.startswith("-") and not line.startswith("---"):
+        elif current_hunk is not None:
+            head = prefix[:1]
+            if head == "-" and prefix[:3] != "---":
                 current_hunk["removals"].append(line[1:])
-            elif line.startswith("+") and not line.startswith("+++"):
+            elif head == "+" and prefix[:3] != "+++":
                 current_hunk["additions"].append(line[1:])
-            elif line.startswith(" "):
-                pass  # Context line
+            # Anything else is a context line
     
     if not hunks:
         return None
@@ -1074,7 +1602,7 @@ def _simulate_patch(original: str, diff: str, file_path: str) -> str | None:
     return "".join(result_lines)
 
 
-def _try_structured_edit(state: AgentState, proposal: Proposal, diff: str) -> ExecResult | None:
+def _try_structured_edit(state: AgentState, proposal: Proposal, parsed: ParsedDiff) -> ExecResult | None:
     """Try to apply changes using SEARCH/REPLACE blocks extracted from diff.
     
     This is a more robust approach when unified diffs fail.
@@ -1084,28 +1612,17 @@ def _try_structured_edit(state: AgentState, proposal: Proposal, diff: str) -> Ex
     
     if not files:
         # Try to extract from diff
-        files = _extract_files_from_diff(diff)
+        files = parsed.files
     
     if not files:
         return None
     
-    # Parse diff to extract old/new code blocks
-    lines = diff.split("\n")
-    current_file = None
-    removals = []
-    additions = []
+    # Old/new code blocks come from the parsed diff
+    current_file = parsed.current_file
+    removals = parsed.removals
+    additions = parsed.additions
     changes_made = False
     
-    for line in lines:
-        if line.startswith("--- a/"):
-            current_file = line[6:].split("\t")[0]
-        elif line.startswith("+++ b/"):
-            current_file = line[6:].split("\t")[0]
-        elif line.startswith("-") and not line.startswith("---"):
-            removals.append(line[1:])
-        elif line.startswith("+") and not line.startswith("+++"):
-            additions.append(line[1:])
-    
     if not current_file or not (removals or additions):
         return None
     
@@ -1114,7 +1631,7 @@ def _try_structured_edit(state: AgentState, proposal: Proposal, diff: str) -> Ex
         return None
     
     try:
-        original = file_path.read_text()
+        original = _cached_read_text(file_path)
         modified = original
         
         # Try to find and replace the removed block with the added block
@@ -1126,24 +1643,35 @@ def _try_structured_edit(state: AgentState, proposal: Proposal, diff: str) -> Ex
                 modified = original.replace(old_block, new_block, 1)
                 changes_made = True
             else:
-                # Try line-by-line fuzzy matching
+                # Try line-by-line fuzzy matching. Duplicate removals pair
+                # with the addition at their first occurrence.
+                removal_idx: dict[str, int] = {}
+                for i, line in enumerate(removals):
+                    removal_idx.setdefault(line, i)
+                # Stripped text -> indices of matching original lines, in
+                # file order; each match consumes the next unused line
+                orig_lines = original.split("\n")
+                strip_map: dict[str, deque[int]] = {}
+                for i, orig_line in enumerate(orig_lines):
+                    strip_map.setdefault(orig_line.strip(), deque()).append(i)
                 for old_line in removals:
                     old_stripped = old_line.strip()
-                    if old_stripped and old_stripped in original:
+                    candidates = strip_map.get(old_stripped) if old_stripped else None
+                    if candidates:
                         # Find the index of matching additions
-                        idx = removals.index(old_line)
+                        idx = removal_idx[old_line]
                         new_line = additions[idx] if idx < len(additions) else ""
                         # Replace preserving indentation
-                        for orig_line in original.split("\n"):
-                            if orig_line.strip() == old_stripped:
-                                indent = len(orig_line) - len(orig_line.lstrip())
-                                new_with_indent = " " * indent + new_line.strip()
-                                modified = modified.replace(orig_line, new_with_indent, 1)
-                                changes_made = True
-                                break
+                        line_no = candidates.popleft()
+                        orig_line = orig_lines[line_no]
+                        indent = len(orig_line) - len(orig_line.lstrip())
+                        orig_lines[line_no] = " " * indent + new_line.strip()
+                        changes_made = True
+                if changes_made:
+                    modified = "\n".join(orig_lines)
         
         if changes_made and modified != original:
-            file_path.write_text(modified)
+            _write_cached_text(file_path, modified)
             state.budget.patch_attempts += 1
             return ExecResult(
                 status="ok",
@@ -1155,9 +1683,9 @@ def _try_structured_edit(state: AgentState, proposal: Proposal, diff: str) -> Ex
     
     return None
 
-def _repair_patch(diff: str) -> str:
+def _repair_patch(parsed: ParsedDiff) -> str:
     """Try to repair common patch format issues."""
-    lines = diff.split("\n")
+    lines = parsed.lines
     repaired = []
     
     in_header = True
@@ -1176,7 +1704,7 @@ def _repair_patch(diff: str) -> str:
                 if dst.startswith("b/"):
                     dst = dst[2:]
                 
-                if not any(ln.startswith("diff --git") for ln in lines[:i]):
+                if not parsed.headers_present:
                     repaired.append(f"diff --git a/{src} b/{dst}")
         
         if line.startswith("@@"):
@@ -1192,25 +1720,18 @@ def _repair_patch(diff: str) -> str:
     return result
 
 
-def _try_direct_edit(state: AgentState, proposal: Proposal, diff: str) -> ExecResult | None:
+def _try_direct_edit(state: AgentState, proposal: Proposal, parsed: ParsedDiff) -> ExecResult | None:
     """Try to apply changes directly to files when patch format is invalid."""
     workdir = Path(state.repo.workdir)
     
     # Look for file and content in the diff
-    files = _extract_files_from_diff(diff)
+    files = parsed.files
     if not files:
         return None
     
-    # Try to extract the actual changes from the diff
-    # Look for +/- lines that aren't headers
-    additions = []
-    deletions = []
-    
-    for line in diff.split("\n"):
-        if line.startswith("+") and not line.startswith("+++"):
-            additions.append(line[1:])
-        elif line.startswith("-") and not line.startswith("---"):
-            deletions.append(line[1:])
+    # The actual +/- changes, headers excluded
+    additions = parsed.additions
+    deletions = parsed.removals
     
     if not additions and not deletions:
         return None
@@ -1226,7 +1747,7 @@ def _try_direct_edit(state: AgentState, proposal: Proposal, diff: str) -> ExecRe
             continue
         
         try:
-            content = fpath.read_text()
+            content = _cached_read_text(fpath)
             modified = content
             
             # Strategy 1: Replace exact block
@@ -1243,7 +1764,7 @@ def _try_direct_edit(state: AgentState, proposal: Proposal, diff: str) -> ExecRe
             # Strategy 3: Just insert additions after a context line
             elif additions and not deletions:
                 # Look for context in the diff (lines without +/-)
-                context_lines = [l for l in diff.split("\n") 
+                context_lines = [l for l in parsed.lines 
                                 if l and not l.startswith(("+", "-", "@", "diff", "---", "+++"))]
                 for ctx in context_lines[:3]:
                     if ctx.strip() and ctx.strip() in content:
@@ -1253,7 +1774,7 @@ def _try_direct_edit(state: AgentState, proposal: Proposal, diff: str) -> ExecRe
                         break
             
             if modified != content:
-                fpath.write_text(modified)
+                _write_cached_text(fpath, modified)
                 state.budget.patch_attempts += 1
                 return ExecResult(
                     status="ok",
@@ -1274,14 +1795,22 @@ def _exec_run_tests(state: AgentState, proposal: Proposal) -> ExecResult:
     cmd_parts = command.split() if isinstance(command, str) else command
     
     try:
-        result = subprocess.run(
+        # Own process group so a timeout can take down pytest's workers too
+        proc = subprocess.Popen(
             cmd_parts,
             cwd=workdir,
-            capture_output=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
             text=True,
-            timeout=300,
-            check=False,
+            start_new_session=_POSIX,
         )
+        try:
+            stdout, stderr = proc.communicate(timeout=300)
+        except subprocess.TimeoutExpired:
+            _kill_process_tree(proc)
+            proc.communicate()
+            raise
+        result = subprocess.CompletedProcess(cmd_parts, proc.returncode, stdout, stderr)
         
         passed = result.returncode == 0
         
@@ -1314,6 +1843,34 @@ def _exec_run_tests(state: AgentState, proposal: Proposal) -> ExecResult:
         return ExecResult(status="fail", summary=f"Test run failed: {e}")
 
 
+def _kill_process_tree(proc: subprocess.Popen) -> None:
+    """SIGTERM a process and everything in its group, then SIGKILL after 1s.
+    
+    The process must have been started with start_new_session=True. Where
+    process groups aren't available only the process itself is stopped.
+    """
+    if not _POSIX:
+        _stop_process(proc)
+        return
+    try:
+        pgid = os.getpgid(proc.pid)
+    except ProcessLookupError:
+        return
+    try:
+        os.killpg(pgid, signal.SIGTERM)
+    except ProcessLookupError:
+        return
+    try:
+        proc.wait(timeout=1)
+    except subprocess.TimeoutExpired:
+        pass
+    # Children can outlive the leader, so always sweep the group
+    try:
+        os.killpg(pgid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
 def _extract_test_failures(output: str) -> list[dict]:
     """Extract detailed failure information from pytest output.
     
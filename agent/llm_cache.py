@@ -0,0 +1,349 @@
+"""In-process memoization of deterministic LLM calls.
+
+The agent loop calls the model once per round. At temperature 0 the model is
+deterministic, and the loop frequently revisits identical prompts (fallback
+paths, retries after a gate rejection), so repeated prompts are served from a
+bounded LFU cache keyed by the SHA-256 of the prompt instead of paying another
+network round-trip.
+
+Behind the in-memory tier sits an on-disk cache (one JSON file per key under
+~/.cache/rfsn/llm) so repeated runs of the same task - CI, sweeps over
+profiles - start warm. Disk hits are promoted into the in-memory tier. Set
+RFSN_AGENT_LLM_CACHE=0 to disable the disk tier, or to a directory path to
+relocate it.
+
+The DeepSeek client has its own opt-in SQLite cache (RFSN_LLM_CACHE). It is
+off by default and shares one connection per process, whereas this tier
+writes one file per key so parallel eval workers can share a directory.
+When RFSN_LLM_CACHE is enabled and RFSN_AGENT_LLM_CACHE is unset, the disk
+tier stays off so each response is persisted once, by the client.
+
+Only pass real model calls through cached_call_model: whatever call_fn
+returns at temperature 0 is kept on disk for DEFAULT_TTL_SECONDS.
+
+Non-zero temperatures are never cached: those calls are made precisely to get
+a different answer.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+try:
+    from rfsn_controller.structured_logging import get_logger
+except ImportError:
+    import logging
+    def get_logger(name):
+        return logging.getLogger(name)
+
+logger = get_logger(__name__)
+
+# Emit a stats line every N cacheable lookups
+_STATS_LOG_INTERVAL = 100
+
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "rfsn" / "llm"
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+# Run a size/TTL sweep of the disk cache every N writes
+_EVICT_INTERVAL = 100
+
+
+class LFUCache:
+    """Bounded least-frequently-used cache with O(1) get/put.
+
+    Entries are bucketed by access frequency; within a bucket the oldest
+    entry is evicted first. Not thread-safe on its own.
+    """
+
+    def __init__(self, maxsize: int = 50_000):
+        """Initialize the cache.
+
+        Args:
+            maxsize: Maximum number of entries to keep
+        """
+        self.maxsize = maxsize
+        self._values: dict[str, Any] = {}
+        self._freq: dict[str, int] = {}
+        self._buckets: dict[int, OrderedDict[str, None]] = {}
+        self._min_freq = 0
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._values
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the cached value for key and bump its frequency."""
+        if key not in self._values:
+            return default
+        self._touch(key)
+        return self._values[key]
+
+    def put(self, key: str, value: Any) -> None:
+        """Insert or update a value, evicting the least-used entry if full."""
+        if self.maxsize <= 0:
+            return
+        if key in self._values:
+            self._values[key] = value
+            self._touch(key)
+            return
+        if len(self._values) >= self.maxsize:
+            self._evict()
+        self._values[key] = value
+        self._freq[key] = 1
+        self._buckets.setdefault(1, OrderedDict())[key] = None
+        self._min_freq = 1
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        self._values.clear()
+        self._freq.clear()
+        self._buckets.clear()
+        self._min_freq = 0
+
+    def _touch(self, key: str) -> None:
+        freq = self._freq[key]
+        bucket = self._buckets[freq]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[freq]
+            if self._min_freq == freq:
+                self._min_freq = freq + 1
+        self._freq[key] = freq + 1
+        self._buckets.setdefault(freq + 1, OrderedDict())[key] = None
+
+    def _evict(self) -> None:
+        bucket = self._buckets[self._min_freq]
+        key, _ = bucket.popitem(last=False)
+        if not bucket:
+            del self._buckets[self._min_freq]
+        del self._values[key]
+        del self._freq[key]
+
+
+class FileCache:
+    """On-disk response cache, one JSON file per key.
+
+    Entries live at ``cache_dir/key[:2]/key.json`` and are written atomically
+    via os.replace, so concurrent runs sharing a cache directory never see a
+    partial file. Reads refresh the file's mtime, which makes the periodic
+    size sweep evict least-recently-used entries first.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path = DEFAULT_CACHE_DIR,
+        ttl: float = DEFAULT_TTL_SECONDS,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        """Initialize the cache.
+
+        Args:
+            cache_dir: Root directory for cache files
+            ttl: Seconds after which an entry is considered expired
+            max_bytes: Total size the cache is trimmed back to on eviction
+        """
+        self.cache_dir = Path(cache_dir)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._writes = 0
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> dict | None:
+        """Return the cached response for key, or None if missing or expired."""
+        path = self._path(key)
+        try:
+            if time.time() - path.stat().st_mtime > self.ttl:
+                path.unlink(missing_ok=True)
+                return None
+            response = json.loads(path.read_bytes())
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return response
+
+    def set(self, key: str, response: dict) -> None:
+        """Store a response. Failures are logged and otherwise ignored."""
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(response, f)
+                os.replace(tmp, path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+        except (OSError, TypeError, ValueError) as e:
+            logger.debug("LLM disk cache write failed", error=str(e))
+            return
+
+        self._writes += 1
+        if self._writes % _EVICT_INTERVAL == 0:
+            self.evict()
+
+    def evict(self) -> int:
+        """Drop expired entries, then the least recently used until under max_bytes.
+
+        Returns:
+            Number of entries removed
+        """
+        now = time.time()
+        entries = []
+        removed = 0
+        for path in self.cache_dir.glob("*/*.json"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            if now - st.st_mtime > self.ttl:
+                path.unlink(missing_ok=True)
+                removed += 1
+            else:
+                entries.append((st.st_mtime, st.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        if total > self.max_bytes:
+            entries.sort()
+            for _, size, path in entries:
+                path.unlink(missing_ok=True)
+                removed += 1
+                total -= size
+                if total <= self.max_bytes:
+                    break
+        return removed
+
+    def clear(self) -> None:
+        """Delete every cached entry."""
+        for path in self.cache_dir.glob("*/*.json"):
+            path.unlink(missing_ok=True)
+
+
+_cache = LFUCache(maxsize=50_000)
+_lock = threading.Lock()
+_stats = {"hits": 0, "disk_hits": 0, "misses": 0}
+
+_disk_cache: FileCache | None = None
+_disk_configured = False
+
+
+def configure_disk_cache(cache_dir: Path | str | None, **kwargs: Any) -> None:
+    """Point the disk tier at cache_dir, or disable it with None.
+
+    Extra keyword arguments are passed to FileCache.
+    """
+    global _disk_cache, _disk_configured
+    _disk_cache = FileCache(Path(cache_dir), **kwargs) if cache_dir is not None else None
+    _disk_configured = True
+
+
+def _get_disk_cache() -> FileCache | None:
+    """Return the disk tier, configuring it from the environment on first use."""
+    if not _disk_configured:
+        setting = os.environ.get("RFSN_AGENT_LLM_CACHE")
+        if setting is None:
+            # Defer to the client's persistent cache when that one is on
+            client_cache = os.environ.get("RFSN_LLM_CACHE", "0") not in ("0", "")
+            setting = "0" if client_cache else "1"
+        if setting in ("0", "false", "no", "off"):
+            configure_disk_cache(None)
+        elif setting in ("", "1", "true", "yes", "on"):
+            configure_disk_cache(DEFAULT_CACHE_DIR)
+        else:
+            configure_disk_cache(setting)
+    return _disk_cache
+
+
+def prompt_key(prompt: str, temperature: float = 0.0) -> str:
+    """Compute the cache key for a prompt at a given temperature."""
+    return hashlib.sha256(f"{prompt}|t={temperature}".encode("utf-8")).hexdigest()
+
+
+def cached_call_model(
+    prompt: str,
+    temperature: float,
+    call_fn: Callable[..., dict],
+) -> dict:
+    """Call the model through the response cache.
+
+    Args:
+        prompt: Full prompt text
+        temperature: Sampling temperature; only 0.0 is cached
+        call_fn: Underlying model call, invoked as call_fn(prompt, temperature=...)
+
+    Returns:
+        Model response dict
+    """
+    if temperature != 0.0:
+        return call_fn(prompt, temperature=temperature)
+
+    key = prompt_key(prompt, temperature)
+    with _lock:
+        response = _cache.get(key)
+        if response is not None:
+            _stats["hits"] += 1
+            _maybe_log_stats()
+            return response
+
+    # Disk and network I/O happen outside the lock
+    disk = _get_disk_cache()
+    if disk is not None:
+        response = disk.get(key)
+        if response is not None:
+            with _lock:
+                _stats["disk_hits"] += 1
+                _cache.put(key, response)
+                _maybe_log_stats()
+            return response
+
+    with _lock:
+        _stats["misses"] += 1
+        _maybe_log_stats()
+
+    response = call_fn(prompt, temperature=temperature)
+
+    with _lock:
+        _cache.put(key, response)
+    if disk is not None:
+        disk.set(key, response)
+    return response
+
+
+def cache_stats() -> dict[str, int]:
+    """Return hit/miss counters and current in-memory cache size."""
+    with _lock:
+        return {**_stats, "size": len(_cache)}
+
+
+def clear_cache() -> None:
+    """Reset the in-memory cache and its counters. The disk tier is kept."""
+    with _lock:
+        _cache.clear()
+        for name in _stats:
+            _stats[name] = 0
+
+
+def _maybe_log_stats() -> None:
+    # Caller holds _lock
+    lookups = sum(_stats.values())
+    if lookups % _STATS_LOG_INTERVAL == 0:
+        logger.debug(
+            "LLM cache stats",
+            hits=_stats["hits"],
+            disk_hits=_stats["disk_hits"],
+            misses=_stats["misses"],
+            size=len(_cache),
+        )
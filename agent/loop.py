@@ -14,11 +14,13 @@ Serial authority: ONE proposal at a time, always gated.
 from __future__ import annotations
 
 from typing import Callable, Dict, Any
+import queue
+import threading
 import time
 
 from .types import AgentState, Proposal, GateDecision, ExecResult, LedgerEvent, Phase
 from .profiles import Profile
-from memory.log import append_event
+from memory.log import append_events, ledger_path
 
 try:
     from rfsn_controller.structured_logging import get_logger
@@ -29,6 +31,100 @@ except ImportError:
 
 logger = get_logger(__name__)
 
+# Phase lookups on the per-round path: name -> member for planner overrides,
+# and the per-phase attempt counter key in state.notes
+_PHASE_FROM_NAME: Dict[str, Phase] = {p.value: p for p in Phase}
+_PHASE_ATTEMPTS_KEY: Dict[Phase, str] = {p: f"phase_{p.value}_attempts" for p in Phase}
+
+# Proposal kinds that count against the model-call budget
+_MODEL_CALL_KINDS = frozenset({"inspect", "search", "edit", "run_tests"})
+
+# Ledger writes are handed to a background flusher so the round loop never
+# blocks on disk. The flusher writes a batch once it holds _LEDGER_BATCH
+# events or _LEDGER_MAX_WAIT_S has passed since the first one arrived.
+_LEDGER_BATCH = 64
+_LEDGER_MAX_WAIT_S = 0.1
+_LEDGER_Q: queue.Queue[tuple[str, AgentState, LedgerEvent | dict]] = queue.Queue()
+_flusher: threading.Thread | None = None
+_flusher_lock = threading.Lock()
+
+# run_dir -> events queued but not yet written, so an episode can wait for
+# its own events without waiting on other episodes running in parallel
+_pending: Dict[str, int] = {}
+_pending_cond = threading.Condition()
+
+
+def _drain_ledger() -> None:
+    """Flusher thread body: write queued events in per-task batches."""
+    while True:
+        batch = [_LEDGER_Q.get()]
+        deadline = time.monotonic() + _LEDGER_MAX_WAIT_S
+        while len(batch) < _LEDGER_BATCH:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(_LEDGER_Q.get(timeout=remaining))
+            except queue.Empty:
+                break
+        
+        # Group by episode, keeping each episode's events in order
+        groups: Dict[str, tuple[AgentState, list[LedgerEvent | dict]]] = {}
+        for run_dir, state, ev in batch:
+            groups.setdefault(run_dir, (state, []))[1].append(ev)
+        for run_dir, (state, events) in groups.items():
+            try:
+                append_events(state, events)
+            except Exception as e:
+                logger.error("Ledger flush failed", error=str(e), task_id=state.task_id)
+            with _pending_cond:
+                left = _pending[run_dir] - len(events)
+                if left:
+                    _pending[run_dir] = left
+                else:
+                    del _pending[run_dir]
+                _pending_cond.notify_all()
+        for _ in batch:
+            _LEDGER_Q.task_done()
+
+
+def queue_event(state: AgentState, ev: LedgerEvent | dict) -> None:
+    """Hand a ledger event to the background flusher.
+    
+    Dict events are timestamped now rather than when they are written.
+    """
+    global _flusher
+    if isinstance(ev, dict) and "ts_unix" not in ev:
+        ev = {"ts_unix": time.time(), **ev}
+    if _flusher is None:
+        with _flusher_lock:
+            if _flusher is None:
+                _flusher = threading.Thread(
+                    target=_drain_ledger, name="ledger-flusher", daemon=True
+                )
+                _flusher.start()
+    run_dir = state.notes.get("run_dir") or str(ledger_path(state).parent)
+    with _pending_cond:
+        _pending[run_dir] = _pending.get(run_dir, 0) + 1
+    _LEDGER_Q.put((run_dir, state, ev))
+
+
+def flush_ledger(state: AgentState | None = None) -> None:
+    """Block until queued ledger events have been written.
+    
+    Args:
+        state: Only wait for this episode's events. Without it, wait for
+            every queued event.
+    """
+    if state is None:
+        _LEDGER_Q.join()
+        return
+    run_dir = state.notes.get("run_dir")
+    if run_dir is None:
+        return
+    with _pending_cond:
+        _pending_cond.wait_for(lambda: run_dir not in _pending)
+
 
 def run_episode(
     profile: Profile,
@@ -69,162 +165,170 @@ def run_episode(
     
     episode_start = time.time()
     
-    while state.phase != Phase.DONE:
-        # Budget check
-        if state.budget.round_idx >= profile.max_rounds:
-            logger.warning(
-                "Max rounds reached",
-                rounds=state.budget.round_idx,
-                max_rounds=profile.max_rounds,
+    # Resolve the run dir here so the flusher thread never mutates state.notes
+    ledger_path(state)
+    
+    try:
+        while state.phase != Phase.DONE:
+            # Budget check
+            if state.budget.round_idx >= profile.max_rounds:
+                logger.warning(
+                    "Max rounds reached",
+                    rounds=state.budget.round_idx,
+                    max_rounds=profile.max_rounds,
+                )
+                state.notes["stop_reason"] = "max_rounds"
+                state.phase = Phase.DONE
+                break
+            
+            round_start = time.time()
+            state.budget.round_idx += 1
+            
+            logger.info(
+                "Round start",
+                round=state.budget.round_idx,
+                phase=state.phase.value,
             )
-            state.notes["stop_reason"] = "max_rounds"
-            state.phase = Phase.DONE
-            break
-        
-        round_start = time.time()
-        state.budget.round_idx += 1
-        
-        logger.info(
-            "Round start",
-            round=state.budget.round_idx,
-            phase=state.phase.value,
-        )
-        
-        # 1. PROPOSE: Get next action from planner
-        try:
-            proposal = propose_fn(profile, state)
-        except Exception as e:
-            logger.error("Proposal generation failed", error=str(e))
-            # Log error and try to continue
-            state.notes["last_error"] = str(e)
-            state.phase = Phase.DIAGNOSE
-            continue
-        
-        logger.info(
-            "Proposal generated",
-            kind=proposal.kind,
-            rationale=proposal.rationale[:100],
-            evidence_count=len(proposal.evidence),
-        )
-        
-        # 2. GATE: Validate proposal
-        decision = gate_fn(profile, state, proposal)
-        
-        if not decision.accept:
-            logger.warning(
-                "Gate rejected proposal",
-                reason=decision.reason,
+            
+            # 1. PROPOSE: Get next action from planner
+            try:
+                proposal = propose_fn(profile, state)
+            except Exception as e:
+                logger.error("Proposal generation failed", error=str(e))
+                # Log error and try to continue
+                state.notes["last_error"] = str(e)
+                state.phase = Phase.DIAGNOSE
+                continue
+            
+            logger.info(
+                "Proposal generated",
                 kind=proposal.kind,
+                rationale=proposal.rationale[:100],
+                evidence_count=len(proposal.evidence),
+            )
+            
+            # 2. GATE: Validate proposal
+            decision = gate_fn(profile, state, proposal)
+            
+            if not decision.accept:
+                logger.warning(
+                    "Gate rejected proposal",
+                    reason=decision.reason,
+                    kind=proposal.kind,
+                )
+                
+                # Track consecutive rejects
+                reject_count = state.notes.get("consecutive_rejects", 0) + 1
+                state.notes["consecutive_rejects"] = reject_count
+                
+                # Log rejection
+                ev = LedgerEvent.now(
+                    task_id=state.task_id,
+                    repo_id=state.repo.repo_id,
+                    phase=state.phase,
+                    proposal=proposal,
+                    gate_decision=decision,
+                    exec_result=ExecResult(status="fail", summary="gate_reject"),
+                    result={"gate_reject": True, "reason": decision.reason},
+                )
+                queue_event(state, ev)
+                
+                # Store rejection for planner to see
+                state.notes["last_gate_reject"] = decision.reason
+                state.notes["last_rejected_proposal"] = {
+                    "kind": proposal.kind,
+                    "rationale": proposal.rationale,
+                }
+                
+                # After 2 rejects in PATCH_CANDIDATES, force specific guidance
+                if reject_count >= 2 and state.phase == Phase.PATCH_CANDIDATES:
+                    state.notes["force_source_edit"] = True
+                    logger.warning("Multiple rejects - forcing source edit guidance")
+                
+                # Force re-planning
+                state.phase = Phase.PLAN if state.phase != Phase.DIAGNOSE else Phase.DIAGNOSE
+                continue
+            
+            # Reset reject counter on success
+            state.notes["consecutive_rejects"] = 0
+            
+            logger.info("Gate accepted proposal")
+            
+            # 3. EXECUTE: Run the proposal
+            try:
+                exec_result = exec_fn(profile, state, proposal)
+            except Exception as e:
+                logger.error("Execution failed", error=str(e))
+                exec_result = ExecResult(
+                    status="fail",
+                    summary=f"Execution error: {str(e)}",
+                )
+            
+            logger.info(
+                "Execution complete",
+                status=exec_result.status,
+                summary=exec_result.summary[:100],
             )
             
-            # Track consecutive rejects
-            reject_count = state.notes.get("consecutive_rejects", 0) + 1
-            state.notes["consecutive_rejects"] = reject_count
+            # 4. UPDATE STATE: Track budgets and touched files
+            if proposal.kind == "run_tests":
+                state.budget.test_runs += 1
+            
+            if proposal.kind == "edit":
+                state.budget.patch_attempts += 1
+                files = proposal.inputs.get("files", [])
+                state.add_touched_files(files)
+                
+                # Record outcome for learning
+                diff = proposal.inputs.get("diff", "")
+                if diff and profile.enable_outcome_learning:
+                    try:
+                        from agent.outcome_learning import record_patch_outcome
+                        record_patch_outcome(
+                            patch_diff=diff,
+                            success=exec_result.status == "ok",
+                            task_id=state.task_id,
+                        )
+                    except Exception as e:
+                        logger.debug("Outcome learning disabled", reason=str(e))
+            
+            if proposal.kind in _MODEL_CALL_KINDS:
+                state.budget.model_calls += 1
+            
+            # 5. LOG: Append to ledger
+            result_payload: Dict[str, Any] = {
+                "exec_status": exec_result.status,
+                "round": state.budget.round_idx,
+                "round_duration_s": time.time() - round_start,
+            }
+            
+            # Add test results if available
+            if "test_result" in exec_result.metrics:
+                result_payload["test_result"] = exec_result.metrics["test_result"]
             
-            # Log rejection
             ev = LedgerEvent.now(
                 task_id=state.task_id,
                 repo_id=state.repo.repo_id,
                 phase=state.phase,
                 proposal=proposal,
                 gate_decision=decision,
-                exec_result=ExecResult(status="fail", summary="gate_reject"),
-                result={"gate_reject": True, "reason": decision.reason},
+                exec_result=exec_result,
+                result=result_payload,
             )
-            append_event(state, ev)
-            
-            # Store rejection for planner to see
-            state.notes["last_gate_reject"] = decision.reason
-            state.notes["last_rejected_proposal"] = {
-                "kind": proposal.kind,
-                "rationale": proposal.rationale,
-            }
+            queue_event(state, ev)
             
-            # After 2 rejects in PATCH_CANDIDATES, force specific guidance
-            if reject_count >= 2 and state.phase == Phase.PATCH_CANDIDATES:
-                state.notes["force_source_edit"] = True
-                logger.warning("Multiple rejects - forcing source edit guidance")
+            # 6. ADVANCE: Phase transition (planner can override via state.notes)
+            state = _advance_phase(state, proposal, exec_result, profile)
             
-            # Force re-planning
-            state.phase = Phase.PLAN if state.phase != Phase.DIAGNOSE else Phase.DIAGNOSE
-            continue
-        
-        # Reset reject counter on success
-        state.notes["consecutive_rejects"] = 0
-        
-        logger.info("Gate accepted proposal")
-        
-        # 3. EXECUTE: Run the proposal
-        try:
-            exec_result = exec_fn(profile, state, proposal)
-        except Exception as e:
-            logger.error("Execution failed", error=str(e))
-            exec_result = ExecResult(
-                status="fail",
-                summary=f"Execution error: {str(e)}",
+            logger.info(
+                "Round complete",
+                round=state.budget.round_idx,
+                next_phase=state.phase.value,
             )
-        
-        logger.info(
-            "Execution complete",
-            status=exec_result.status,
-            summary=exec_result.summary[:100],
-        )
-        
-        # 4. UPDATE STATE: Track budgets and touched files
-        if proposal.kind == "run_tests":
-            state.budget.test_runs += 1
-        
-        if proposal.kind == "edit":
-            state.budget.patch_attempts += 1
-            files = proposal.inputs.get("files", [])
-            state.touched_files = sorted(set(state.touched_files) | set(files))
-            
-            # Record outcome for learning
-            diff = proposal.inputs.get("diff", "")
-            if diff and profile.enable_outcome_learning:
-                try:
-                    from agent.outcome_learning import record_patch_outcome
-                    record_patch_outcome(
-                        patch_diff=diff,
-                        success=exec_result.status == "ok",
-                        task_id=state.task_id,
-                    )
-                except Exception as e:
-                    logger.debug("Outcome learning disabled", reason=str(e))
-        
-        if proposal.kind in ["inspect", "search", "edit", "run_tests"]:
-            state.budget.model_calls += 1
-        
-        # 5. LOG: Append to ledger
-        result_payload: Dict[str, Any] = {
-            "exec_status": exec_result.status,
-            "round": state.budget.round_idx,
-            "round_duration_s": time.time() - round_start,
-        }
-        
-        # Add test results if available
-        if "test_result" in exec_result.metrics:
-            result_payload["test_result"] = exec_result.metrics["test_result"]
-        
-        ev = LedgerEvent.now(
-            task_id=state.task_id,
-            repo_id=state.repo.repo_id,
-            phase=state.phase,
-            proposal=proposal,
-            gate_decision=decision,
-            exec_result=exec_result,
-            result=result_payload,
-        )
-        append_event(state, ev)
-        
-        # 6. ADVANCE: Phase transition (planner can override via state.notes)
-        state = _advance_phase(state, proposal, exec_result, profile)
-        
-        logger.info(
-            "Round complete",
-            round=state.budget.round_idx,
-            next_phase=state.phase.value,
-        )
+    
+    finally:
+        # Make the ledger complete before callers read it or append to it
+        flush_ledger(state)
     
     episode_duration = time.time() - episode_start
     
@@ -259,7 +363,7 @@ def _advance_phase(
         Updated state
     """
     # Track phase attempts to prevent infinite loops
-    phase_key = f"phase_{state.phase.value}_attempts"
+    phase_key = _PHASE_ATTEMPTS_KEY[state.phase]
     attempts = state.notes.get(phase_key, 0) + 1
     state.notes[phase_key] = attempts
     
@@ -267,7 +371,8 @@ def _advance_phase(
     if "next_phase" in state.notes:
         forced_phase = state.notes.pop("next_phase")
         logger.debug("Planner forced phase", phase=forced_phase)
-        state.phase = Phase(forced_phase)
+        phase = _PHASE_FROM_NAME.get(forced_phase)
+        state.phase = phase if phase is not None else Phase(forced_phase)
         return state
     
     # Default phase progression (more aggressive)
@@ -50,6 +50,9 @@ class Profile:
     enable_bandit: bool
     enable_outcome_learning: bool
 
+    # Prompt budget (characters sent to the model per round)
+    max_prompt_chars: int = 40_000
+
 
 def load_profile(path: str | Path) -> Profile:
     """Load profile from YAML file.
@@ -86,4 +89,5 @@ def load_profile(path: str | Path) -> Profile:
         allow_ci_edits=bool(cfg["safety"]["allow_ci_edits"]),
         enable_bandit=bool(cfg.get("learning", {}).get("enable_bandit", True)),
         enable_outcome_learning=bool(cfg.get("learning", {}).get("enable_outcome_learning", True)),
+        max_prompt_chars=int(cfg.get("prompt", {}).get("max_chars", 40_000)),
     )
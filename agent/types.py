@@ -275,3 +275,15 @@ class AgentState:
     
     # Scratch space for planner state
     notes: Dict[str, Any] = field(default_factory=dict)
+    
+    def __post_init__(self) -> None:
+        # Membership index for touched_files, which stays a sorted list for
+        # consumers; kept in sync by add_touched_files
+        self._touched_set = set(self.touched_files)
+    
+    def add_touched_files(self, files: List[str]) -> None:
+        """Record edited files, re-sorting touched_files only when one is new."""
+        new = set(files).difference(self._touched_set)
+        if new:
+            self._touched_set.update(new)
+            self.touched_files = sorted(self._touched_set)
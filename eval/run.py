@@ -15,26 +15,56 @@ This module implements the outer task loop that SWE-bench scores:
 from __future__ import annotations
 
 import asyncio
+import hashlib
 import json
+import os
+import pickle
 import shutil
 import subprocess
+import sys
 import time
-from dataclasses import dataclass, field
+import uuid
+from collections import defaultdict
+from dataclasses import MISSING, dataclass, field, fields
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
-from agent.loop import run_episode
+from agent.deepseek_agent import execute, gate, propose
+from agent.loop import flush_ledger, queue_event, run_episode
 from agent.profiles import Profile, load_profile
-from agent.types import AgentState, Phase, Proposal
-from memory.log import append_event
+from agent.types import AgentState, BudgetState, Phase, Proposal, RepoFingerprint
 from rfsn_controller.structured_logging import get_logger
 
+# orjson is optional; it encodes straight to bytes and is much faster
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = get_logger(__name__)
 
 
-def setup_repo(task: SWEBenchTask, workdir: Path) -> bool:
+def _json_line(obj: Dict[str, Any]) -> bytes:
+    """Encode obj as one newline-terminated JSONL record."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(obj) + "\n").encode("utf-8")
+
+
+def _json_pretty(obj: Dict[str, Any]) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2).encode("utf-8")
+
+
+async def setup_repo(task: SWEBenchTask, workdir: Path) -> bool:
     """Clone and checkout repository for a SWE-bench task.
     
+    Fetches only the base commit into a fresh repository. If the server
+    won't serve that commit directly, retries with recent history and then
+    falls back to a regular shallow clone.
+    
     Args:
         task: The SWE-bench task containing repo and commit info
         workdir: Directory to clone into
@@ -44,55 +74,18 @@ def setup_repo(task: SWEBenchTask, workdir: Path) -> bool:
     """
     repo_url = f"https://github.com/{task.repo}.git"
     
-    # Clean up existing directory if it exists
-    if workdir.exists():
-        shutil.rmtree(workdir)
+    await _reset_workdir(workdir)
     
-    workdir.mkdir(parents=True, exist_ok=True)
-    
-    logger.info(f"Cloning {task.repo} to {workdir}")
+    logger.info(f"Fetching {task.repo}@{task.base_commit[:8]} into {workdir}")
     
     try:
-        # Clone with minimal history for speed
-        result = subprocess.run(
-            ["git", "clone", "--depth", "100", repo_url, str(workdir)],
-            capture_output=True,
-            text=True,
-            timeout=300,
-            check=False,
-        )
-        
-        if result.returncode != 0:
-            logger.error(f"Clone failed: {result.stderr}")
-            return False
-        
-        # Fetch the specific commit if not in shallow clone
-        subprocess.run(
-            ["git", "fetch", "--depth", "100", "origin", task.base_commit],
-            cwd=workdir,
-            capture_output=True,
-            timeout=120,
-            check=False,
-        )
-        
-        # Checkout the base commit
-        result = subprocess.run(
-            ["git", "checkout", task.base_commit],
-            cwd=workdir,
-            capture_output=True,
-            text=True,
-            timeout=60,
-            check=False,
-        )
-        
-        if result.returncode != 0:
-            logger.warning(f"Checkout specific commit failed: {result.stderr}")
-            # Try without specific commit - use HEAD
-            logger.info("Using HEAD instead of specific commit")
-        else:
+        if await _fetch_base_commit(repo_url, task.base_commit, workdir):
             logger.info(f"Checked out commit {task.base_commit[:8]}")
+            return True
         
-        return True
+        logger.warning("Shallow fetch of base commit failed, falling back to clone")
+        await _reset_workdir(workdir)
+        return await _clone_repo(repo_url, task.base_commit, workdir)
         
     except subprocess.TimeoutExpired:
         logger.error("Repository setup timed out")
@@ -102,7 +95,188 @@ def setup_repo(task: SWEBenchTask, workdir: Path) -> bool:
         return False
 
 
-@dataclass
+async def _reset_workdir(workdir: Path) -> None:
+    # Clean up existing directory if it exists
+    await _cleanup(workdir)
+    workdir.mkdir(parents=True, exist_ok=True)
+
+
+# Background deletions still running; held so they aren't garbage collected
+_PENDING_CLEANUPS: set[asyncio.Task] = set()
+
+
+async def _cleanup(path: Path) -> None:
+    """Remove path without making the caller wait for the delete.
+    
+    The directory is renamed to a sibling trash name, which is O(1), and
+    deleted on a worker thread while setup carries on.
+    """
+    if not path.exists():
+        return
+    trash = path.with_name(f"{path.name}.trash.{uuid.uuid4().hex}")
+    try:
+        await asyncio.to_thread(path.rename, trash)
+    except OSError:
+        await asyncio.to_thread(shutil.rmtree, path, ignore_errors=True)
+        return
+    task = asyncio.create_task(asyncio.to_thread(shutil.rmtree, trash, ignore_errors=True))
+    _PENDING_CLEANUPS.add(task)
+    task.add_done_callback(_PENDING_CLEANUPS.discard)
+
+
+# Checkouts leave Git LFS pointers in place of binaries the agent never reads
+_GIT_ENV = {"GIT_LFS_SKIP_SMUDGE": "1"}
+
+# Protocol v2 lets fetches ask for just the refs they need instead of
+# receiving every branch and tag the remote has. Newer gits default to it.
+_GIT_CONFIG = ["-c", "protocol.version=2"]
+
+
+async def _git(
+    args: List[str],
+    cwd: Optional[Path],
+    timeout: int = 60,
+) -> subprocess.CompletedProcess:
+    """Run git without blocking the event loop, so parallel tasks overlap.
+    
+    Stdout is discarded; nothing here reads it. Stderr is only decoded
+    when git fails, and is empty otherwise.
+    Raises subprocess.TimeoutExpired after killing git if it overruns.
+    """
+    cmd = ["git", *_GIT_CONFIG, *args]
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        cwd=cwd,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE,
+        env=os.environ | _GIT_ENV,
+    )
+    try:
+        _, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        raise subprocess.TimeoutExpired(cmd, timeout)
+    if proc.returncode != 0:
+        return subprocess.CompletedProcess(
+            cmd, proc.returncode, None, stderr.decode("utf-8", "replace")
+        )
+    return subprocess.CompletedProcess(cmd, 0, None, "")
+
+
+async def _fetch_base_commit(repo_url: str, base_commit: str, workdir: Path) -> bool:
+    """Check out base_commit by fetching as little history as possible.
+    
+    Tries the commit alone first. Servers that refuse to serve an arbitrary
+    SHA get a second attempt with the last 50 commits of the default branch,
+    fetched blobless so only the checked-out tree's file contents download.
+    """
+    if (await _git(["init", "-q"], workdir)).returncode != 0:
+        return False
+    if (await _git(["remote", "add", "origin", repo_url], workdir)).returncode != 0:
+        return False
+    
+    # (fetch args, what to check out afterwards)
+    attempts = (
+        (["fetch", "-q", "--depth", "1", "origin", base_commit], "FETCH_HEAD"),
+        (["fetch", "-q", "--depth", "50", "--filter=blob:none", "origin"], base_commit),
+    )
+    for fetch_args, target in attempts:
+        result = await _git(fetch_args, workdir, timeout=300)
+        if result.returncode != 0:
+            logger.debug(f"Fetch failed: {result.stderr}")
+            continue
+        
+        result = await _git(["checkout", "-q", target], workdir)
+        if result.returncode == 0:
+            return True
+        logger.debug(f"Checkout failed: {result.stderr}")
+    
+    return False
+
+
+async def _clone_repo(repo_url: str, base_commit: str, workdir: Path) -> bool:
+    """Shallow-clone repo_url and check out base_commit, keeping HEAD if it can't.
+    
+    The clone is blobless and skips the initial checkout, so file contents
+    are downloaded once, for whichever commit ends up checked out.
+    """
+    # Clone with minimal history for speed
+    result = await _git(
+        ["clone", "-q", "--depth", "100", "--filter=blob:none", "--no-checkout",
+         repo_url, str(workdir)],
+        None,
+        timeout=300,
+    )
+    
+    if result.returncode != 0:
+        logger.error(f"Clone failed: {result.stderr}")
+        return False
+    
+    # Fetch the specific commit if not in shallow clone
+    await _git(["fetch", "--depth", "100", "origin", base_commit], workdir, timeout=120)
+    
+    # Checkout the base commit
+    result = await _git(["checkout", base_commit], workdir, timeout=60)
+    
+    if result.returncode != 0:
+        logger.warning(f"Checkout specific commit failed: {result.stderr}")
+        # Try without specific commit - use HEAD
+        logger.info("Using HEAD instead of specific commit")
+        result = await _git(["reset", "-q", "--hard", "HEAD"], workdir, timeout=300)
+        if result.returncode != 0:
+            logger.error(f"Checkout of HEAD failed: {result.stderr}")
+            return False
+    else:
+        logger.info(f"Checked out commit {base_commit[:8]}")
+    
+    return True
+
+
+def _compact_dict(cls):
+    """Class decorator adding to_compact_dict(), a to_dict() without defaults.
+    
+    The method is generated from the dataclass fields with each field's
+    check inlined: required fields are always present, fields still at
+    their default (or empty, for None/factory defaults) are left out. Used
+    for result files, where most tasks populate only a few fields.
+    """
+    lines = ["def to_compact_dict(self):"]
+    namespace: Dict[str, Any] = {}
+    required = []
+    optional = []
+    for f in fields(cls):
+        if not f.init:
+            # Derived fields are rebuilt on load
+            continue
+        if f.default is MISSING and f.default_factory is MISSING:
+            required.append(f.name)
+        else:
+            optional.append(f)
+    lines.append(
+        "    out = {" + ", ".join(f"{name!r}: self.{name}" for name in required) + "}"
+    )
+    for f in optional:
+        lines.append(f"    v = self.{f.name}")
+        if f.default is None or f.default is MISSING:
+            # None or a default_factory container: skip when unset or empty
+            lines.append("    if v:")
+        else:
+            namespace[f"_default_{f.name}"] = f.default
+            lines.append(f"    if v != _default_{f.name}:")
+        lines.append(f"        out[{f.name!r}] = v")
+    lines.append("    return out")
+    
+    exec("\n".join(lines), namespace)
+    fn = namespace["to_compact_dict"]
+    fn.__qualname__ = f"{cls.__qualname__}.to_compact_dict"
+    fn.__doc__ = "Like to_dict(), but leaving out fields that are at their default."
+    cls.to_compact_dict = fn
+    return cls
+
+
+@_compact_dict
+@dataclass(slots=True, frozen=True)
 class SWEBenchTask:
     """A single SWE-bench task instance."""
     
@@ -118,6 +292,18 @@ class SWEBenchTask:
     created_at: str = ""
     version: str = "1.0"
     
+    # "<repo>@<base_commit>", derived in __post_init__
+    repo_id: str = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        # Many tasks share a repo and commit; interning lets every task,
+        # event and cache key point at one copy of each string
+        repo = sys.intern(self.repo)
+        base_commit = sys.intern(self.base_commit)
+        object.__setattr__(self, "repo", repo)
+        object.__setattr__(self, "base_commit", base_commit)
+        object.__setattr__(self, "repo_id", sys.intern(f"{repo}@{base_commit}"))
+    
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for serialization."""
         return {
@@ -133,7 +319,8 @@ class SWEBenchTask:
         }
 
 
-@dataclass
+@_compact_dict
+@dataclass(slots=True)
 class EvalResult:
     """Result of evaluating a single task."""
     
@@ -176,7 +363,76 @@ class EvalResult:
         }
 
 
-@dataclass
+@dataclass(slots=True)
+class RunSummary:
+    """Running totals for a batch, updated as each result arrives.
+    
+    Only sums are kept, so results are folded in a single pass and never
+    need to be held in a list; averages are taken when the summary is
+    written.
+    """
+    
+    total_tasks: int = 0
+    successful_tasks: int = 0
+    total_time: float = 0.0
+    total_steps: int = 0
+    total_patches: int = 0
+    total_llm_calls: int = 0
+    total_llm_tokens: int = 0
+    
+    def add(self, result: EvalResult) -> None:
+        """Fold one result into the totals."""
+        self.total_tasks += 1
+        self.successful_tasks += result.success
+        self.total_time += result.resolution_time
+        self.total_steps += result.steps_taken
+        self.total_patches += result.patches_tried
+        self.total_llm_calls += result.llm_calls
+        self.total_llm_tokens += result.llm_tokens
+    
+    def to_dict(self, run_id: str) -> Dict[str, Any]:
+        """Convert to the summary file layout."""
+        n = self.total_tasks
+        return {
+            "run_id": run_id,
+            "total_tasks": n,
+            "successful_tasks": self.successful_tasks,
+            "failed_tasks": n - self.successful_tasks,
+            "total_time": self.total_time,
+            "avg_steps": self.total_steps / n if n else 0.0,
+            "avg_patches": self.total_patches / n if n else 0.0,
+            "total_llm_calls": self.total_llm_calls,
+            "total_llm_tokens": self.total_llm_tokens,
+        }
+
+
+_DEFAULT_WORK_DIR = Path("./eval_runs")
+
+# Checkouts are placed on /dev/shm when it has this much free space, which
+# turns clone and checkout disk I/O into memory operations. Results and the
+# repo cache stay on persistent disk. Set RFSN_USE_TMPFS=0 to opt out.
+_TMPFS_ROOT = Path("/dev/shm")
+_TMPFS_MIN_FREE = 4 * 1024 ** 3
+
+
+def _tmpfs_work_dir() -> Optional[Path]:
+    """Return a per-user work dir on tmpfs, or None if unavailable."""
+    if os.environ.get("RFSN_USE_TMPFS", "1") == "0" or os.name != "posix":
+        return None
+    try:
+        st = os.statvfs(_TMPFS_ROOT)
+    except OSError:
+        return None
+    if st.f_bavail * st.f_frsize < _TMPFS_MIN_FREE:
+        return None
+    return _TMPFS_ROOT / f"rfsn_eval_{os.getuid()}"
+
+
+def _is_on_tmpfs(path: Path) -> bool:
+    return path.resolve().is_relative_to(_TMPFS_ROOT)
+
+
+@dataclass(slots=True)
 class EvalConfig:
     """Configuration for evaluation run."""
     
@@ -193,17 +449,30 @@ class EvalConfig:
     max_steps_per_task: int = 50
     max_patches_per_task: int = 20
     
-    # Directories
-    work_dir: Path = Path("./eval_runs")
-    results_dir: Path = Path("./eval_results")
-    cache_dir: Path = Path("./eval_cache")
+    # Directories (without an explicit work_dir, checkouts go to tmpfs when
+    # there is room and to _DEFAULT_WORK_DIR otherwise)
+    work_dir: Optional[Path] = None
+    results_dir: Path = field(default_factory=lambda: Path("./eval_results"))
+    cache_dir: Path = field(default_factory=lambda: Path("./eval_cache"))
     
     # Parallelism
     parallel_tasks: int = 1
     
+    # Ignore cached results of earlier runs with identical inputs
+    force_rerun: bool = False
+    
     # Logging
     verbose: bool = True
     save_artifacts: bool = True
+    
+    def __post_init__(self):
+        if self.work_dir is None:
+            tmpfs_dir = _tmpfs_work_dir()
+            if tmpfs_dir is not None:
+                logger.info(f"Using tmpfs work_dir {tmpfs_dir}")
+                self.work_dir = tmpfs_dir
+            else:
+                self.work_dir = _DEFAULT_WORK_DIR
 
 
 class EvalRunner:
@@ -216,15 +485,119 @@ class EvalRunner:
             config: Evaluation configuration
         """
         self.config = config
-        self.profile = load_profile(config.profile_name)
+        self.profile = _load_profile_cached(config.profile_name)
         
-        # Create directories
-        self.config.work_dir.mkdir(parents=True, exist_ok=True)
-        self.config.results_dir.mkdir(parents=True, exist_ok=True)
-        self.config.cache_dir.mkdir(parents=True, exist_ok=True)
+        # Directories are created on first use, see _ensure_dirs()
+        self._dirs_ready = False
+        
+        # One bare mirror per repo under cache_dir; git can't safely run two
+        # fetches or worktree changes against the same mirror at once
+        self._mirror_locks: Dict[str, asyncio.Lock] = {}
+        # (repo, base_commit) pairs already present in their mirror, so
+        # tasks sharing a base commit only check for it once
+        self._mirror_commits: set[tuple[str, str]] = set()
+        
+        # Summaries of batches whose results were streamed to disk, by run_id
+        self._summaries: Dict[str, RunSummary] = {}
+        
+        # Checkouts on tmpfs are deleted as soon as their task finishes
+        self._workdir_on_tmpfs = _is_on_tmpfs(config.work_dir)
         
         logger.info(f"Initialized EvalRunner with profile {config.profile_name}")
     
+    async def setup_repo(self, task: SWEBenchTask, workdir: Path) -> bool:
+        """Check out a task's base commit as a worktree of a cached mirror.
+        
+        After the first task for a repo, setup is a local checkout with no
+        network traffic unless the base commit has to be fetched. Falls back
+        to a standalone clone via setup_repo() if the mirror can't be used.
+        
+        Args:
+            task: The SWE-bench task containing repo and commit info
+            workdir: Directory to check out into
+            
+        Returns:
+            True if setup succeeded, False otherwise
+        """
+        try:
+            async with self._mirror_lock(task.repo):
+                mirror = await self._get_or_init_mirror(task.repo)
+                if mirror is not None and await self._add_worktree(mirror, task, workdir):
+                    logger.info(f"Checked out {task.repo}@{task.base_commit[:8]} from mirror")
+                    return True
+        except subprocess.TimeoutExpired:
+            logger.warning(f"Mirror setup for {task.repo} timed out")
+        except Exception as e:
+            logger.warning(f"Mirror setup for {task.repo} failed: {e}")
+        
+        return await setup_repo(task, workdir)
+    
+    def _mirror_lock(self, repo: str) -> asyncio.Lock:
+        return self._mirror_locks.setdefault(repo, asyncio.Lock())
+    
+    async def _get_or_init_mirror(self, repo: str) -> Optional[Path]:
+        """Return the bare mirror for repo, cloning it on first use.
+        
+        The mirror is a blobless partial clone; file contents are fetched
+        lazily by the first checkout that needs them and kept afterwards.
+        """
+        mirror = (self.config.cache_dir / f"{repo}.git").resolve()
+        if (mirror / "HEAD").exists():
+            return mirror
+        
+        await _cleanup(mirror)
+        mirror.parent.mkdir(parents=True, exist_ok=True)
+        
+        logger.info(f"Creating mirror of {repo} in {mirror}")
+        self._mirror_commits = {key for key in self._mirror_commits if key[0] != repo}
+        result = await _git(
+            ["clone", "--bare", "-q", "--filter=blob:none",
+             f"https://github.com/{repo}.git", str(mirror)],
+            self.config.cache_dir,
+            timeout=1800,
+        )
+        if result.returncode != 0:
+            logger.warning(f"Mirror clone failed: {result.stderr}")
+            await _cleanup(mirror)
+            return None
+        
+        return mirror
+    
+    async def _add_worktree(self, mirror: Path, task: SWEBenchTask, workdir: Path) -> bool:
+        """Fetch the base commit into mirror if needed and check it out at workdir."""
+        base_commit = task.base_commit
+        key = (task.repo, base_commit)
+        if key not in self._mirror_commits:
+            if (await _git(["cat-file", "-e", f"{base_commit}^{{commit}}"], mirror)).returncode != 0:
+                result = await _git(
+                    ["fetch", "-q", "--filter=blob:none", "origin", base_commit],
+                    mirror,
+                    timeout=300,
+                )
+                if result.returncode != 0:
+                    logger.warning(f"Fetching {base_commit[:8]} into mirror failed: {result.stderr}")
+                    return False
+            self._mirror_commits.add(key)
+        
+        # Unregister any previous worktree here so the mirror's admin
+        # entries stay consistent, then clear whatever is left
+        if workdir.exists():
+            await _git(["worktree", "remove", "--force", str(workdir.resolve())], mirror)
+            await _cleanup(workdir)
+        await _git(["worktree", "prune"], mirror)
+        workdir.parent.mkdir(parents=True, exist_ok=True)
+        
+        result = await _git(
+            ["worktree", "add", "-q", "--detach", str(workdir.resolve()), base_commit],
+            mirror,
+            timeout=600,
+        )
+        if result.returncode != 0:
+            logger.warning(f"Worktree checkout failed: {result.stderr}")
+            return False
+        
+        return True
+    
     async def run_task(self, task: SWEBenchTask) -> EvalResult:
         """Run a single SWE-bench task.
         
@@ -250,9 +623,32 @@ class EvalRunner:
         logger.info(f"Starting task {task.task_id}")
         logger.info(f"Repo: {task.repo}, commit: {task.base_commit}")
         
-        # Setup repository - clone and checkout
+        # Identical task and profile: reuse the earlier result
+        cache_file = self._result_cache_file(task)
+        if not self.config.force_rerun:
+            cached = _read_cached_result(cache_file)
+            if cached is not None:
+                logger.info(f"Task {task.task_id} served from result cache")
+                return cached
+        
         workdir = self.config.work_dir / task.task_id
-        if not setup_repo(task, workdir):
+        try:
+            return await self._run_in_workdir(task, workdir, start_time, cache_file)
+        finally:
+            # Checkouts in RAM would otherwise pile up for the whole run
+            if self._workdir_on_tmpfs:
+                await self._release_workdir(task, workdir)
+    
+    async def _run_in_workdir(
+        self,
+        task: SWEBenchTask,
+        workdir: Path,
+        start_time: float,
+        cache_file: Path,
+    ) -> EvalResult:
+        """Set up task's checkout at workdir and run the agent episode on it."""
+        # Setup repository - clone and checkout
+        if not await self.setup_repo(task, workdir):
             return EvalResult(
                 task_id=task.task_id,
                 success=False,
@@ -264,11 +660,14 @@ class EvalRunner:
                 error_message="Failed to setup repository",
             )
         
-        # Initialize agent state
-        from agent.types import RepoFingerprint, BudgetState
+        # The ledger lives under results_dir, not in the checkout, so it
+        # survives _release_workdir
+        run_dir = self.config.results_dir / "runs" / task.task_id
+        run_dir.mkdir(parents=True, exist_ok=True)
         
+        # Initialize agent state
         repo = RepoFingerprint(
-            repo_id=f"{task.repo}@{task.base_commit}",
+            repo_id=task.repo_id,
             commit_sha=task.base_commit,
             workdir=str(workdir),
             language="python",
@@ -289,11 +688,13 @@ class EvalRunner:
             notes={
                 "problem_statement": task.problem_statement,
                 "test_patch": task.test_patch,
+                "run_dir": str(run_dir),
             },
         )
         
-        # Log task start
-        append_event(state, {
+        # Log task start (written by the background ledger flusher and
+        # flushed before returning)
+        queue_event(state, {
             "event": "task_start",
             "task_id": task.task_id,
             "repo": task.repo,
@@ -301,11 +702,10 @@ class EvalRunner:
         })
         
         try:
-            # Import DeepSeek agent functions
-            from agent.deepseek_agent import propose, gate, execute
-            
-            # Run agent episode (the inner loop)
-            final_state = run_episode(
+            # Run agent episode (the inner loop) off the event loop so
+            # other tasks' setup keeps running
+            final_state = await asyncio.to_thread(
+                run_episode,
                 profile=self.profile,
                 state=state,
                 propose_fn=propose,
@@ -340,20 +740,24 @@ class EvalRunner:
                        f"time={resolution_time:.1f}s")
             
             # Log task end
-            append_event(state, {
+            queue_event(state, {
                 "event": "task_complete",
                 "task_id": task.task_id,
                 "success": result.success,
                 "resolution_time": resolution_time,
             })
             
+            # Failures may come from sampling or a transient LLM/network
+            # error, so only solved tasks are worth replaying
+            if result.success:
+                _write_cached_result(cache_file, result)
             return result
             
         except Exception as e:
             logger.error(f"Task {task.task_id} failed with error: {e}")
             
             # Log failure
-            append_event(state, {
+            queue_event(state, {
                 "event": "task_error",
                 "task_id": task.task_id,
                 "error": str(e),
@@ -371,84 +775,271 @@ class EvalRunner:
                 tests_failed=0,
                 error_message=str(e),
             )
+        finally:
+            # Get this task's events on disk before run_task returns, rather
+            # than at the end of the batch
+            await asyncio.to_thread(flush_ledger, state)
+    
+    async def _release_workdir(self, task: SWEBenchTask, workdir: Path) -> None:
+        """Delete a task's checkout, unregistering it from the mirror first."""
+        mirror = (self.config.cache_dir / f"{task.repo}.git").resolve()
+        # A worktree's .git is a file pointing back at the mirror
+        if (workdir / ".git").is_file() and (mirror / "HEAD").exists():
+            async with self._mirror_lock(task.repo):
+                await _git(["worktree", "remove", "--force", str(workdir.resolve())], mirror)
+        await _cleanup(workdir)
     
-    async def run_batch(self, tasks: List[SWEBenchTask]) -> List[EvalResult]:
+    def _result_cache_file(self, task: SWEBenchTask) -> Path:
+        """Where the result of running task under this profile is cached.
+        
+        The key covers the task inputs, every profile setting and the agent
+        version (see _agent_version), so changing any knob, any agent code
+        or the model misses the cache.
+        """
+        key = hashlib.sha256(
+            f"{task.repo}|{task.base_commit}|{task.problem_statement}|"
+            f"{task.test_patch}|{self.profile!r}|{_agent_version()}".encode()
+        ).hexdigest()
+        return self.config.cache_dir / "results" / f"{key}.json"
+    
+    def _ensure_dirs(self) -> None:
+        """Create the work, results and cache directories (once per runner)."""
+        if self._dirs_ready:
+            return
+        self.config.work_dir.mkdir(parents=True, exist_ok=True)
+        self.config.results_dir.mkdir(parents=True, exist_ok=True)
+        self.config.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._dirs_ready = True
+    
+    async def run_batch(
+        self,
+        tasks: List[SWEBenchTask],
+        run_id: Optional[str] = None,
+    ) -> List[EvalResult]:
         """Run a batch of tasks.
         
+        With a run_id, each result is appended to that run's results file as
+        soon as its task finishes, so a crash keeps everything completed so
+        far, and the summary is accumulated for save_results().
+        
         Args:
             tasks: List of tasks to run
+            run_id: Optional run identifier to stream results under
             
         Returns:
-            List of evaluation results
+            List of evaluation results, in task order
         """
-        results = []
+        self._ensure_dirs()
+        results: List[Optional[EvalResult]] = [None] * len(tasks)
+        summary = RunSummary()
+        results_fh = None
+        if run_id is not None:
+            results_fh = open(self._results_file(run_id), "ab")
+            self._summaries[run_id] = summary
         
-        if self.config.parallel_tasks > 1:
-            # Parallel execution
-            semaphore = asyncio.Semaphore(self.config.parallel_tasks)
-            
-            async def run_with_semaphore(task: SWEBenchTask) -> EvalResult:
-                async with semaphore:
-                    return await self.run_task(task)
-            
-            tasks_coros = [run_with_semaphore(task) for task in tasks]
-            raw_results = await asyncio.gather(*tasks_coros, return_exceptions=True)
-            
-            # Convert exceptions to failed results
-            for i, result in enumerate(raw_results):
-                if isinstance(result, BaseException):
-                    results.append(EvalResult(
-                        task_id=tasks[i].task_id,
-                        success=False,
-                        resolution_time=0.0,
-                        steps_taken=0,
-                        patches_tried=0,
-                        tests_passed=0,
-                        tests_failed=0,
-                        error_message=str(result),
-                    ))
-                else:
-                    results.append(result)
-        else:
-            # Serial execution
-            for task in tasks:
-                result = await self.run_task(task)
-                results.append(result)
+        def on_result(index: int, result: EvalResult) -> None:
+            # Runs on the event loop thread, so writes never interleave
+            results[index] = result
+            summary.add(result)
+            if results_fh is not None:
+                results_fh.write(_json_line(result.to_compact_dict()))
+                results_fh.flush()
+        
+        try:
+            if self.config.parallel_tasks > 1:
+                # Parallel execution: a fixed pool of workers pulls from a
+                # queue, so only parallel_tasks tasks are ever in flight
+                queue: asyncio.Queue[int] = asyncio.Queue()
+                for i in _group_by_base_commit(tasks):
+                    queue.put_nowait(i)
+                
+                async def worker() -> None:
+                    while True:
+                        try:
+                            index = queue.get_nowait()
+                        except asyncio.QueueEmpty:
+                            return
+                        task = tasks[index]
+                        try:
+                            result = await self.run_task(task)
+                        except Exception as e:
+                            # Convert exceptions to failed results
+                            result = EvalResult(
+                                task_id=task.task_id,
+                                success=False,
+                                resolution_time=0.0,
+                                steps_taken=0,
+                                patches_tried=0,
+                                tests_passed=0,
+                                tests_failed=0,
+                                error_message=str(e),
+                            )
+                        on_result(index, result)
+                
+                n_workers = min(self.config.parallel_tasks, len(tasks))
+                await asyncio.gather(*(worker() for _ in range(n_workers)))
+            else:
+                # Serial execution
+                for i, task in enumerate(tasks):
+                    on_result(i, await self.run_task(task))
+        finally:
+            if results_fh is not None:
+                results_fh.close()
+            # Task events go through the batching ledger flusher; make sure
+            # they are on disk before the batch is reported done
+            await asyncio.to_thread(flush_ledger)
         
         return results
     
+    def _results_file(self, run_id: str) -> Path:
+        return self.config.results_dir / f"{run_id}_results.jsonl"
+    
     def save_results(self, results: List[EvalResult], run_id: str):
         """Save evaluation results to disk.
         
+        If the batch was run with this run_id its results are already on
+        disk, and only the summary is written.
+        
         Args:
             results: List of evaluation results
             run_id: Unique identifier for this run
         """
-        # Save individual results
-        results_file = self.config.results_dir / f"{run_id}_results.jsonl"
-        with open(results_file, "w") as f:
-            for result in results:
-                f.write(json.dumps(result.to_dict()) + "\n")
+        self._ensure_dirs()
+        results_file = self._results_file(run_id)
+        summary = self._summaries.pop(run_id, None)
         
-        # Save summary
-        summary = {
-            "run_id": run_id,
-            "total_tasks": len(results),
-            "successful_tasks": sum(1 for r in results if r.success),
-            "failed_tasks": sum(1 for r in results if not r.success),
-            "total_time": sum(r.resolution_time for r in results),
-            "avg_steps": sum(r.steps_taken for r in results) / len(results),
-            "avg_patches": sum(r.patches_tried for r in results) / len(results),
-            "total_llm_calls": sum(r.llm_calls for r in results),
-            "total_llm_tokens": sum(r.llm_tokens for r in results),
-        }
+        if summary is None:
+            # Save individual results
+            summary = RunSummary()
+            with open(results_file, "wb") as f:
+                for result in results:
+                    f.write(_json_line(result.to_compact_dict()))
+                    summary.add(result)
         
+        # Save summary
+        summary_dict = summary.to_dict(run_id)
         summary_file = self.config.results_dir / f"{run_id}_summary.json"
-        with open(summary_file, "w") as f:
-            json.dump(summary, f, indent=2)
+        summary_file.write_bytes(_json_pretty(summary_dict))
         
         logger.info(f"Saved results to {results_file}")
-        logger.info(f"Success rate: {summary['successful_tasks']}/{summary['total_tasks']}")
+        logger.info(f"Success rate: {summary.successful_tasks}/{summary.total_tasks}")
+
+
+@lru_cache(maxsize=1)
+def _agent_version() -> str:
+    """Fingerprint of the agent, for result cache keys.
+    
+    Covers every source file of the agent package (loop, gate, prompts,
+    profiles, LLM cache), the model client and the model name.
+    """
+    import agent
+    
+    sources = sorted(Path(agent.__file__).parent.glob("*.py"))
+    try:
+        import rfsn_controller.llm.deepseek as client_module
+    except ImportError:
+        model = ""
+    else:
+        sources.append(Path(client_module.__file__))
+        model = client_module.MODEL
+    digest = hashlib.sha256()
+    for path in sources:
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    digest.update(model.encode())
+    return digest.hexdigest()
+
+
+def _read_cached_result(path: Path) -> Optional[EvalResult]:
+    try:
+        data = json.loads(path.read_bytes())
+        return EvalResult(**data)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable cached result {path}: {e}")
+        return None
+
+
+def _write_cached_result(path: Path, result: EvalResult) -> None:
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_bytes(_json_line(result.to_dict()))
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"Failed to cache result at {path}: {e}")
+
+
+def _group_by_base_commit(tasks: List[SWEBenchTask]) -> List[int]:
+    """Task indices reordered so tasks sharing (repo, base_commit) are adjacent.
+    
+    Groups keep first-seen order, as do tasks within a group. Dispatching in
+    this order means a base commit is fetched by the first task of its group
+    while the rest of the group follows straight after, instead of being
+    spread across the whole run.
+    """
+    groups: Dict[tuple[str, str], List[int]] = defaultdict(list)
+    for i, task in enumerate(tasks):
+        groups[(task.repo, task.base_commit)].append(i)
+    return [i for group in groups.values() for i in group]
+
+
+def _load_profile_cached(path: str | Path) -> Profile:
+    """load_profile, reusing the parsed Profile while the file is unchanged."""
+    try:
+        st = Path(path).stat()
+    except OSError:
+        # Let load_profile raise its usual error
+        return load_profile(path)
+    return _load_profile_at(str(path), st.st_mtime_ns, st.st_size)
+
+
+@lru_cache(maxsize=8)
+def _load_profile_at(path: str, mtime_ns: int, size: int) -> Profile:
+    # Profile is frozen, so one instance can be shared by every runner
+    return load_profile(path)
+
+
+def _load_tasks_cached(config: EvalConfig) -> List[SWEBenchTask]:
+    """Load tasks for config, via a pickle under cache_dir when possible.
+    
+    The cache key covers the dataset file's size and mtime as well as the
+    selection arguments, so editing the dataset invalidates it. Sample
+    tasks (no dataset file) are cheap and never cached.
+    """
+    from .swebench import DATASET_PATHS, load_tasks
+    
+    dataset_path = Path(DATASET_PATHS.get(config.dataset, config.dataset))
+    try:
+        st = dataset_path.stat()
+    except OSError:
+        return load_tasks(config.dataset, config.task_ids, config.max_tasks)
+    
+    key = hashlib.sha256(
+        f"{dataset_path.resolve()}|{st.st_mtime_ns}|{st.st_size}|"
+        f"{config.task_ids}|{config.max_tasks}|{SWEBenchTask.__slots__}".encode()
+    ).hexdigest()[:16]
+    cache_path = config.cache_dir / f"tasks_{key}.pkl"
+    
+    try:
+        return pickle.loads(cache_path.read_bytes())
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable task cache {cache_path}: {e}")
+    
+    tasks = load_tasks(config.dataset, config.task_ids, config.max_tasks)
+    
+    try:
+        config.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_bytes(pickle.dumps(tasks, protocol=pickle.HIGHEST_PROTOCOL))
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        logger.warning(f"Failed to write task cache {cache_path}: {e}")
+    
+    return tasks
 
 
 async def run_eval(config: EvalConfig) -> List[EvalResult]:
@@ -461,18 +1052,18 @@ async def run_eval(config: EvalConfig) -> List[EvalResult]:
         List of evaluation results
     """
     runner = EvalRunner(config)
+    runner._ensure_dirs()
     
-    # Load tasks (placeholder - will be implemented in eval/swebench.py)
-    from .swebench import load_tasks
-    tasks = load_tasks(config.dataset, config.task_ids, config.max_tasks)
+    # Load tasks (parsed once per dataset version, see _load_tasks_cached)
+    tasks = _load_tasks_cached(config)
     
     logger.info(f"Loaded {len(tasks)} tasks from {config.dataset}")
     
-    # Run tasks
-    results = await runner.run_batch(tasks)
-    
-    # Save results
+    # Run tasks, streaming each result to disk as it completes
     run_id = f"{config.dataset}_{int(time.time())}"
+    results = await runner.run_batch(tasks, run_id)
+    
+    # Save summary
     runner.save_results(results, run_id)
     
     return results
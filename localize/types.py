@@ -6,7 +6,7 @@ from dataclasses import dataclass, field
 from typing import Dict, Any, Tuple
 
 
-@dataclass
+@dataclass(slots=True)
 class LocalizationHit:
     """A localized file/span with evidence."""
     
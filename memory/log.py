@@ -8,6 +8,7 @@ from __future__ import annotations
 
 import json
 import os
+import time
 from pathlib import Path
 
 from agent.types import AgentState, LedgerEvent
@@ -37,43 +38,72 @@ def append_event(state: AgentState, event: LedgerEvent | dict) -> None:
         >>> # Or with dict:
         >>> append_event(state, {"event": "task_start", "task_id": "..."})
     """
-    run_dir = state.notes.get("run_dir")
-    if not run_dir:
-        # Default: workdir/runs/<task_id>
-        run_dir = os.path.join(state.repo.workdir, "runs", state.task_id)
-        os.makedirs(run_dir, exist_ok=True)
-        state.notes["run_dir"] = run_dir
+    append_events(state, [event])
+
+
+def append_events(state: AgentState, events: list[LedgerEvent | dict]) -> None:
+    """Append several ledger events with a single open and write.
     
-    log_path = Path(run_dir) / "events.jsonl"
+    Args:
+        state: Current agent state
+        events: Events to log, in order (LedgerEvent or dict)
+    """
+    if not events:
+        return
+    log_path = ledger_path(state)
     
     try:
+        payload = "".join(
+            json.dumps(_event_to_dict(event), ensure_ascii=False) + "\n"
+            for event in events
+        )
         with open(log_path, "a", encoding="utf-8") as f:
-            # Handle both LedgerEvent and plain dict
-            if isinstance(event, dict):
-                # Simple dict event - just add timestamp
-                import time
-                event_dict = {"ts_unix": time.time(), **event}
-            else:
-                # Convert LedgerEvent dataclass to dict
-                event_dict = {
-                    "ts_unix": event.ts_unix,
-                    "task_id": event.task_id,
-                    "repo_id": event.repo_id,
-                    "phase": event.phase.value if hasattr(event.phase, 'value') else str(event.phase),
-                    "proposal_hash": event.proposal_hash,
-                    "proposal": event.proposal,
-                    "gate": event.gate,
-                    "exec": event.exec,
-                    "result": event.result,
-                }
-            f.write(json.dumps(event_dict, ensure_ascii=False) + "\n")
+            f.write(payload)
         
-        task_id = event.get("task_id") if isinstance(event, dict) else event.task_id
-        logger.debug("Logged event", task_id=task_id)
+        logger.debug("Logged events", task_id=_event_task_id(events[0]), count=len(events))
         
     except Exception as e:
-        task_id = event.get("task_id", "unknown") if isinstance(event, dict) else getattr(event, "task_id", "unknown")
-        logger.error("Failed to log event", error=str(e), task_id=task_id)
+        logger.error("Failed to log event", error=str(e), task_id=_event_task_id(events[0]))
+
+
+def ledger_path(state: AgentState) -> Path:
+    """Return the events.jsonl path for a task, creating its run dir on first use.
+    
+    The run dir is recorded in state.notes["run_dir"].
+    """
+    run_dir = state.notes.get("run_dir")
+    if not run_dir:
+        # Default: workdir/runs/<task_id>
+        run_dir = os.path.join(state.repo.workdir, "runs", state.task_id)
+        os.makedirs(run_dir, exist_ok=True)
+        state.notes["run_dir"] = run_dir
+    
+    return Path(run_dir) / "events.jsonl"
+
+
+def _event_to_dict(event: LedgerEvent | dict) -> dict:
+    # Handle both LedgerEvent and plain dict
+    if isinstance(event, dict):
+        # Simple dict event - just add timestamp
+        return {"ts_unix": time.time(), **event}
+    # Convert LedgerEvent dataclass to dict
+    return {
+        "ts_unix": event.ts_unix,
+        "task_id": event.task_id,
+        "repo_id": event.repo_id,
+        "phase": event.phase.value if hasattr(event.phase, 'value') else str(event.phase),
+        "proposal_hash": event.proposal_hash,
+        "proposal": event.proposal,
+        "gate": event.gate,
+        "exec": event.exec,
+        "result": event.result,
+    }
+
+
+def _event_task_id(event: LedgerEvent | dict) -> str:
+    if isinstance(event, dict):
+        return event.get("task_id", "unknown")
+    return getattr(event, "task_id", "unknown")
 
 
 def read_ledger(run_dir: str) -> list[LedgerEvent]:
@@ -48,7 +48,7 @@ class StrategyRecommendation:
     alternatives: list[str]
     
     # Strategies to avoid
-    quarantined: set[str]
+    quarantined: frozenset[str]
     
     # Reasoning (for debugging/audit)
     reasoning: str
@@ -229,7 +229,7 @@ class LearnedStrategySelector:
         self,
         fingerprint: FailureFingerprint,
         strategy: str,
-        quarantined: set[str],
+        quarantined: frozenset[str],
     ) -> str:
         """Build human-readable reasoning for recommendation."""
         parts = [
@@ -14,17 +14,29 @@ making the agent worse over time.
 
 from __future__ import annotations
 
+import atexit
 import logging
 import os
+import queue
 import sqlite3
+import sys
+import threading
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Any
 
 logger = logging.getLogger(__name__)
 
+# Writer thread tuning: max rows coalesced per transaction, and how long to
+# keep collecting after the first row of a batch arrives.
+_WRITE_BATCH = 512
+_WRITE_WINDOW = 0.2
 
-@dataclass
+# Tells the writer thread to write what it has and exit
+_STOP = object()
+
+
+@dataclass(slots=True)
 class QuarantineStats:
     """Statistics for quarantine decisions."""
     
@@ -33,6 +45,8 @@ class QuarantineStats:
     successes: int = 0
     regressions: int = 0
     last_regression_timestamp: float | None = None
+    # Cached verdict, refreshed by _recompute_quarantine when counts change
+    _quarantined: bool = field(default=False, init=False, repr=False)
     
     @property
     def success_rate(self) -> float:
@@ -47,7 +61,7 @@ class QuarantineStats:
         return self.regressions / self.total_tries
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class QuarantineConfig:
     """Configuration for quarantine thresholds."""
     
@@ -64,24 +78,35 @@ class QuarantineConfig:
     min_tries_for_rate: int = 5
 
 
+# Shared default thresholds; QuarantineConfig is frozen so reuse is safe
+_DEFAULT_CONFIG = QuarantineConfig()
+
+
 def is_quarantined(
-    stats: dict[str, Any],
+    stats: QuarantineStats | dict[str, Any],
     config: QuarantineConfig | None = None,
 ) -> bool:
     """Check if a strategy should be quarantined.
     
     Args:
-        stats: Strategy statistics dict with "wins", "tries", "regressions".
+        stats: QuarantineStats, or a statistics dict with "wins", "tries",
+            "regressions".
         config: Quarantine configuration.
         
     Returns:
         True if strategy should be quarantined.
     """
-    config = config or QuarantineConfig()
+    if config is None:
+        config = _DEFAULT_CONFIG
     
-    tries = stats.get("tries", 0)
-    wins = stats.get("wins", 0)
-    regressions = stats.get("regressions", 0)
+    if isinstance(stats, QuarantineStats):
+        tries = stats.total_tries
+        wins = stats.successes
+        regressions = stats.regressions
+    else:
+        tries = stats.get("tries", 0)
+        wins = stats.get("wins", 0)
+        regressions = stats.get("regressions", 0)
     
     # Not enough evidence yet
     if tries < config.min_successes:
@@ -100,6 +125,15 @@ def is_quarantined(
     return False
 
 
+def _recompute_quarantine(stats: QuarantineStats, config: QuarantineConfig) -> None:
+    """Refresh the cached quarantine verdict on stats."""
+    stats._quarantined = is_quarantined(stats, config)
+
+
+# Stand-in for strategies with no recorded stats; never quarantined
+_EMPTY = QuarantineStats(strategy="")
+
+
 class QuarantineLane:
     """Manager for quarantined strategies.
     
@@ -128,26 +162,53 @@ class QuarantineLane:
             config: Quarantine configuration.
             db_path: Optional SQLite path for persistent quarantine.
         """
-        self.config = config or QuarantineConfig()
+        self.config = config or _DEFAULT_CONFIG
         
         # Per-context quarantine status
-        # context -> strategy -> QuarantineStats
-        self._stats: dict[str, dict[str, QuarantineStats]] = {}
+        # (context, strategy) -> QuarantineStats
+        self._stats: dict[tuple[str, str], QuarantineStats] = {}
         
-        # Globally quarantined strategies (across all contexts)
-        self._global_quarantine: set[str] = set()
+        # context -> its stats in insertion order, for per-context scans
+        self._contexts: dict[str, list[QuarantineStats]] = {}
         
-        # SQLite persistence
+        # Globally quarantined strategies (across all contexts). Immutable and
+        # replaced on the rare updates, so it can be handed out without a copy.
+        self._global_quarantine: frozenset[str] = frozenset()
+        
+        # SQLite persistence. record_outcome only enqueues a snapshot; a
+        # writer thread coalesces them and commits one transaction per batch.
         self._db_path = db_path
         self._conn: sqlite3.Connection | None = None
+        self._write_q: queue.Queue = queue.Queue(maxsize=10_000)
+        self._writer: threading.Thread | None = None
         if self._db_path:
             parent = os.path.dirname(os.path.abspath(self._db_path))
             if parent:
                 os.makedirs(parent, exist_ok=True)
-            self._conn = sqlite3.connect(self._db_path)
-            self._conn.execute("PRAGMA journal_mode=WAL;")
+            # Autocommit; the writer brackets its batches in BEGIN/COMMIT.
+            # After loading, only the writer thread touches the connection.
+            self._conn = sqlite3.connect(
+                self._db_path, isolation_level=None, check_same_thread=False
+            )
+            # WAL makes NORMAL safe against corruption and saves an fsync
+            # per commit; the rest keep the hot set and temp data in memory.
+            self._conn.executescript(
+                """
+                PRAGMA journal_mode=WAL;
+                PRAGMA synchronous=NORMAL;
+                PRAGMA temp_store=MEMORY;
+                PRAGMA cache_size=-64000;
+                PRAGMA mmap_size=268435456;
+                PRAGMA busy_timeout=5000;
+                """
+            )
             self._init_schema()
             self._load_from_db()
+            self._writer = threading.Thread(
+                target=self._writer_loop, name="quarantine-writer", daemon=True
+            )
+            self._writer.start()
+            atexit.register(self.close)
     
     def _init_schema(self) -> None:
         """Initialize SQLite schema for quarantine persistence."""
@@ -182,63 +243,143 @@ class QuarantineLane:
         if not self._conn:
             return
 
+        # Rows are streamed from the cursor rather than fetched all at once
+        cur = self._conn.cursor()
+        stats_by_key = self._stats
+        contexts = self._contexts
+        config = self.config
+
         # Load per-context stats
-        cur = self._conn.execute(
+        cur.execute(
             "SELECT context, strategy, total_tries, successes, regressions, last_regression_ts "
             "FROM quarantine_stats"
         )
-        for (ctx, s, tries, succ, reg, last_ts) in cur.fetchall():
-            if ctx not in self._stats:
-                self._stats[ctx] = {}
-            self._stats[ctx][s] = QuarantineStats(
+        for ctx, s, tries, succ, reg, last_ts in cur:
+            # sqlite returns a fresh str per row; interning lets every row
+            # for a context (or strategy) share one string object
+            ctx = sys.intern(ctx)
+            s = sys.intern(s)
+            stats = QuarantineStats(
                 strategy=s,
                 total_tries=int(tries),
                 successes=int(succ),
                 regressions=int(reg),
                 last_regression_timestamp=float(last_ts) if last_ts else None,
             )
+            _recompute_quarantine(stats, config)
+            stats_by_key[(ctx, s)] = stats
+            contexts.setdefault(ctx, []).append(stats)
 
         # Load global quarantine list
-        cur = self._conn.execute("SELECT strategy FROM quarantine_global")
-        for (s,) in cur.fetchall():
-            self._global_quarantine.add(s)
+        cur.execute("SELECT strategy FROM quarantine_global")
+        self._global_quarantine = frozenset(s for (s,) in cur)
+        cur.close()
 
-    def _persist_stats(self, context: str, strategy: str, stats: QuarantineStats) -> None:
-        """Persist stats for one context/strategy pair."""
-        if not self._conn:
+    def flush(self, timeout: float | None = 5.0) -> None:
+        """Block until every outcome recorded so far has been written.
+        
+        Args:
+            timeout: Maximum seconds to wait for the writer thread.
+        """
+        if self._writer is None:
+            return
+        done = threading.Event()
+        self._write_q.put(done)
+        done.wait(timeout)
+    
+    def close(self) -> None:
+        """Write outstanding outcomes, stop the writer and close the database."""
+        writer, self._writer = self._writer, None
+        if writer is None:
             return
+        # Don't keep a closed lane (and its stats) alive until exit
+        atexit.unregister(self.close)
+        self._write_q.put(_STOP)
+        writer.join()
+        if self._conn:
+            self._conn.close()
+            self._conn = None
+    
+    def _writer_loop(self) -> None:
+        """Drain the write queue, committing coalesced rows in batches."""
+        # Rows that failed to write are kept and retried with the next batch
+        pending: dict[tuple[str, str], tuple] = {}
+        while True:
+            item = self._write_q.get()
+            batch = [item]
+            deadline = time.monotonic() + _WRITE_WINDOW
+            # Keep collecting briefly, but don't hold up a flush or close
+            while (
+                item is not _STOP
+                and not isinstance(item, threading.Event)
+                and len(batch) < _WRITE_BATCH
+            ):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._write_q.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(item)
+            
+            waiters = []
+            stop = False
+            for item in batch:
+                if item is _STOP:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    pending[(item[0], item[1])] = item
+            
+            if pending and self._write_rows(list(pending.values())):
+                pending.clear()
+            for done in waiters:
+                done.set()
+            if stop:
+                return
+    
+    def _write_rows(self, rows: list[tuple]) -> bool:
+        """Upsert stats rows in a single transaction. Returns True on success."""
+        assert self._conn is not None
         now = int(time.time())
-        self._conn.execute(
-            """
-            INSERT INTO quarantine_stats
-                (context, strategy, total_tries, successes, regressions, last_regression_ts, updated_ts)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT(context, strategy) DO UPDATE SET
-                total_tries=excluded.total_tries,
-                successes=excluded.successes,
-                regressions=excluded.regressions,
-                last_regression_ts=excluded.last_regression_ts,
-                updated_ts=excluded.updated_ts
-            """,
-            (
-                context,
-                strategy,
-                stats.total_tries,
-                stats.successes,
-                stats.regressions,
-                stats.last_regression_timestamp,
-                now,
-            ),
-        )
-        self._conn.commit()
+        try:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    """
+                    INSERT INTO quarantine_stats
+                        (context, strategy, total_tries, successes, regressions, last_regression_ts, updated_ts)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(context, strategy) DO UPDATE SET
+                        total_tries=excluded.total_tries,
+                        successes=excluded.successes,
+                        regressions=excluded.regressions,
+                        last_regression_ts=excluded.last_regression_ts,
+                        updated_ts=excluded.updated_ts
+                    """,
+                    [row + (now,) for row in rows],
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        except Exception:
+            logger.exception("Failed to persist quarantine stats")
+            return False
+        return True
     
     def _get_stats(self, context: str, strategy: str) -> QuarantineStats:
         """Get or create stats for a context/strategy pair."""
-        if context not in self._stats:
-            self._stats[context] = {}
-        if strategy not in self._stats[context]:
-            self._stats[context][strategy] = QuarantineStats(strategy=strategy)
-        return self._stats[context][strategy]
+        key = (context, strategy)
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = QuarantineStats(strategy=strategy)
+            _recompute_quarantine(stats, self.config)
+            self._stats[key] = stats
+            self._contexts.setdefault(context, []).append(stats)
+        return stats
     
     def is_quarantined(
         self,
@@ -258,48 +399,34 @@ class QuarantineLane:
         if strategy in self._global_quarantine:
             return True
         
-        # Check context-specific quarantine
-        if context and context in self._stats:
-            stats = self._stats[context].get(strategy)
-            if stats:
-                return is_quarantined(
-                    {
-                        "tries": stats.total_tries,
-                        "wins": stats.successes,
-                        "regressions": stats.regressions,
-                    },
-                    self.config,
-                )
-        
-        return False
+        # Context-specific verdict is cached on the stats
+        if not context:
+            return False
+        return self._stats.get((context, strategy), _EMPTY)._quarantined
     
     def get_quarantined_strategies(
         self,
         context: str | None = None,
-    ) -> set[str]:
+    ) -> frozenset[str]:
         """Get all quarantined strategies.
         
         Args:
             context: Optional context to check.
             
         Returns:
-            Set of quarantined strategy names.
+            Frozen set of quarantined strategy names.
         """
-        result = self._global_quarantine.copy()
-        
-        if context and context in self._stats:
-            for strategy, stats in self._stats[context].items():
-                if is_quarantined(
-                    {
-                        "tries": stats.total_tries,
-                        "wins": stats.successes,
-                        "regressions": stats.regressions,
-                    },
-                    self.config,
-                ):
-                    result.add(strategy)
+        if not context:
+            return self._global_quarantine
         
-        return result
+        names = [
+            stats.strategy
+            for stats in self._contexts.get(context, ())
+            if stats._quarantined
+        ]
+        if not names:
+            return self._global_quarantine
+        return self._global_quarantine.union(names)
     
     def record_outcome(
         self,
@@ -333,22 +460,33 @@ class QuarantineLane:
             stats.regressions += 1
             stats.last_regression_timestamp = timestamp
         
+        _recompute_quarantine(stats, self.config)
         now_quarantined = self.is_quarantined(strategy, context)
         
         if now_quarantined and not was_quarantined:
             logger.warning(
-                "Strategy %s quarantined for context %s: "
+                # %.8s truncates the context only if the record is emitted
+                "Strategy %s quarantined for context %.8s: "
                 "tries=%d, wins=%d, regressions=%d",
-                strategy, context[:8],
+                strategy, context,
                 stats.total_tries, stats.successes, stats.regressions
             )
         
-        # Persist to database
-        if self._conn:
+        # Hand a snapshot to the writer thread; never block on the database
+        if self._writer is not None:
             try:
-                self._persist_stats(context, strategy, stats)
-            except Exception:
-                logger.exception("Failed to persist quarantine stats")
+                self._write_q.put_nowait((
+                    context,
+                    strategy,
+                    stats.total_tries,
+                    stats.successes,
+                    stats.regressions,
+                    stats.last_regression_timestamp,
+                ))
+            except queue.Full:
+                logger.warning(
+                    "Quarantine write queue full, dropping update for %s", strategy
+                )
         
         return now_quarantined and not was_quarantined
     
@@ -359,8 +497,9 @@ class QuarantineLane:
             strategy: Strategy to quarantine.
             reason: Reason for quarantine.
         """
-        logger.info("Force-quarantining strategy %s: %s", strategy, reason)
-        self._global_quarantine.add(strategy)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Force-quarantining strategy %s: %s", strategy, reason)
+        self._global_quarantine = self._global_quarantine | {strategy}
     
     def release_from_quarantine(self, strategy: str) -> None:
         """Remove a strategy from global quarantine.
@@ -369,8 +508,9 @@ class QuarantineLane:
             strategy: Strategy to release.
         """
         if strategy in self._global_quarantine:
-            logger.info("Releasing strategy %s from quarantine", strategy)
-            self._global_quarantine.discard(strategy)
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Releasing strategy %s from quarantine", strategy)
+            self._global_quarantine = self._global_quarantine - {strategy}
     
     def get_stats_summary(self, context: str | None = None) -> list[dict]:
         """Get quarantine stats summary.
@@ -381,7 +521,7 @@ class QuarantineLane:
         Returns:
             List of stats dicts.
         """
-        if context and context in self._stats:
+        if context and context in self._contexts:
             return [
                 {
                     "strategy": s.strategy,
@@ -390,6 +530,6 @@ class QuarantineLane:
                     "regressions": s.regressions,
                     "quarantined": self.is_quarantined(s.strategy, context),
                 }
-                for s in self._stats[context].values()
+                for s in self._contexts[context]
             ]
         return []
@@ -9,6 +9,7 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 from enum import Enum
+from functools import lru_cache
 
 
 class ErrorCategory(Enum):
@@ -28,7 +29,7 @@ class ErrorCategory(Enum):
     LOGIC_ERROR = "logic_error"
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class StrategyDefinition:
     """Complete definition of a fix strategy."""
     
@@ -323,7 +324,8 @@ FIX_GENERATOR = StrategyDefinition(
 # STRATEGY REGISTRY
 # =============================================================================
 
-ALL_STRATEGIES: list[StrategyDefinition] = [
+# Kept in descending priority order so filtered views come out pre-sorted
+ALL_STRATEGIES: list[StrategyDefinition] = sorted([
     # Null/None
     GUARD_NONE,
     NONE_COALESCE,
@@ -365,7 +367,7 @@ ALL_STRATEGIES: list[StrategyDefinition] = [
     # Iteration
     FIX_ITERATION,
     FIX_GENERATOR,
-]
+], key=lambda s: s.priority, reverse=True)
 
 # Quick lookup by name
 STRATEGY_BY_NAME: dict[str, StrategyDefinition] = {s.name: s for s in ALL_STRATEGIES}
@@ -373,18 +375,50 @@ STRATEGY_BY_NAME: dict[str, StrategyDefinition] = {s.name: s for s in ALL_STRATE
 # Default strategy names for bandit
 DEFAULT_STRATEGY_NAMES: list[str] = [s.name for s in ALL_STRATEGIES]
 
+# Guard-adding strategies, in priority order
+DEFENSIVE_STRATEGIES: tuple[StrategyDefinition, ...] = tuple(
+    s for s in ALL_STRATEGIES if s.is_defensive
+)
+
 
 def get_strategy(name: str) -> StrategyDefinition | None:
     """Get strategy definition by name."""
     return STRATEGY_BY_NAME.get(name)
 
 
+def _build_keyword_index() -> dict[str, list[int]]:
+    """Map each lowercased keyword/category token to the strategies using it.
+
+    Postings are indices into ALL_STRATEGIES, so a lookup tests each distinct
+    token once instead of once per strategy that lists it.
+    """
+    index: dict[str, list[int]] = {}
+    for i, strategy in enumerate(ALL_STRATEGIES):
+        tokens = {cat.value.replace("_", "") for cat in strategy.applicable_errors}
+        tokens.update(kw.lower() for kw in strategy.keywords)
+        for token in tokens:
+            index.setdefault(token, []).append(i)
+    return index
+
+
+_KEYWORD_INDEX: dict[str, list[int]] = _build_keyword_index()
+
+
+@lru_cache(maxsize=256)
+def _matching_indices(error_lower: str) -> tuple[int, ...]:
+    """Indices of strategies whose tokens occur in error_lower, in priority order."""
+    matched: set[int] = set()
+    for token, postings in _KEYWORD_INDEX.items():
+        if token in error_lower:
+            matched.update(postings)
+    return tuple(sorted(matched))
+
+
 def strategies_for_error(error_type: str) -> list[StrategyDefinition]:
     """Get strategies applicable to an error type, sorted by priority."""
-    matches = [s for s in ALL_STRATEGIES if s.matches_error(error_type)]
-    return sorted(matches, key=lambda s: s.priority, reverse=True)
+    return [ALL_STRATEGIES[i] for i in _matching_indices(error_type.lower())]
 
 
 def defensive_strategies() -> list[StrategyDefinition]:
     """Get all defensive/guard-adding strategies."""
-    return [s for s in ALL_STRATEGIES if s.is_defensive]
+    return list(DEFENSIVE_STRATEGIES)
@@ -1,7 +1,8 @@
 """Prometheus metrics for RFSN Controller.
 
 Provides comprehensive metrics collection for monitoring performance,
-success rates, and system health.
+success rates, and system health. Each metric is created and registered
+the first time it is used.
 
 Usage:
     from rfsn_controller.metrics import (
@@ -14,6 +15,10 @@ Usage:
     # Increment counters
     proposals_total.labels(intent='repair', action_type='edit_file').inc()
     
+    # In hot paths, use the cached child instead (labels are positional, in
+    # declaration order)
+    inc('proposals_total', 'repair', 'edit_file')
+    
     # Time operations
     with repair_duration.time():
         result = controller.repair()
@@ -24,7 +29,15 @@ Usage:
 
 from __future__ import annotations
 
+import os
+import threading
 import time
+import weakref
+from bisect import bisect_left
+from collections import defaultdict, deque
+from collections.abc import Callable
+from contextlib import nullcontext
+from typing import Any
 
 from prometheus_client import (
     REGISTRY,
@@ -35,221 +48,533 @@ from prometheus_client import (
     start_http_server,
 )
 
+# =============================================================================
+# Batched Histograms
+# =============================================================================
+
+class FastHistogram(Histogram):
+    """Histogram that finds an observation's bucket by bisection.
+    
+    Histogram.observe() walks the bucket bounds in a Python loop. The
+    bounds are sorted and end in +Inf, so bisect_left over a tuple of them
+    finds the same bucket in C. Observations with an exemplar take the
+    stock path.
+    """
+    
+    def _metric_init(self) -> None:
+        super()._metric_init()
+        self._bounds = tuple(self._upper_bounds)
+    
+    def observe(self, amount: float, exemplar: dict[str, str] | None = None) -> None:
+        if exemplar or amount != amount:
+            # NaN lands in no bucket upstream; bisect would put it in the first
+            super().observe(amount, exemplar)
+            return
+        self._raise_if_not_observable()
+        self._sum.inc(amount)
+        self._buckets[bisect_left(self._bounds, amount)].inc(1)
+
+
+class BatchedHistogram:
+    """Histogram whose observe() only queues the value for a flusher thread.
+    
+    Histogram.observe() takes a lock and searches the buckets on every call.
+    Here each thread appends to its own deque, and flush() replays the
+    queued values into the histogram. flush() runs every _FLUSH_INTERVAL on
+    the thread from start_histogram_flusher(), which the first observe()
+    starts, and on every collection from REGISTRY, so any exposition path
+    sees current values. A thread that queues more than maxlen values
+    between flushes loses the oldest. Everything but observe() is delegated
+    to the wrapped histogram.
+    """
+    
+    def __init__(self, histogram: Histogram, maxlen: int = 4096):
+        self._histogram = histogram
+        self._maxlen = maxlen
+        self._local = threading.local()
+        # (owning thread, its buffer); buffers of exited threads are dropped
+        # by flush() once drained
+        self._buffers: list[tuple[weakref.ref, deque]] = []
+        self._buffers_lock = threading.Lock()
+        _BATCHED.append(self)
+    
+    def observe(self, amount: float) -> None:
+        try:
+            self._local.buffer.append(amount)
+        except AttributeError:
+            buffer = self._local.buffer = deque(maxlen=self._maxlen)
+            owner = weakref.ref(threading.current_thread())
+            with self._buffers_lock:
+                self._buffers.append((owner, buffer))
+            buffer.append(amount)
+            start_histogram_flusher()
+    
+    def flush(self) -> None:
+        """Apply every queued observation to the wrapped histogram."""
+        observe = self._histogram.observe
+        with self._buffers_lock:
+            buffers = list(self._buffers)
+        dead = set()
+        for owner, buffer in buffers:
+            thread = owner()
+            # Check liveness first so nothing appended after the drain is lost
+            alive = thread is not None and thread.is_alive()
+            popleft = buffer.popleft
+            for _ in range(len(buffer)):
+                observe(popleft())
+            if not alive:
+                dead.add(id(buffer))
+        if dead:
+            with self._buffers_lock:
+                self._buffers = [
+                    entry for entry in self._buffers if id(entry[1]) not in dead
+                ]
+    
+    def __getattr__(self, name: str):
+        return getattr(self._histogram, name)
+
+
+_BATCHED: list[BatchedHistogram] = []
+_FLUSH_INTERVAL = 0.05
+_flusher: threading.Thread | None = None
+_flusher_lock = threading.Lock()
+
+
+def flush_histograms() -> None:
+    """Apply all queued observations of every BatchedHistogram."""
+    for histogram in _BATCHED:
+        histogram.flush()
+
+
+class _FlushCollector:
+    """Registry collector that flushes batched histograms on each scrape.
+    
+    It is registered before any metric is created, so the registry collects
+    it (and drains the queues) ahead of the histograms themselves.
+    """
+    
+    def describe(self) -> list:
+        return []
+    
+    def collect(self) -> list:
+        flush_histograms()
+        return []
+
+
+REGISTRY.register(_FlushCollector())
+
+
+def _flush_forever() -> None:
+    while True:
+        time.sleep(_FLUSH_INTERVAL)
+        flush_histograms()
+
+
+def start_histogram_flusher() -> None:
+    """Start the daemon thread that flushes batched histograms, once."""
+    global _flusher
+    with _flusher_lock:
+        if _flusher is None:
+            _flusher = threading.Thread(
+                target=_flush_forever, name="rfsn-metrics-flush", daemon=True
+            )
+            _flusher.start()
+
+
+# =============================================================================
+# Lazy Metric Creation
+# =============================================================================
+
+# Metric name -> factory. Each metric is created and registered on first
+# use, through _metric() inside this module or attribute access from outside.
+_FACTORIES: dict[str, Callable[[], Any]] = {}
+_create_lock = threading.Lock()
+
+
+def _lazy(name: str, factory: Callable[[], Any]) -> None:
+    _FACTORIES[name] = factory
+
+
+def _metric(name: str):
+    """Return the named metric, creating it on first use."""
+    metric = globals().get(name)
+    if metric is None:
+        with _create_lock:
+            metric = globals().get(name)
+            if metric is None:
+                metric = _FACTORIES[name]()
+                for labels in KNOWN_LABELS.get(name, ()):
+                    _BOUND[(name, labels)] = metric.labels(*labels)
+                globals()[name] = metric
+    return metric
+
+
+class _NoopMetric:
+    """Stands in for any metric while METRICS_ENABLED is False."""
+    
+    def labels(self, *args, **kwargs) -> _NoopMetric:
+        return self
+    
+    def inc(self, amount: float = 1) -> None:
+        pass
+    
+    def dec(self, amount: float = 1) -> None:
+        pass
+    
+    def set(self, value: float) -> None:
+        pass
+    
+    def observe(self, amount: float) -> None:
+        pass
+    
+    def info(self, val: dict[str, str]) -> None:
+        pass
+    
+    def time(self) -> nullcontext:
+        return nullcontext()
+
+
+_NOOP = _NoopMetric()
+
+
+def __getattr__(name: str):
+    if name in _FACTORIES:
+        # Not cached while disabled, so enabling later yields the real metric
+        return _metric(name) if METRICS_ENABLED else _NOOP
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 # =============================================================================
 # Proposal Metrics
 # =============================================================================
 
-proposals_total = Counter(
+_lazy('proposals_total', lambda: Counter(
     'rfsn_proposals_total',
     'Total number of proposals generated by planner',
     ['intent', 'action_type'],
     registry=REGISTRY
-)
+))
 
-proposals_rejected = Counter(
+_lazy('proposals_rejected', lambda: Counter(
     'rfsn_proposals_rejected_total',
     'Number of proposals rejected by gate',
     ['rejection_type', 'intent'],
     registry=REGISTRY
-)
+))
 
-proposals_accepted = Counter(
+_lazy('proposals_accepted', lambda: Counter(
     'rfsn_proposals_accepted_total',
     'Number of proposals accepted by gate',
     ['intent', 'action_type'],
     registry=REGISTRY
-)
+))
 
 # =============================================================================
 # Repair Session Metrics
 # =============================================================================
 
-repair_duration = Histogram(
+_lazy('repair_duration', lambda: Histogram(
     'rfsn_repair_duration_seconds',
     'Time to complete a repair session',
     buckets=[1, 5, 10, 30, 60, 120, 300, 600, 1200, 1800, 3600],
     registry=REGISTRY
-)
+))
 
-repair_success = Counter(
+_lazy('repair_success', lambda: Counter(
     'rfsn_repair_success_total',
     'Number of successful repairs',
     ['project_type'],
     registry=REGISTRY
-)
+))
 
-repair_failure = Counter(
+_lazy('repair_failure', lambda: Counter(
     'rfsn_repair_failure_total',
     'Number of failed repairs',
     ['failure_reason', 'project_type'],
     registry=REGISTRY
-)
+))
 
-active_repairs = Gauge(
+_lazy('active_repairs', lambda: Gauge(
     'rfsn_active_repairs',
     'Number of currently active repair sessions',
     registry=REGISTRY
-)
+))
 
 # =============================================================================
 # Test Execution Metrics
 # =============================================================================
 
-tests_executed = Counter(
+_lazy('tests_executed', lambda: Counter(
     'rfsn_tests_executed_total',
     'Total number of test executions',
     ['test_type'],  # 'focused', 'full', 'regression'
     registry=REGISTRY
-)
+))
 
-tests_passed = Counter(
+_lazy('tests_passed', lambda: Counter(
     'rfsn_tests_passed_total',
     'Number of passing tests',
     ['test_type'],
     registry=REGISTRY
-)
+))
 
-tests_failed = Counter(
+_lazy('tests_failed', lambda: Counter(
     'rfsn_tests_failed_total',
     'Number of failing tests',
     ['test_type'],
     registry=REGISTRY
-)
+))
 
-test_duration = Histogram(
+_lazy('test_duration', lambda: BatchedHistogram(FastHistogram(
     'rfsn_test_duration_seconds',
     'Test execution time',
     buckets=[0.1, 0.5, 1, 2, 5, 10, 30, 60, 120, 300],
     registry=REGISTRY
-)
+)))
 
 # =============================================================================
 # LLM Metrics
 # =============================================================================
 
-llm_requests = Counter(
+_lazy('llm_requests', lambda: Counter(
     'rfsn_llm_requests_total',
     'Total LLM API requests',
     ['model', 'purpose'],  # purpose: 'planning', 'analysis', 'generation'
     registry=REGISTRY
-)
+))
 
-llm_tokens = Counter(
+_lazy('llm_tokens', lambda: Counter(
     'rfsn_llm_tokens_total',
     'Total tokens consumed',
     ['model', 'token_type'],  # token_type: 'prompt', 'completion'
     registry=REGISTRY
-)
+))
 
-llm_latency = Histogram(
+_lazy('llm_latency', lambda: BatchedHistogram(FastHistogram(
     'rfsn_llm_latency_seconds',
     'LLM API response latency',
     buckets=[0.1, 0.5, 1, 2, 5, 10, 20, 30, 60],
     registry=REGISTRY
-)
+)))
 
-llm_errors = Counter(
+_lazy('llm_errors', lambda: Counter(
     'rfsn_llm_errors_total',
     'LLM API errors',
     ['model', 'error_type'],
     registry=REGISTRY
-)
+))
 
 # =============================================================================
 # Cache Metrics
 # =============================================================================
 
-cache_hits = Counter(
+_lazy('cache_hits', lambda: Counter(
     'rfsn_cache_hits_total',
     'Number of cache hits',
     ['cache_tier'],  # 'memory', 'disk', 'semantic'
     registry=REGISTRY
-)
+))
 
-cache_misses = Counter(
+_lazy('cache_misses', lambda: Counter(
     'rfsn_cache_misses_total',
     'Number of cache misses',
     ['cache_tier'],
     registry=REGISTRY
-)
+))
 
-cache_size = Gauge(
+_lazy('cache_size', lambda: Gauge(
     'rfsn_cache_size_bytes',
     'Current cache size in bytes',
     ['cache_tier'],
     registry=REGISTRY
-)
+))
 
-cache_evictions = Counter(
+_lazy('cache_evictions', lambda: Counter(
     'rfsn_cache_evictions_total',
     'Number of cache evictions',
     ['cache_tier', 'reason'],  # reason: 'ttl', 'size', 'lru'
     registry=REGISTRY
-)
+))
 
 # =============================================================================
 # Gate Metrics
 # =============================================================================
 
-gate_validations = Counter(
+_lazy('gate_validations', lambda: Counter(
     'rfsn_gate_validations_total',
     'Total gate validations',
     ['validation_type'],  # 'safety', 'schema', 'ordering', 'bounds'
     registry=REGISTRY
-)
+))
 
-gate_rejections = Counter(
+_lazy('gate_rejections', lambda: Counter(
     'rfsn_gate_rejections_total',
     'Gate rejections by reason',
     ['rejection_reason'],
     registry=REGISTRY
-)
+))
 
-gate_latency = Histogram(
+_lazy('gate_latency', lambda: Histogram(
     'rfsn_gate_latency_seconds',
     'Gate validation latency',
     buckets=[0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1],
     registry=REGISTRY
-)
+))
 
 # =============================================================================
 # Docker/Sandbox Metrics
 # =============================================================================
 
-docker_operations = Counter(
+_lazy('docker_operations', lambda: Counter(
     'rfsn_docker_operations_total',
     'Docker operations executed',
     ['operation'],  # 'create', 'start', 'stop', 'remove'
     registry=REGISTRY
-)
+))
 
-docker_duration = Histogram(
+_lazy('docker_duration', lambda: Histogram(
     'rfsn_docker_operation_duration_seconds',
     'Docker operation duration',
     buckets=[0.1, 0.5, 1, 2, 5, 10, 30, 60],
     registry=REGISTRY
-)
+))
 
-active_sandboxes = Gauge(
+_lazy('active_sandboxes', lambda: Gauge(
     'rfsn_active_sandboxes',
     'Number of active Docker sandboxes',
     registry=REGISTRY
-)
+))
 
 # =============================================================================
 # System Info
 # =============================================================================
 
-system_info = Info(
+_lazy('system_info', lambda: Info(
     'rfsn_system',
     'RFSN Controller system information',
     registry=REGISTRY
-)
+))
+
+# =============================================================================
+# Bound Label Children
+# =============================================================================
+
+_TEST_TYPES = [('focused',), ('full',), ('regression',)]
+_CACHE_TIERS = [('memory',), ('disk',), ('semantic',)]
+
+# Label combinations known up front, bound when their metric is created
+KNOWN_LABELS: dict[str, list[tuple[str, ...]]] = {
+    'proposals_total': [
+        ('repair', 'edit_file'),
+        ('repair', 'apply_patch'),
+        ('plan', 'plan_step'),
+    ],
+    'tests_executed': _TEST_TYPES,
+    'tests_passed': _TEST_TYPES,
+    'tests_failed': _TEST_TYPES,
+    'cache_hits': _CACHE_TIERS,
+    'cache_misses': _CACHE_TIERS,
+    'cache_size': _CACHE_TIERS,
+}
+
+# (metric name, label values) -> child. labels() validates, hashes and takes
+# the metric's lock on every call; a cached child skips all of that.
+_BOUND: dict[tuple[str, tuple[str, ...]], Any] = {}
+
+
+def bound(name: str, *labels: str):
+    """Return the child of a labelled metric, binding it on first use.
+    
+    Args:
+        name: Metric variable name in this module (e.g. 'tests_executed')
+        *labels: Label values, positionally in declaration order
+    """
+    key = (name, labels)
+    child = _BOUND.get(key)
+    if child is None:
+        # Racing threads get the same child back from labels()
+        child = _BOUND[key] = _metric(name).labels(*labels)
+    return child
+
+
+def inc(name: str, *labels: str, amount: float = 1) -> None:
+    """Increment a labelled counter through its cached child.
+    
+    Example:
+        >>> inc('tests_executed', 'focused')
+    """
+    bound(name, *labels).inc(amount)
+
+
+class MetricsBatch:
+    """Accumulate counter increments and apply each child's total on exit.
+    
+    Every Counter.inc() takes the child's lock. In a loop that increments
+    the same few children many times, the batch turns that into one inc()
+    per distinct child. Totals are applied even if the block raises.
+    
+    Example:
+        >>> with MetricsBatch() as batch:
+        ...     for tier, hit in accesses:
+        ...         batch.record_cache_access(tier, hit)
+    """
+    
+    def __init__(self):
+        self._pending: defaultdict = defaultdict(float)
+    
+    def __enter__(self) -> MetricsBatch:
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.flush()
+    
+    def inc(self, name: str, *labels: str, amount: float = 1) -> None:
+        """Queue an increment; same arguments as the module-level inc()."""
+        if METRICS_ENABLED:
+            self._pending[bound(name, *labels)] += amount
+    
+    def record_cache_access(self, tier: str, hit: bool) -> None:
+        """Queue a cache hit or miss, as record_cache_access() counts it."""
+        self.inc('cache_hits' if hit else 'cache_misses', tier)
+    
+    def flush(self) -> None:
+        """Apply and clear the queued increments."""
+        pending, self._pending = self._pending, defaultdict(float)
+        for child, amount in pending.items():
+            child.inc(amount)
+
+
+# Free-text label values each become a new time series and a new child in
+# the metric's dict. Past this many distinct values, new ones become "other".
+_FREE_LABEL_CAP = 256
+_seen_failure_reasons: set[str] = set()
+
+
+def _bucket(value: str, seen: set[str]) -> str:
+    """Return value while fewer than _FREE_LABEL_CAP values have been seen."""
+    if value in seen:
+        return value
+    if len(seen) >= _FREE_LABEL_CAP:
+        return 'other'
+    seen.add(value)
+    return value
+
 
 # =============================================================================
 # Helper Functions
 # =============================================================================
 
+# When False, the record_* and track_* helpers return before touching any
+# metric. RFSN_METRICS_ENABLED=0 disables them from startup (e.g. on CI).
+METRICS_ENABLED = os.environ.get("RFSN_METRICS_ENABLED", "1") == "1"
+
+
+def set_metrics_enabled(flag: bool) -> None:
+    """Turn the record_* and track_* helpers on or off at runtime."""
+    global METRICS_ENABLED
+    METRICS_ENABLED = flag
+
+
 def start_metrics_server(port: int = 9090, addr: str = '0.0.0.0') -> None:
     """Start Prometheus metrics HTTP server.
     
@@ -277,25 +602,39 @@ def record_repair_session(
         success: Whether repair succeeded
         duration: Session duration in seconds
         project_type: Type of project (python, node, etc.)
-        failure_reason: Reason for failure if unsuccessful
+        failure_reason: Reason for failure if unsuccessful; distinct reasons
+            beyond the first 256 are recorded as "other"
     """
-    repair_duration.observe(duration)
+    if not METRICS_ENABLED:
+        return
+    _metric('repair_duration').observe(duration)
     
     if success:
-        repair_success.labels(project_type=project_type).inc()
+        inc('repair_success', project_type)
     else:
-        repair_failure.labels(
-            failure_reason=failure_reason or "unknown",
-            project_type=project_type
-        ).inc()
+        reason = _bucket(failure_reason or "unknown", _seen_failure_reasons)
+        inc('repair_failure', reason, project_type)
+
+
+def record_llm_call_ok(model: str, purpose: str = "general") -> None:
+    """Count a successful LLM call with no timing or token data."""
+    if METRICS_ENABLED:
+        bound('llm_requests', model, purpose).inc()
+
+
+def record_llm_call_fail(model: str, error_type: str, purpose: str = "general") -> None:
+    """Count a failed LLM call with no timing or token data."""
+    if METRICS_ENABLED:
+        bound('llm_requests', model, purpose).inc()
+        bound('llm_errors', model, error_type).inc()
 
 
 def record_llm_call(
     model: str,
     purpose: str,
-    duration: float,
-    prompt_tokens: int,
-    completion_tokens: int,
+    duration: float | None = None,
+    prompt_tokens: int | None = None,
+    completion_tokens: int | None = None,
     error: str | None = None
 ) -> None:
     """Record LLM API call metrics.
@@ -308,14 +647,25 @@ def record_llm_call(
         completion_tokens: Number of completion tokens
         error: Error type if call failed
     """
-    llm_requests.labels(model=model, purpose=purpose).inc()
-    llm_latency.observe(duration)
+    if (duration, prompt_tokens, completion_tokens) == (None, None, None):
+        if error:
+            record_llm_call_fail(model, error, purpose)
+        else:
+            record_llm_call_ok(model, purpose)
+        return
+    if not METRICS_ENABLED:
+        return
+    inc('llm_requests', model, purpose)
+    if duration is not None:
+        _metric('llm_latency').observe(duration)
     
     if error:
-        llm_errors.labels(model=model, error_type=error).inc()
+        inc('llm_errors', model, error)
     else:
-        llm_tokens.labels(model=model, token_type='prompt').inc(prompt_tokens)
-        llm_tokens.labels(model=model, token_type='completion').inc(completion_tokens)
+        if prompt_tokens:
+            inc('llm_tokens', model, 'prompt', amount=prompt_tokens)
+        if completion_tokens:
+            inc('llm_tokens', model, 'completion', amount=completion_tokens)
 
 
 def record_cache_access(
@@ -330,13 +680,15 @@ def record_cache_access(
         hit: Whether cache hit occurred
         size_bytes: Size of cached item if available
     """
+    if not METRICS_ENABLED:
+        return
     if hit:
-        cache_hits.labels(cache_tier=tier).inc()
+        inc('cache_hits', tier)
     else:
-        cache_misses.labels(cache_tier=tier).inc()
+        inc('cache_misses', tier)
     
     if size_bytes is not None:
-        cache_size.labels(cache_tier=tier).set(size_bytes)
+        bound('cache_size', tier).set(size_bytes)
 
 
 def initialize_system_info(version: str, python_version: str) -> None:
@@ -346,7 +698,7 @@ def initialize_system_info(version: str, python_version: str) -> None:
         version: RFSN Controller version
         python_version: Python runtime version
     """
-    system_info.info({
+    _metric('system_info').info({
         'version': version,
         'python_version': python_version,
     })
@@ -373,6 +725,9 @@ def track_llm_call(provider: str, model: str) -> Generator[None, None, None]:
         >>> with track_llm_call(provider="deepseek", model="deepseek-chat"):
         ...     response = llm.generate(prompt)
     """
+    if not METRICS_ENABLED:
+        yield
+        return
     start_time = time.time()
     error = None
     try:
@@ -382,10 +737,11 @@ def track_llm_call(provider: str, model: str) -> Generator[None, None, None]:
         raise
     finally:
         duration = time.time() - start_time
-        llm_requests.labels(model=f"{provider}/{model}", purpose="general").inc()
-        llm_latency.observe(duration)
         if error:
-            llm_errors.labels(model=f"{provider}/{model}", error_type=error).inc()
+            record_llm_call_fail(f"{provider}/{model}", error)
+        else:
+            record_llm_call_ok(f"{provider}/{model}")
+        _metric('llm_latency').observe(duration)
 
 
 @contextmanager
@@ -401,16 +757,19 @@ def track_cache_operation(tier: str, operation: str) -> Generator[None, None, No
         >>> with track_cache_operation(tier="memory", operation="get"):
         ...     value = cache.get(key)
     """
+    if not METRICS_ENABLED:
+        yield
+        return
     try:
         yield
     except KeyError:
         # Cache miss
-        cache_misses.labels(cache_tier=tier).inc()
+        inc('cache_misses', tier)
         raise
     else:
         # Cache hit
         if operation == "get":
-            cache_hits.labels(cache_tier=tier).inc()
+            inc('cache_hits', tier)
 
 
 @contextmanager
@@ -425,6 +784,9 @@ def track_patch_application(phase: str) -> Generator[None, None, None]:
         >>> with track_patch_application(phase="verification"):
         ...     result = apply_patch(patch)
     """
+    if not METRICS_ENABLED:
+        yield
+        return
     start_time = time.time()
     success = False
     try:
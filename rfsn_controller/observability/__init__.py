@@ -11,8 +11,8 @@ from __future__ import annotations
 import logging
 import time
 from contextlib import contextmanager
-from functools import wraps
-from typing import Callable, TypeVar
+from functools import lru_cache, wraps
+from typing import Callable, NamedTuple, TypeVar
 
 # Check for optional dependencies
 try:
@@ -167,6 +167,49 @@ else:
     strategy_outcomes_total = DummyMetric()
 
 
+# =============================================================================
+# BOUND CHILDREN
+# =============================================================================
+
+# labels() validates, hashes and locks on every call. For label values drawn
+# from a fixed set, bind each child once here and index it in the hot path.
+_REPAIR_BY_STATUS = {
+    s: repair_attempts_total.labels(status=s) for s in ("success", "failed", "timeout")
+}
+_GATE_BY_RESULT = {
+    r: gate_validations_total.labels(result=r) for r in ("approved", "rejected")
+}
+_PATCH_BY_OUTCOME = {
+    o: patches_applied_total.labels(outcome=o) for o in ("success", "failed", "reverted")
+}
+_TEST_BY_RESULT = {
+    r: test_executions_total.labels(result=r) for r in ("passed", "failed", "timeout")
+}
+
+
+class _LLMChildren(NamedTuple):
+    success: object
+    failed: object
+    prompt_tokens: object
+    completion_tokens: object
+    duration: object
+    cost: object
+
+
+@lru_cache(maxsize=64)
+def _llm_children(model: str) -> _LLMChildren:
+    """Bind every per-model LLM child at once, so one lookup serves all metrics."""
+    return _LLMChildren(
+        success=llm_calls_total.labels(model=model, status="success"),
+        failed=llm_calls_total.labels(model=model, status="failed"),
+        prompt_tokens=llm_tokens_used.labels(model=model, type="prompt"),
+        completion_tokens=llm_tokens_used.labels(model=model, type="completion"),
+        duration=llm_call_duration_seconds.labels(model=model),
+        cost=llm_cost_usd.labels(model=model),
+    )
+
+
+
 # =============================================================================
 # METRICS SERVER
 # =============================================================================
@@ -211,7 +254,7 @@ def track_repair_attempt():
     finally:
         duration = time.time() - start_time
         repair_duration_seconds.observe(duration)
-        repair_attempts_total.labels(status=status).inc()
+        _REPAIR_BY_STATUS[status].inc()
         logger.info(
             "repair_attempt_completed",
             status=status,
@@ -228,19 +271,18 @@ def track_llm_call(model: str):
             response = await client.call(...)
     """
     start_time = time.time()
-    status = "success"
+    children = _llm_children(model)
     
     try:
         yield
-        llm_calls_total.labels(model=model, status="success").inc()
+        children.success.inc()
     except Exception as e:
-        status = "failed"
-        llm_calls_total.labels(model=model, status="failed").inc()
+        children.failed.inc()
         logger.error("llm_call_failed", model=model, error=str(e))
         raise
     finally:
         duration = time.time() - start_time
-        llm_call_duration_seconds.labels(model=model).observe(duration)
+        children.duration.observe(duration)
 
 
 # =============================================================================
@@ -255,8 +297,9 @@ def track_tokens(model: str, prompt_tokens: int, completion_tokens: int) -> None
         prompt_tokens: Number of input tokens
         completion_tokens: Number of output tokens
     """
-    llm_tokens_used.labels(model=model, type="prompt").inc(prompt_tokens)
-    llm_tokens_used.labels(model=model, type="completion").inc(completion_tokens)
+    children = _llm_children(model)
+    children.prompt_tokens.inc(prompt_tokens)
+    children.completion_tokens.inc(completion_tokens)
 
 
 def track_cost(model: str, cost_usd: float) -> None:
@@ -266,7 +309,7 @@ def track_cost(model: str, cost_usd: float) -> None:
         model: Model name
         cost_usd: Cost in USD
     """
-    llm_cost_usd.labels(model=model).inc(cost_usd)
+    _llm_children(model).cost.inc(cost_usd)
 
 
 def track_gate_validation(approved: bool) -> None:
@@ -275,8 +318,7 @@ def track_gate_validation(approved: bool) -> None:
     Args:
         approved: Whether the gate approved the action
     """
-    result = "approved" if approved else "rejected"
-    gate_validations_total.labels(result=result).inc()
+    _GATE_BY_RESULT["approved" if approved else "rejected"].inc()
 
 
 def track_patch(outcome: str) -> None:
@@ -285,7 +327,9 @@ def track_patch(outcome: str) -> None:
     Args:
         outcome: One of "success", "failed", "reverted"
     """
-    patches_applied_total.labels(outcome=outcome).inc()
+    # Values outside the documented set are bound per call, not cached
+    child = _PATCH_BY_OUTCOME.get(outcome) or patches_applied_total.labels(outcome=outcome)
+    child.inc()
 
 
 def track_test_execution(result: str) -> None:
@@ -294,7 +338,8 @@ def track_test_execution(result: str) -> None:
     Args:
         result: One of "passed", "failed", "timeout"
     """
-    test_executions_total.labels(result=result).inc()
+    child = _TEST_BY_RESULT.get(result) or test_executions_total.labels(result=result)
+    child.inc()
 
 
 def track_strategy_selection(strategy: str) -> None:
@@ -13,6 +13,7 @@ from .qa_types import (
     ClaimType,
     ClaimVerdict,
     DeltaMapEvidence,
+    DiffSummary,
     Evidence,
     EvidenceType,
     PolicyCheckEvidence,
@@ -29,6 +30,7 @@ __all__ = [
     "ClaimType",
     "ClaimVerdict",
     "DeltaMapEvidence",
+    "DiffSummary",
     "Evidence",
     "EvidenceType",
     "PolicyCheckEvidence",
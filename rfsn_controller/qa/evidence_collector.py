@@ -5,23 +5,72 @@ Controller-driven evidence gathering. NOT an LLM.
 Uses existing tools to collect evidence for challenged claims.
 """
 
+import hashlib
 import logging
+from collections import OrderedDict
 from collections.abc import Callable
+from functools import lru_cache
 from typing import Any
 
 from .qa_types import (
     ClaimVerdict,
-    DeltaMapEvidence,
+    DiffSummary,
     Evidence,
     EvidenceType,
-    PolicyCheckEvidence,
-    StaticCheckEvidence,
-    TestResultEvidence,
     Verdict,
 )
 
 logger = logging.getLogger(__name__)
 
+# Evidence kinds an evidence_request can ask for, as bits
+_TEST = 1
+_DELTA = 2
+_POLICY = 4
+_STATIC = 8
+_COVERAGE = 16
+
+# Substring -> kind. Longer forms like "test_result" contain a shorter key.
+EVIDENCE_KEYWORDS = (
+    ("test", _TEST),
+    ("delta", _DELTA),
+    ("policy", _POLICY),
+    ("hygiene", _POLICY),
+    ("static", _STATIC),
+    ("lint", _STATIC),
+    ("coverage", _COVERAGE),
+    ("untested", _COVERAGE),
+)
+
+
+def _classify_request(request: str) -> int:
+    """Bitmask of evidence kinds named in a lowercased evidence_request."""
+    kinds = 0
+    for keyword, bit in EVIDENCE_KEYWORDS:
+        if keyword in request:
+            kinds |= bit
+    return kinds
+
+
+@lru_cache(maxsize=8)
+def _diff_digest(diff: str) -> str:
+    return hashlib.blake2b(diff.encode("utf-8", "replace"), digest_size=16).hexdigest()
+
+
+def _is_runner_error(result: dict[str, Any]) -> bool:
+    """True if a tool result reports the tool failing to run, not its verdict.
+    
+    Exit codes 0 and 1 are verdicts (pass/fail for pytest, clean/issues for
+    ruff). Anything else - pytest's interrupted/internal/usage errors, ruff's
+    2, or the -1 used for timeouts and crashes - is a runner error, as are
+    results flagged timed_out or carrying an error.
+    """
+    exit_code = result.get("exit_code", 0)
+    return (
+        exit_code not in (0, 1)
+        or bool(result.get("timed_out"))
+        or bool(result.get("error"))
+    )
+
 
 class EvidenceCollector:
     """Collects evidence to resolve challenged claims.
@@ -39,6 +88,7 @@ class EvidenceCollector:
         static_checker: Callable[[str], dict[str, Any]] | None = None,
         coverage_analyzer: Any | None = None,  # CoverageAnalyzer
         timeout_ms: int = 60000,
+        tool_cache_size: int = 64,
     ):
         """Initialize collector.
         
@@ -49,6 +99,8 @@ class EvidenceCollector:
             static_checker: Function(tool) -> {exit_code, issues, ...}
             coverage_analyzer: CoverageAnalyzer for coverage evidence.
             timeout_ms: Timeout for evidence collection.
+            tool_cache_size: Tool results kept for reuse when the same
+                non-empty diff is checked again (0 disables reuse).
         """
         self.test_runner = test_runner
         self.delta_tracker = delta_tracker
@@ -56,6 +108,38 @@ class EvidenceCollector:
         self.static_checker = static_checker
         self.coverage_analyzer = coverage_analyzer
         self.timeout_ms = timeout_ms
+        self.tool_cache_size = tool_cache_size
+        # (tool, diff digest, argument) -> result, least recently used first
+        self._tool_cache: OrderedDict[tuple[str, str, str], dict[str, Any]] = OrderedDict()
+
+    def _run_tool(
+        self,
+        tool: str,
+        arg: str,
+        diff: str,
+        call: Callable[[], dict[str, Any]],
+    ) -> dict[str, Any]:
+        """Return call(), reusing the result of an earlier (tool, arg) on the same diff.
+        
+        Without a diff there is nothing to tie the result to the working
+        tree, so the tool always runs. Raised exceptions and results that
+        report a runner error (see _is_runner_error) are not cached, so the
+        next check runs the tool again.
+        """
+        if self.tool_cache_size <= 0 or not diff:
+            return call()
+        key = (tool, _diff_digest(diff), arg)
+        result = self._tool_cache.get(key)
+        if result is not None:
+            self._tool_cache.move_to_end(key)
+            return result
+        result = call()
+        if _is_runner_error(result):
+            return result
+        self._tool_cache[key] = result
+        if len(self._tool_cache) > self.tool_cache_size:
+            self._tool_cache.popitem(last=False)
+        return result
 
     def collect_for_verdict(
         self,
@@ -63,6 +147,7 @@ class EvidenceCollector:
         *,
         diff: str = "",
         test_cmd: str = "",
+        summary: DiffSummary | None = None,
     ) -> list[Evidence]:
         """Collect evidence for a challenged claim.
         
@@ -70,116 +155,193 @@ class EvidenceCollector:
             verdict: The CHALLENGE verdict with evidence_request.
             diff: The patch diff (for hygiene checks).
             test_cmd: Test command to run.
+            summary: DiffSummary of diff, if the caller already has one.
         
         Returns:
             List of collected evidence.
         """
         if verdict.verdict != Verdict.CHALLENGE:
             return []
+        available = self._available_kinds()
+        if not available:
+            return []
 
         evidence: list[Evidence] = []
-        request = (verdict.evidence_request or "").lower()
-
-        # Parse what evidence is needed
-        if "test_result" in request or "test" in request:
-            if self.test_runner and test_cmd:
-                try:
-                    result = self.test_runner(test_cmd)
-                    evidence.append(TestResultEvidence(
-                        command=test_cmd,
-                        exit_code=result.get("exit_code", 1),
-                        failing_tests=result.get("failing_tests", []),
-                        passing_tests=result.get("passing_tests", []),
-                        duration_ms=result.get("duration_ms", 0),
-                    ).to_evidence())
-                except Exception as e:
-                    logger.warning("Failed to run tests: %s", e)
-
-        if "delta_map" in request or "delta" in request:
-            if self.delta_tracker:
-                try:
-                    # Get current failing tests from test runner result
-                    current_failing = set()
-                    for ev in evidence:
-                        if ev.type == EvidenceType.TEST_RESULT:
-                            current_failing = set(ev.data.get("failing_tests", []))
-                            break
-
-                    fixed, regressed = self.delta_tracker.compute_delta(current_failing)
-                    evidence.append(DeltaMapEvidence(
-                        fixed=list(fixed),
-                        regressed=list(regressed),
-                        still_failing=list(current_failing - fixed),
-                    ).to_evidence())
-                except Exception as e:
-                    logger.warning("Failed to compute delta: %s", e)
-
-        if "policy_check" in request or "policy" in request or "hygiene" in request:
-            if self.hygiene_validator and diff:
-                try:
-                    result = self.hygiene_validator(diff)
-                    evidence.append(PolicyCheckEvidence(
-                        is_valid=result.get("is_valid", False),
-                        violations=result.get("violations", []),
-                        diff_stats=result.get("diff_stats", {}),
-                    ).to_evidence())
-                except Exception as e:
-                    logger.warning("Failed hygiene check: %s", e)
-
-        if "static_check" in request or "static" in request or "lint" in request:
-            if self.static_checker:
-                try:
-                    result = self.static_checker("ruff")  # Default to ruff
-                    evidence.append(StaticCheckEvidence(
-                        tool="ruff",
-                        exit_code=result.get("exit_code", 1),
-                        issues=result.get("issues", []),
-                    ).to_evidence())
-                except Exception as e:
-                    logger.warning("Failed static check: %s", e)
-
-        if "coverage" in request or "untested" in request:
-            if self.coverage_analyzer:
-                try:
-                    # Get touched files from diff
-                    touched_files = self._parse_touched_files(diff)
-                    report = self.coverage_analyzer.analyze_patch(touched_files)
-                    evidence.append(Evidence(
-                        type=EvidenceType.COVERAGE_SIGNAL,
-                        data=report.as_evidence_data(),
-                    ))
-                except Exception as e:
-                    logger.warning("Failed coverage analysis: %s", e)
-
+        kinds = _classify_request((verdict.evidence_request or "").lower()) & available
+        # In bit order, so test results exist before the delta reads them
+        for bit, build in _EVIDENCE_BUILDERS.items():
+            if kinds & bit:
+                build(self, diff, test_cmd, summary, evidence)
         return evidence
 
+    def _available_kinds(self) -> int:
+        """Bitmask of evidence kinds with a configured tool.
+        
+        Computed per call because tools can be attached after construction
+        (the controller sets delta_tracker once it has a baseline).
+        """
+        return (
+            (_TEST if self.test_runner else 0)
+            | (_DELTA if self.delta_tracker else 0)
+            | (_POLICY if self.hygiene_validator else 0)
+            | (_STATIC if self.static_checker else 0)
+            | (_COVERAGE if self.coverage_analyzer else 0)
+        )
+
+    def _collect_test(
+        self,
+        diff: str,
+        test_cmd: str,
+        summary: DiffSummary | None,
+        evidence: list[Evidence],
+    ) -> None:
+        if not (self.test_runner and test_cmd):
+            return
+        try:
+            result = self._run_tool(
+                "test", test_cmd, diff, lambda: self.test_runner(test_cmd)
+            )
+            evidence.append(Evidence.from_test_result(
+                command=test_cmd,
+                exit_code=result.get("exit_code", 1),
+                failing_tests=result.get("failing_tests", []),
+                passing_tests=result.get("passing_tests", []),
+                duration_ms=result.get("duration_ms", 0),
+            ))
+        except Exception as e:
+            logger.warning("Failed to run tests: %s", e)
+
+    def _collect_delta(
+        self,
+        diff: str,
+        test_cmd: str,
+        summary: DiffSummary | None,
+        evidence: list[Evidence],
+    ) -> None:
+        if not self.delta_tracker:
+            return
+        try:
+            # _collect_test runs first, so its result (if any) is evidence[0]
+            current_failing = set()
+            if evidence and evidence[0].type == EvidenceType.TEST_RESULT:
+                current_failing = set(evidence[0].data["failing_tests"])
+
+            fixed, regressed = self.delta_tracker.compute_delta(current_failing)
+            # TestDeltaTracker returns lists; one frozenset serves both uses
+            fixed = frozenset(fixed)
+            evidence.append(Evidence.from_delta_map(
+                fixed=list(fixed),
+                regressed=list(regressed),
+                still_failing=[t for t in current_failing if t not in fixed],
+            ))
+        except Exception as e:
+            logger.warning("Failed to compute delta: %s", e)
+
+    def _collect_policy(
+        self,
+        diff: str,
+        test_cmd: str,
+        summary: DiffSummary | None,
+        evidence: list[Evidence],
+    ) -> None:
+        if not (self.hygiene_validator and diff):
+            return
+        try:
+            result = self._run_tool("hygiene", "", diff, lambda: self.hygiene_validator(diff))
+            evidence.append(Evidence.from_policy_check(
+                is_valid=result.get("is_valid", False),
+                violations=result.get("violations", []),
+                diff_stats=result.get("diff_stats", {}),
+            ))
+        except Exception as e:
+            logger.warning("Failed hygiene check: %s", e)
+
+    def _collect_static(
+        self,
+        diff: str,
+        test_cmd: str,
+        summary: DiffSummary | None,
+        evidence: list[Evidence],
+    ) -> None:
+        if not self.static_checker:
+            return
+        try:
+            # Default to ruff
+            result = self._run_tool("static", "ruff", diff, lambda: self.static_checker("ruff"))
+            evidence.append(Evidence.from_static_check(
+                tool="ruff",
+                exit_code=result.get("exit_code", 1),
+                issues=result.get("issues", []),
+            ))
+        except Exception as e:
+            logger.warning("Failed static check: %s", e)
+
+    def _collect_coverage(
+        self,
+        diff: str,
+        test_cmd: str,
+        summary: DiffSummary | None,
+        evidence: list[Evidence],
+    ) -> None:
+        if not self.coverage_analyzer:
+            return
+        try:
+            if summary is None:
+                summary = DiffSummary.from_diff(diff)
+            report = self.coverage_analyzer.analyze_patch(list(summary.touched_files))
+            evidence.append(Evidence(
+                type=EvidenceType.COVERAGE_SIGNAL,
+                data=report.as_evidence_data(),
+            ))
+        except Exception as e:
+            logger.warning("Failed coverage analysis: %s", e)
+
     def collect_all(
         self,
         verdicts: list[ClaimVerdict],
         *,
         diff: str = "",
         test_cmd: str = "",
+        summary: DiffSummary | None = None,
     ) -> dict[str, list[Evidence]]:
         """Collect evidence for all challenged claims.
         
+        Verdicts that ask for the same kinds of evidence share one
+        collection, so e.g. the test command runs once however many
+        claims request test results.
+        
         Args:
             verdicts: List of verdicts (will collect for CHALLENGE only).
             diff: The patch diff.
             test_cmd: Test command.
+            summary: DiffSummary of diff, if the caller already has one.
         
         Returns:
             Dict of claim_id -> evidence list.
         """
         result: dict[str, list[Evidence]] = {}
+        if summary is None:
+            summary = DiffSummary.from_diff(diff)
+        by_kinds: dict[int, list[Evidence]] = {}
+        available = self._available_kinds()
 
         for verdict in verdicts:
             if verdict.verdict == Verdict.CHALLENGE:
-                evidence = self.collect_for_verdict(
-                    verdict,
-                    diff=diff,
-                    test_cmd=test_cmd,
-                )
-                result[verdict.claim_id] = evidence
+                # Requests differing only in unavailable kinds share a result
+                kinds = _classify_request((verdict.evidence_request or "").lower()) & available
+                shared = by_kinds.get(kinds)
+                if shared is None:
+                    # The first claim keeps the collected list itself
+                    shared = by_kinds[kinds] = self.collect_for_verdict(
+                        verdict,
+                        diff=diff,
+                        test_cmd=test_cmd,
+                        summary=summary,
+                    )
+                    result[verdict.claim_id] = shared
+                else:
+                    # Later claims get their own list of the same Evidence
+                    result[verdict.claim_id] = list(shared)
 
         return result
 
@@ -191,12 +353,12 @@ class EvidenceCollector:
         **kwargs,
     ) -> Evidence:
         """Helper to create test result evidence."""
-        return TestResultEvidence(
+        return Evidence.from_test_result(
             command=command,
             exit_code=exit_code,
             failing_tests=failing_tests,
             **kwargs,
-        ).to_evidence()
+        )
 
     def create_delta_map(
         self,
@@ -205,11 +367,7 @@ class EvidenceCollector:
         still_failing: list[str] | None = None,
     ) -> Evidence:
         """Helper to create delta map evidence."""
-        return DeltaMapEvidence(
-            fixed=fixed,
-            regressed=regressed,
-            still_failing=still_failing or [],
-        ).to_evidence()
+        return Evidence.from_delta_map(fixed, regressed, still_failing)
 
     def create_policy_check(
         self,
@@ -218,24 +376,21 @@ class EvidenceCollector:
         diff_stats: dict[str, int] | None = None,
     ) -> Evidence:
         """Helper to create policy check evidence."""
-        return PolicyCheckEvidence(
-            is_valid=is_valid,
-            violations=violations or [],
-            diff_stats=diff_stats or {},
-        ).to_evidence()
+        return Evidence.from_policy_check(is_valid, violations, diff_stats)
 
     def _parse_touched_files(self, diff: str) -> list[str]:
         """Parse touched file paths from a diff string."""
-        files = []
-        if not diff:
-            return files
-        for line in diff.splitlines():
-            if line.startswith('diff --git'):
-                # Extract filename from "diff --git a/foo.py b/foo.py"
-                parts = line.split()
-                if len(parts) >= 4:
-                    files.append(parts[3].lstrip('b/'))
-        return files
+        return list(DiffSummary.from_diff(diff).touched_files)
+
+
+# Evidence kind bit -> collector method; see collect_for_verdict
+_EVIDENCE_BUILDERS: dict[int, Callable[..., None]] = {
+    _TEST: EvidenceCollector._collect_test,
+    _DELTA: EvidenceCollector._collect_delta,
+    _POLICY: EvidenceCollector._collect_policy,
+    _STATIC: EvidenceCollector._collect_static,
+    _COVERAGE: EvidenceCollector._collect_coverage,
+}
 
 
 def create_evidence_collector(**kwargs) -> EvidenceCollector:
@@ -15,7 +15,7 @@ from .evidence_collector import EvidenceCollector
 from .qa_critic import QACritic
 from .qa_gate import GateDecision, QAGate
 from .qa_persistence import QAPersistence
-from .qa_types import Evidence, QAAttempt, Verdict
+from .qa_types import DiffSummary, Evidence, QAAttempt, Verdict
 
 logger = logging.getLogger(__name__)
 
@@ -128,8 +128,9 @@ class QAOrchestrator:
         import uuid
         attempt_id = attempt_id or str(uuid.uuid4())[:8]
 
-        # Parse diff for stats
-        diff_stats = self._parse_diff_stats(diff)
+        # Parse diff once for stats and evidence collection
+        summary = DiffSummary.from_diff(diff)
+        diff_stats = self._parse_diff_stats(summary)
 
         # Step 1: Extract claims
         context = PatchContext(
@@ -155,14 +156,16 @@ class QAOrchestrator:
         )
 
         # Step 3: Collect evidence for challenges
+        collected_by_claim = self.collector.collect_all(
+            verdicts,
+            diff=diff,
+            test_cmd=test_cmd,
+            summary=summary,
+        )
         evidence: list[Evidence] = []
         for verdict in verdicts:
             if verdict.verdict == Verdict.CHALLENGE:
-                collected = self.collector.collect_for_verdict(
-                    verdict,
-                    diff=diff,
-                    test_cmd=test_cmd,
-                )
+                collected = collected_by_claim[verdict.claim_id]
                 evidence.extend(collected)
 
                 # Re-evaluate with evidence
@@ -202,25 +205,16 @@ class QAOrchestrator:
             diff_stats=diff_stats,
         )
 
-    def _parse_diff_stats(self, diff: str) -> dict[str, Any]:
-        """Parse diff for statistics."""
-        if not diff:
-            return {"lines_changed": 0, "files_changed": 0, "touched_files": []}
-
-        lines = diff.splitlines()
-        changed_lines = sum(1 for line in lines if line.startswith('+') or line.startswith('-'))
-
-        files = set()
-        for line in lines:
-            if line.startswith('diff --git'):
-                parts = line.split()
-                if len(parts) >= 4:
-                    files.add(parts[3].lstrip('b/'))
-
+    def _parse_diff_stats(self, summary: DiffSummary) -> dict[str, Any]:
+        """Diff statistics in the shape claims, critic and persistence expect.
+        
+        lines_changed counts the +++/--- file headers too, as it always has;
+        the critic's size thresholds are calibrated against that count.
+        """
         return {
-            "lines_changed": changed_lines,
-            "files_changed": len(files),
-            "touched_files": list(files),
+            "lines_changed": summary.lines_changed + summary.header_lines,
+            "files_changed": len(summary.touched_files),
+            "touched_files": list(summary.touched_files),
         }
 
     def should_escalate_budget(self, result: "QAResult") -> bool:
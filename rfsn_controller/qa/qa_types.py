@@ -42,6 +42,70 @@ class Verdict(Enum):
     REJECT = "REJECT"      # Claim is likely false
 
 
+def _scan_git_headers(text: str) -> tuple[list[str], int, int]:
+    """Walk the "diff --git" file headers in text.
+    
+    Returns the new-side path of each file, and how many "+++ " and "--- "
+    lines belong to file headers. Those only count as headers between a
+    "diff --git" line and its first hunk; anywhere else they are content.
+    
+    text must start with a newline. Jumping between headers with str.find
+    is several times faster than a multiline regex over the whole diff.
+    """
+    paths = []
+    plus_headers = minus_headers = 0
+    find = text.find
+    i = find("\ndiff --git ")
+    while i != -1:
+        eol = find("\n", i + 1)
+        if eol == -1:
+            eol = len(text)
+        parts = text[i + 12:eol].split()
+        if len(parts) >= 2:
+            path = parts[1]
+            paths.append(path[2:] if path.startswith("b/") else path)
+        next_header = find("\ndiff --git ", eol)
+        block_end = len(text) if next_header == -1 else next_header
+        hunk = find("\n@@", eol, block_end)
+        if hunk != -1:
+            block_end = hunk
+        plus_headers += text.count("\n+++ ", eol, block_end)
+        minus_headers += text.count("\n--- ", eol, block_end)
+        i = next_header
+    return paths, plus_headers, minus_headers
+
+
+@dataclass(frozen=True)
+class DiffSummary:
+    """Facts about a patch diff, computed once and shared by the QA stages."""
+
+    raw: str
+    touched_files: tuple[str, ...] = ()
+    added_lines: int = 0
+    removed_lines: int = 0
+    # +++/--- file header lines, which are not counted as changes
+    header_lines: int = 0
+
+    @property
+    def lines_changed(self) -> int:
+        return self.added_lines + self.removed_lines
+
+    @classmethod
+    def from_diff(cls, diff: str) -> "DiffSummary":
+        if not diff:
+            return cls(raw="")
+        # str.count scans in C
+        text = "\n" + diff
+        paths, plus_headers, minus_headers = _scan_git_headers(text)
+        return cls(
+            raw=diff,
+            touched_files=tuple(dict.fromkeys(paths)),
+            added_lines=text.count("\n+") - plus_headers,
+            removed_lines=text.count("\n-") - minus_headers,
+            header_lines=plus_headers + minus_headers,
+        )
+
+
 @dataclass
 class Claim:
     """A claim made about a patch."""
@@ -72,7 +136,7 @@ class Claim:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class Evidence:
     """Evidence collected to support or refute a claim."""
 
@@ -92,8 +156,66 @@ class Evidence:
             data=d.get("data", {}),
         )
 
+    # Direct constructors, skipping the intermediate *Evidence object
 
-@dataclass
+    @classmethod
+    def from_test_result(
+        cls,
+        command: str,
+        exit_code: int,
+        failing_tests: list[str] | None = None,
+        passing_tests: list[str] | None = None,
+        duration_ms: int = 0,
+    ) -> "Evidence":
+        return cls(EvidenceType.TEST_RESULT, {
+            "command": command,
+            "exit_code": exit_code,
+            "failing_tests": failing_tests if failing_tests is not None else [],
+            "passing_tests": passing_tests if passing_tests is not None else [],
+            "duration_ms": duration_ms,
+        })
+
+    @classmethod
+    def from_delta_map(
+        cls,
+        fixed: list[str] | None = None,
+        regressed: list[str] | None = None,
+        still_failing: list[str] | None = None,
+    ) -> "Evidence":
+        return cls(EvidenceType.DELTA_MAP, {
+            "fixed": fixed if fixed is not None else [],
+            "regressed": regressed if regressed is not None else [],
+            "still_failing": still_failing if still_failing is not None else [],
+        })
+
+    @classmethod
+    def from_policy_check(
+        cls,
+        is_valid: bool,
+        violations: list[str] | None = None,
+        diff_stats: dict[str, int] | None = None,
+    ) -> "Evidence":
+        return cls(EvidenceType.POLICY_CHECK, {
+            "is_valid": is_valid,
+            "violations": violations if violations is not None else [],
+            "diff_stats": diff_stats if diff_stats is not None else {},
+        })
+
+    @classmethod
+    def from_static_check(
+        cls,
+        tool: str,
+        exit_code: int,
+        issues: list[dict[str, Any]] | None = None,
+    ) -> "Evidence":
+        return cls(EvidenceType.STATIC_CHECK, {
+            "tool": tool,
+            "exit_code": exit_code,
+            "issues": issues if issues is not None else [],
+        })
+
+
+@dataclass(slots=True)
 class TestResultEvidence:
     """Evidence from running tests."""
 
@@ -104,19 +226,16 @@ class TestResultEvidence:
     duration_ms: int = 0
 
     def to_evidence(self) -> Evidence:
-        return Evidence(
-            type=EvidenceType.TEST_RESULT,
-            data={
-                "command": self.command,
-                "exit_code": self.exit_code,
-                "failing_tests": self.failing_tests,
-                "passing_tests": self.passing_tests,
-                "duration_ms": self.duration_ms,
-            },
+        return Evidence.from_test_result(
+            self.command,
+            self.exit_code,
+            self.failing_tests,
+            self.passing_tests,
+            self.duration_ms,
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class DeltaMapEvidence:
     """Evidence from test delta comparison."""
 
@@ -125,14 +244,7 @@ class DeltaMapEvidence:
     still_failing: list[str] = field(default_factory=list)  # fail→fail
 
     def to_evidence(self) -> Evidence:
-        return Evidence(
-            type=EvidenceType.DELTA_MAP,
-            data={
-                "fixed": self.fixed,
-                "regressed": self.regressed,
-                "still_failing": self.still_failing,
-            },
-        )
+        return Evidence.from_delta_map(self.fixed, self.regressed, self.still_failing)
 
     @property
     def has_regressions(self) -> bool:
@@ -143,7 +255,7 @@ class DeltaMapEvidence:
         return len(self.fixed) > 0
 
 
-@dataclass
+@dataclass(slots=True)
 class PolicyCheckEvidence:
     """Evidence from hygiene/policy checks."""
 
@@ -152,17 +264,10 @@ class PolicyCheckEvidence:
     diff_stats: dict[str, int] = field(default_factory=dict)  # lines_added, lines_removed, files_changed
 
     def to_evidence(self) -> Evidence:
-        return Evidence(
-            type=EvidenceType.POLICY_CHECK,
-            data={
-                "is_valid": self.is_valid,
-                "violations": self.violations,
-                "diff_stats": self.diff_stats,
-            },
-        )
+        return Evidence.from_policy_check(self.is_valid, self.violations, self.diff_stats)
 
 
-@dataclass
+@dataclass(slots=True)
 class StaticCheckEvidence:
     """Evidence from static analysis tools."""
 
@@ -171,14 +276,7 @@ class StaticCheckEvidence:
     issues: list[dict[str, Any]] = field(default_factory=list)
 
     def to_evidence(self) -> Evidence:
-        return Evidence(
-            type=EvidenceType.STATIC_CHECK,
-            data={
-                "tool": self.tool,
-                "exit_code": self.exit_code,
-                "issues": self.issues,
-            },
-        )
+        return Evidence.from_static_check(self.tool, self.exit_code, self.issues)
 
 
 @dataclass
@@ -288,3 +288,70 @@ def rfsn_controller_path() -> Path:
 def project_root() -> Path:
     """Return the project root path."""
     return PROJECT_ROOT
+
+
+# =============================================================================
+# Agent Fixtures
+# =============================================================================
+
+@pytest.fixture
+def agent_profile() -> Callable[..., Any]:
+    """Factory for a small agent Profile; keyword arguments override fields.
+    
+    Usage:
+        def test_gate(agent_profile):
+            profile = agent_profile(max_diff_lines=5)
+    """
+    from agent.profiles import Profile
+    
+    def _create(**overrides: Any) -> Profile:
+        params = dict(
+            name="test",
+            max_rounds=10,
+            max_patch_attempts=10,
+            max_test_runs=10,
+            max_model_calls=10,
+            patch_candidates_per_round=1,
+            max_files_touched=3,
+            max_diff_lines=10,
+            test_stage_cap=1,
+            require_full_suite_for_finalize=False,
+            forbid_test_modifications=True,
+            require_citations_for_edits=False,
+            localization_top_k=5,
+            allow_vendor_edits=False,
+            allow_ci_edits=False,
+            enable_bandit=False,
+            enable_outcome_learning=False,
+        )
+        params.update(overrides)
+        return Profile(**params)
+    
+    return _create
+
+
+@pytest.fixture
+def agent_state(tmp_path: Path) -> Callable[..., Any]:
+    """Factory for an AgentState whose workdir defaults to tmp_path.
+    
+    Usage:
+        def test_loop(agent_state):
+            state = agent_state(phase=Phase.LOCALIZE, max_rounds=5)
+    """
+    from agent.types import AgentState, BudgetState, Phase, RepoFingerprint
+    
+    def _create(
+        phase: Phase = Phase.PATCH_CANDIDATES,
+        max_rounds: int = 10,
+        workdir: Path | str = tmp_path,
+        **kwargs: Any,
+    ) -> AgentState:
+        return AgentState(
+            task_id="task",
+            repo=RepoFingerprint(repo_id="repo", commit_sha="abc", workdir=str(workdir)),
+            phase=phase,
+            budget=BudgetState(max_rounds=max_rounds),
+            **kwargs,
+        )
+    
+    return _create
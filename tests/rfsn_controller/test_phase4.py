@@ -201,6 +201,34 @@ class TestStrategyBandit:
         strategy = bandit.select("ctx1", exclude={"a", "b"})
         assert strategy == "c"
 
+    def test_strategies_for_error_matches_linear_scan(self):
+        """Test the keyword index agrees with matches_error on every strategy."""
+        from rfsn_controller.learning import strategies_for_error
+        from rfsn_controller.learning.strategies import ALL_STRATEGIES
+
+        for error in [
+            "AttributeError: 'NoneType' object has no attribute 'x'",
+            "KeyError: 'missing'",
+            "ZeroDivisionError: division by zero",
+            "bad %d in re.sub call",
+            "nothing relevant",
+        ]:
+            expected = sorted(
+                (s for s in ALL_STRATEGIES if s.matches_error(error)),
+                key=lambda s: s.priority,
+                reverse=True,
+            )
+            assert strategies_for_error(error) == expected
+
+    def test_defensive_strategies_returns_a_copy(self):
+        """Test mutating the returned list leaves the registry intact."""
+        from rfsn_controller.learning.strategies import defensive_strategies
+
+        first = defensive_strategies()
+        assert first and all(s.is_defensive for s in first)
+        first.clear()
+        assert defensive_strategies()
+
 
 # ============================================================================
 # QUARANTINE TESTS
@@ -245,6 +273,69 @@ class TestQuarantine:
         
         # Now regression rate is 2/5 = 40%, just under threshold - still ok
         assert not lane.is_quarantined("test_strategy", "ctx1")
+
+    def test_lane_cached_verdict_matches_is_quarantined(self):
+        """Test the cached verdict agrees with the free function."""
+        from rfsn_controller.learning import QuarantineLane, is_quarantined
+
+        lane = QuarantineLane()
+        outcomes = [(True, False), (False, True), (True, False), (False, True), (False, True)]
+        for success, regression in outcomes:
+            lane.record_outcome("s", "ctx", success=success, regression=regression)
+            stats = lane._stats[("ctx", "s")]
+            expected = is_quarantined(
+                {"tries": stats.total_tries, "wins": stats.successes, "regressions": stats.regressions}
+            )
+            assert is_quarantined(stats) is expected
+            assert lane.is_quarantined("s", "ctx") is expected
+            assert ("s" in lane.get_quarantined_strategies("ctx")) is expected
+
+        assert not lane.is_quarantined("unknown", "ctx")
+        assert not lane.is_quarantined("s", "other")
+
+    def test_lane_persists_on_flush(self, tmp_path):
+        """Test the writer thread has stored all outcomes once flush returns."""
+        from rfsn_controller.learning import QuarantineLane
+        
+        db_path = str(tmp_path / "quarantine.db")
+        lane = QuarantineLane(db_path=db_path)
+        lane.record_outcome("s", "ctx1", success=True)
+        lane.record_outcome("s", "ctx1", success=False, regression=True)
+        
+        lane.flush()
+        summary = QuarantineLane(db_path=db_path).get_stats_summary("ctx1")
+        assert summary[0]["tries"] == 2
+        assert summary[0]["regressions"] == 1
+
+    def test_lane_close_writes_pending_outcomes(self, tmp_path):
+        """Test close drains the write queue and stops the writer."""
+        from rfsn_controller.learning import QuarantineLane
+
+        db_path = str(tmp_path / "quarantine.db")
+        lane = QuarantineLane(db_path=db_path)
+        for _ in range(3):
+            lane.record_outcome("s", "ctx1", success=True)
+        lane.close()
+        lane.close()
+
+        # Recording after close still updates memory, just not the database
+        lane.record_outcome("s", "ctx1", success=True)
+        summary = QuarantineLane(db_path=db_path).get_stats_summary("ctx1")
+        assert summary[0]["tries"] == 3
+    
+    def test_closed_lane_is_released(self, tmp_path):
+        """Test close drops the atexit hook so the lane can be collected."""
+        import gc
+        import weakref
+
+        from rfsn_controller.learning import QuarantineLane
+
+        lane = QuarantineLane(db_path=str(tmp_path / "quarantine.db"))
+        ref = weakref.ref(lane)
+        lane.close()
+        del lane
+        gc.collect()
+        assert ref() is None
     
     def test_force_quarantine(self):
         """Test force quarantine."""
@@ -255,6 +346,19 @@ class TestQuarantine:
         
         assert lane.is_quarantined("bad_strategy")
 
+    def test_quarantined_set_is_a_snapshot(self):
+        """Test later quarantine changes don't alter a returned set."""
+        from rfsn_controller.learning import QuarantineLane
+
+        lane = QuarantineLane()
+        lane.force_quarantine("a")
+        before = lane.get_quarantined_strategies()
+        lane.force_quarantine("b")
+        lane.release_from_quarantine("a")
+
+        assert before == {"a"}
+        assert lane.get_quarantined_strategies() == {"b"}
+
 
 # ============================================================================
 # LEARNED STRATEGY SELECTOR TESTS
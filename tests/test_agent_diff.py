@@ -0,0 +1,101 @@
+"""Tests for the SWE-bench agent's diff parsing and validation."""
+
+import pytest
+
+pytest.importorskip("yaml")
+
+from agent.deepseek_agent import (
+    _parse_diff,
+    _repair_patch,
+    _try_structured_edit,
+    _validate_patch,
+)
+from agent.types import Proposal
+
+
+DIFF = (
+    "--- a/pkg/core.py\n"
+    "+++ b/pkg/core.py\n"
+    "@@ -1,2 +1,2 @@\n"
+    " def compare(x, y):\n"
+    "-    return x == y\n"
+    "+    return x is y\n"
+)
+
+
+class TestParseDiff:
+    """Test single-pass diff classification."""
+
+    def test_classifies_lines(self):
+        parsed = _parse_diff(DIFF)
+        assert parsed.files == ["pkg/core.py"]
+        assert parsed.current_file == "pkg/core.py"
+        assert parsed.removals == ["    return x == y"]
+        assert parsed.additions == ["    return x is y"]
+        assert not parsed.headers_present
+
+    def test_detects_git_header(self):
+        parsed = _parse_diff("diff --git a/pkg/core.py b/pkg/core.py\n" + DIFF)
+        assert parsed.headers_present
+        assert parsed.files == ["pkg/core.py"]
+
+    def test_new_file(self):
+        diff = "--- /dev/null\n+++ b/pkg/new.py\n@@ -0,0 +1 @@\n+x = 1\n"
+        parsed = _parse_diff(diff)
+        assert parsed.files == ["pkg/new.py"]
+        assert parsed.additions == ["x = 1"]
+        assert parsed.removals == []
+
+
+class TestValidatePatch:
+    """Test change detection on parsed diffs."""
+
+    def test_accepts_real_change(self):
+        assert _validate_patch(_parse_diff(DIFF)) == (True, "")
+
+    def test_rejects_empty_diff(self):
+        assert _validate_patch(_parse_diff("  \n")) == (False, "Empty diff")
+
+    def test_rejects_noop(self):
+        diff = "--- a/x.py\n+++ b/x.py\n-same\n+same\n"
+        ok, error = _validate_patch(_parse_diff(diff))
+        assert not ok
+        assert "No-op" in error
+
+
+class TestRepairPatch:
+    """Test patch header repair."""
+
+    def test_adds_missing_git_header(self):
+        repaired = _repair_patch(_parse_diff(DIFF))
+        assert repaired.startswith("diff --git a/pkg/core.py b/pkg/core.py\n--- a/pkg/core.py")
+        assert repaired.endswith("\n")
+
+
+class TestStructuredEdit:
+    """Test the SEARCH/REPLACE fallback for diffs that don't apply."""
+
+    @pytest.fixture
+    def run_edit(self, tmp_path, agent_state):
+        """Apply diff to an f.py holding source; return (result, new text)."""
+        def _run(source, diff):
+            (tmp_path / "f.py").write_text(source)
+            proposal = Proposal(kind="edit", rationale="fix", inputs={"files": ["f.py"]})
+            result = _try_structured_edit(agent_state(), proposal, _parse_diff(diff))
+            return result, (tmp_path / "f.py").read_text()
+
+        return _run
+
+    def test_fuzzy_match_preserves_indentation(self, run_edit):
+        source = "def f():\n    x = 10\n    x = 1\n    return x\n"
+        diff = "--- a/f.py\n+++ b/f.py\n@@ -1 +1 @@\n-x = 1\n+x = 2\n-return   x\n"
+        result, text = run_edit(source, diff)
+        assert result.status == "ok"
+        assert text == "def f():\n    x = 10\n    x = 2\n    return x\n"
+
+    def test_duplicate_removals_consume_successive_lines(self, run_edit):
+        source = "a = 1\n  pass\nb = 2\n  pass\n"
+        diff = "--- a/f.py\n+++ b/f.py\n@@ -1 +1 @@\n-pass \n-pass \n+return\n"
+        result, text = run_edit(source, diff)
+        assert result.status == "ok"
+        assert text == "a = 1\n  return\nb = 2\n  return\n"
@@ -0,0 +1,62 @@
+"""Tests for the SWE-bench agent gate."""
+
+import pytest
+
+pytest.importorskip("yaml")
+
+from agent.deepseek_agent import _scan_diff, gate
+from agent.types import Proposal
+
+
+def _edit(files, diff="--- a/x.py\n+++ b/x.py\n-a\n+b\n") -> Proposal:
+    return Proposal(kind="edit", rationale="fix", inputs={"files": files, "diff": diff})
+
+
+class TestScanDiff:
+    """Test the single-pass diff scanner."""
+
+    def test_collects_files_and_counts_changes(self):
+        diff = "--- a/pkg/x.py\n+++ b/pkg/x.py\n@@ -1,2 +1,2 @@\n ctx\n-old\n+new\n"
+        files, changed, forbidden = _scan_diff(diff)
+        assert files == {"pkg/x.py"}
+        assert changed == 2
+        assert forbidden is None
+
+    def test_reports_forbidden_directory(self):
+        diff = "--- a/lib/vendor/x.py\n+++ b/lib/vendor/x.py\n-a\n+b"
+        _, _, forbidden = _scan_diff(diff)
+        assert forbidden == "vendor/"
+
+
+class TestGate:
+    """Test gate decisions for edit proposals."""
+
+    def test_accepts_source_edit(self, agent_profile, agent_state):
+        assert gate(agent_profile(), agent_state(), _edit(["pkg/core.py"])).accept
+
+    def test_rejects_forbidden_directory(self, agent_profile, agent_state):
+        decision = gate(agent_profile(), agent_state(), _edit(["node_modules/x.js"]))
+        assert not decision.accept
+        assert "node_modules/" in decision.reason
+
+    @pytest.mark.parametrize("path", [
+        "tests/test_core.py",
+        "pkg/tests/helpers.py",
+        "pkg/test_core.py",
+        "pkg/core_test.py",
+        "conftest.py",
+    ])
+    def test_rejects_test_files(self, path, agent_profile, agent_state):
+        decision = gate(agent_profile(), agent_state(), _edit([path]))
+        assert not decision.accept
+        assert "Test modification forbidden" in decision.reason
+
+    @pytest.mark.parametrize("path", ["src/_pytest/main.py", "pkg/latest.py"])
+    def test_source_files_mentioning_test_are_allowed(self, path, agent_profile, agent_state):
+        assert gate(agent_profile(), agent_state(), _edit([path])).accept
+
+    def test_rejects_large_diff(self, agent_profile, agent_state):
+        diff = "--- a/x.py\n+++ b/x.py\n" + "+line\n" * 11
+        decision = gate(agent_profile(), agent_state(), _edit(["x.py"], diff))
+        assert not decision.accept
+        assert "Diff too large" in decision.reason
@@ -0,0 +1,86 @@
+"""Tests for the agent episode loop and its ledger writes."""
+
+import json
+import threading
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("yaml")
+
+from agent import loop
+from agent.loop import flush_ledger, queue_event, run_episode
+from agent.types import ExecResult, GateDecision, Phase, Proposal
+from memory.log import append_events, read_ledger
+
+
+class TestLedger:
+    """Test ledger writes from the episode loop."""
+
+    def test_append_events_writes_in_order(self, agent_state):
+        state = agent_state(phase=Phase.LOCALIZE)
+        append_events(state, [{"event": "a"}, {"event": "b"}])
+        events = read_ledger(state.notes["run_dir"])
+        assert [e["event"] for e in events] == ["a", "b"]
+
+    def test_episode_ledger_is_complete_on_return(self, agent_profile, agent_state):
+        state = agent_state(phase=Phase.LOCALIZE, max_rounds=5)
+        calls = []
+
+        def propose(profile, state):
+            calls.append(len(calls) + 1)
+            return Proposal(kind="search", rationale=f"r{len(calls)}", inputs={"query": "x"})
+
+        def gate(profile, state, proposal):
+            # Reject every other proposal so both event paths are exercised
+            return GateDecision(accept=len(calls) % 2 == 0, reason="no")
+
+        def execute(profile, state, proposal):
+            return ExecResult(status="ok", summary="ok")
+
+        final = run_episode(agent_profile(max_rounds=5), state, propose, gate, execute)
+
+        lines = (Path(final.notes["run_dir"]) / "events.jsonl").read_text().splitlines()
+        rationales = [json.loads(line)["proposal"]["rationale"] for line in lines]
+        assert rationales == ["r1", "r2", "r3", "r4", "r5"]
+
+    def test_flush_waits_only_for_own_events(self, agent_state, tmp_path, monkeypatch):
+        state_a = agent_state(workdir=tmp_path / "a")
+        state_b = agent_state(workdir=tmp_path / "b")
+        release = threading.Event()
+        append = loop.append_events
+
+        def slow_append(state, events):
+            if state is state_b:
+                release.wait(5)
+            append(state, events)
+
+        monkeypatch.setattr(loop, "append_events", slow_append)
+        queue_event(state_a, {"event": "a"})
+        queue_event(state_b, {"event": "b"})
+
+        waiter = threading.Thread(target=flush_ledger, args=(state_a,))
+        waiter.start()
+        waiter.join(2)
+        try:
+            assert not waiter.is_alive()
+            assert [e["event"] for e in read_ledger(state_a.notes["run_dir"])] == ["a"]
+        finally:
+            release.set()
+            flush_ledger(state_b)
+
+
+class TestTouchedFiles:
+    """Test incremental tracking of edited files."""
+
+    def test_add_touched_files_keeps_sorted_unique_list(self, agent_state):
+        state = agent_state()
+        state.add_touched_files(["b.py", "a.py"])
+        state.add_touched_files(["a.py"])
+        state.add_touched_files(["c.py", "b.py"])
+        assert state.touched_files == ["a.py", "b.py", "c.py"]
+
+    def test_seeded_from_constructor(self, agent_state):
+        state = agent_state(touched_files=["x.py"])
+        state.add_touched_files(["x.py"])
+        assert state.touched_files == ["x.py"]
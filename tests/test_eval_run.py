@@ -0,0 +1,212 @@
+"""Tests for the SWE-bench evaluation runner (eval/run.py)."""
+
+import asyncio
+import json
+from dataclasses import replace
+
+import pytest
+
+from agent.types import Phase
+from eval import run as eval_run
+from eval.run import EvalConfig, EvalResult, EvalRunner, SWEBenchTask
+
+
+def _task(**overrides):
+    params = dict(
+        task_id="demo__demo-1",
+        repo="demo/demo",
+        base_commit="abc123",
+        problem_statement="fix the bug",
+        test_patch="diff --git a/t.py b/t.py\n",
+    )
+    params.update(overrides)
+    return SWEBenchTask(**params)
+
+
+def _result(**overrides):
+    params = dict(
+        task_id="demo__demo-1",
+        success=True,
+        resolution_time=1.5,
+        steps_taken=3,
+        patches_tried=1,
+        tests_passed=4,
+        tests_failed=0,
+    )
+    params.update(overrides)
+    return EvalResult(**params)
+
+
+class TestCompactDict:
+    """to_compact_dict() keeps required fields and drops defaults."""
+
+    def test_task_defaults_are_left_out(self):
+        task = _task()
+        assert task.to_compact_dict() == {
+            "task_id": "demo__demo-1",
+            "repo": "demo/demo",
+            "base_commit": "abc123",
+            "problem_statement": "fix the bug",
+            "test_patch": "diff --git a/t.py b/t.py\n",
+        }
+
+    def test_task_set_fields_are_kept(self):
+        task = _task(hints_text="look at t.py", version="2.0", instance_id="x")
+        data = task.to_compact_dict()
+        assert data["hints_text"] == "look at t.py"
+        assert data["version"] == "2.0"
+        assert data["instance_id"] == "x"
+        assert "created_at" not in data
+
+    def test_task_derived_repo_id_is_excluded(self):
+        task = _task()
+        assert task.repo_id == "demo/demo@abc123"
+        assert "repo_id" not in task.to_compact_dict()
+        assert SWEBenchTask(**task.to_compact_dict()) == task
+
+    def test_result_default_fields_are_left_out(self):
+        data = _result().to_compact_dict()
+        assert data == {
+            "task_id": "demo__demo-1",
+            "success": True,
+            "resolution_time": 1.5,
+            "steps_taken": 3,
+            "patches_tried": 1,
+            "tests_passed": 4,
+            "tests_failed": 0,
+        }
+
+    def test_result_history_fields_default_to_fresh_lists(self):
+        a, b = _result(), _result()
+        a.patch_history.append({"diff": "x"})
+        assert b.patch_history == []
+        assert a.to_dict()["test_history"] == []
+
+    def test_result_empty_lists_are_left_out(self):
+        data = _result(patch_history=[], test_history=[{"ok": True}]).to_compact_dict()
+        assert "patch_history" not in data
+        assert data["test_history"] == [{"ok": True}]
+
+    def test_result_set_fields_are_kept(self):
+        result = _result(success=False, error_message="boom", llm_calls=2)
+        data = result.to_compact_dict()
+        assert data["success"] is False
+        assert data["error_message"] == "boom"
+        assert data["llm_calls"] == 2
+        assert "llm_tokens" not in data
+        assert EvalResult(**data) == result
+
+
+class TestResultCache:
+    """run_task() reuses solved results of identical earlier runs."""
+
+    @pytest.fixture
+    def runner_factory(self, tmp_path, monkeypatch, agent_profile):
+        """Build runners whose checkout and agent episode are faked."""
+        monkeypatch.setattr(eval_run, "_load_profile_cached", lambda name: agent_profile())
+        episodes = []
+        outcome = {"solved": True}
+
+        def fake_run_episode(profile, state, **kwargs):
+            episodes.append(state.task_id)
+            state.notes["solved"] = outcome["solved"]
+            return replace(state, phase=Phase.DONE)
+
+        async def fake_setup_repo(self, task, workdir):
+            workdir.mkdir(parents=True, exist_ok=True)
+            return True
+
+        monkeypatch.setattr(eval_run, "run_episode", fake_run_episode)
+        monkeypatch.setattr(EvalRunner, "setup_repo", fake_setup_repo)
+
+        def _create(**config_overrides):
+            params = dict(
+                work_dir=tmp_path / "work",
+                results_dir=tmp_path / "results",
+                cache_dir=tmp_path / "cache",
+            )
+            params.update(config_overrides)
+            return EvalRunner(EvalConfig(**params))
+
+        _create.episodes = episodes
+        _create.outcome = outcome
+        return _create
+
+    def test_miss_then_hit(self, runner_factory):
+        runner = runner_factory()
+        task = _task()
+        first = asyncio.run(runner.run_task(task))
+        assert first.success
+        assert runner_factory.episodes == [task.task_id]
+
+        second = asyncio.run(runner_factory().run_task(task))
+        assert runner_factory.episodes == [task.task_id]
+        assert second == first
+
+    def test_force_rerun_ignores_cache(self, runner_factory):
+        task = _task()
+        asyncio.run(runner_factory().run_task(task))
+        asyncio.run(runner_factory(force_rerun=True).run_task(task))
+        assert len(runner_factory.episodes) == 2
+        # The forced run refreshed the entry, so a normal run still hits
+        asyncio.run(runner_factory().run_task(task))
+        assert len(runner_factory.episodes) == 2
+
+    def test_failures_are_not_cached(self, runner_factory):
+        runner_factory.outcome["solved"] = False
+        task = _task()
+        runner = runner_factory()
+        assert not asyncio.run(runner.run_task(task)).success
+        assert not runner._result_cache_file(task).exists()
+        asyncio.run(runner.run_task(task))
+        assert len(runner_factory.episodes) == 2
+
+    def test_different_inputs_miss(self, runner_factory):
+        asyncio.run(runner_factory().run_task(_task()))
+        asyncio.run(runner_factory().run_task(_task(problem_statement="another bug")))
+        assert len(runner_factory.episodes) == 2
+
+    def test_key_covers_agent_version(self, runner_factory, monkeypatch):
+        runner = runner_factory()
+        task = _task()
+        before = runner._result_cache_file(task)
+        monkeypatch.setattr(eval_run, "_agent_version", lambda: "other")
+        assert runner._result_cache_file(task) != before
+
+    def test_agent_version_covers_every_agent_module(self, monkeypatch, tmp_path):
+        import agent
+
+        pkg = tmp_path / "agent"
+        pkg.mkdir()
+        for name in ("__init__.py", "loop.py", "deepseek_agent.py"):
+            (pkg / name).write_text(f"# {name}\n")
+        monkeypatch.setattr(agent, "__file__", str(pkg / "__init__.py"))
+        eval_run._agent_version.cache_clear()
+        try:
+            before = eval_run._agent_version()
+            (pkg / "loop.py").write_text("# changed\n")
+            eval_run._agent_version.cache_clear()
+            assert eval_run._agent_version() != before
+        finally:
+            eval_run._agent_version.cache_clear()
+
+    def test_task_events_are_on_disk_when_run_task_returns(self, runner_factory, tmp_path):
+        asyncio.run(runner_factory().run_task(_task()))
+        (ledger,) = tmp_path.rglob("events.jsonl")
+        events = [json.loads(line)["event"] for line in ledger.read_text().splitlines()]
+        assert events == ["task_start", "task_complete"]
+
+    def test_ledger_survives_tmpfs_workdir_release(self, runner_factory, tmp_path):
+        runner = runner_factory()
+        runner._workdir_on_tmpfs = True
+        task = _task()
+        asyncio.run(runner.run_task(task))
+        assert not (tmp_path / "work" / task.task_id).exists()
+        ledger = tmp_path / "results" / "runs" / task.task_id / "events.jsonl"
+        assert ledger.read_text().count("\n") == 2
+
+    def test_unreadable_entry_is_a_miss(self, tmp_path):
+        path = tmp_path / "bad.json"
+        path.write_text("{not json")
+        assert eval_run._read_cached_result(path) is None
+        assert eval_run._read_cached_result(tmp_path / "missing.json") is None
@@ -0,0 +1,168 @@
+"""Tests for the agent's LLM response cache."""
+
+import os
+import time
+
+import pytest
+
+from agent import llm_cache
+from agent.llm_cache import (
+    FileCache,
+    LFUCache,
+    cache_stats,
+    cached_call_model,
+    clear_cache,
+    configure_disk_cache,
+)
+
+
+@pytest.fixture(autouse=True)
+def reset_cache(monkeypatch):
+    """Start every test with an empty cache and no disk tier."""
+    monkeypatch.setattr(llm_cache, "_disk_cache", None)
+    monkeypatch.setattr(llm_cache, "_disk_configured", True)
+    clear_cache()
+    yield
+    clear_cache()
+
+
+class TestLFUCache:
+    """Test the bounded LFU structure."""
+
+    def test_get_put(self):
+        cache = LFUCache(maxsize=4)
+        cache.put("a", 1)
+        assert cache.get("a") == 1
+        assert cache.get("missing") is None
+        assert "a" in cache
+        assert len(cache) == 1
+
+    def test_evicts_least_frequently_used(self):
+        cache = LFUCache(maxsize=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        assert "a" in cache
+        assert "b" not in cache
+        assert "c" in cache
+
+    def test_ties_evict_oldest(self):
+        cache = LFUCache(maxsize=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.put("c", 3)
+        assert "a" not in cache
+        assert len(cache) == 2
+
+
+class TestFileCache:
+    """Test the on-disk cache tier."""
+
+    def test_set_get_roundtrip(self, tmp_path):
+        cache = FileCache(tmp_path)
+        cache.set("abcdef", {"mode": "patch", "diff": "x"})
+        assert (tmp_path / "ab" / "abcdef.json").exists()
+        assert cache.get("abcdef") == {"mode": "patch", "diff": "x"}
+        assert cache.get("missing") is None
+
+    def test_expired_entries_are_dropped(self, tmp_path):
+        cache = FileCache(tmp_path, ttl=60)
+        cache.set("abcdef", {"mode": "patch"})
+        old = time.time() - 120
+        os.utime(tmp_path / "ab" / "abcdef.json", (old, old))
+        assert cache.get("abcdef") is None
+        assert not (tmp_path / "ab" / "abcdef.json").exists()
+
+    def test_evict_trims_least_recently_used(self, tmp_path):
+        cache = FileCache(tmp_path, max_bytes=120)
+        now = time.time()
+        for i, key in enumerate(["aa1", "bb2", "cc3"]):
+            cache.set(key, {"text": "x" * 40})
+            stamp = now - 10 + i
+            os.utime(tmp_path / key[:2] / f"{key}.json", (stamp, stamp))
+        assert cache.evict() == 1
+        assert cache.get("aa1") is None
+        assert cache.get("cc3") is not None
+
+
+class TestCachedCallModel:
+    """Test memoization of model calls."""
+
+    def test_deterministic_calls_are_cached(self):
+        calls = []
+
+        def fake_call(prompt, temperature=0.0):
+            calls.append(prompt)
+            return {"mode": "tool_request", "requests": []}
+
+        first = cached_call_model("prompt", 0.0, fake_call)
+        second = cached_call_model("prompt", 0.0, fake_call)
+
+        assert first == second
+        assert calls == ["prompt"]
+        assert cache_stats()["hits"] == 1
+        assert cache_stats()["misses"] == 1
+
+    def test_sampled_calls_bypass_cache(self):
+        calls = []
+
+        def fake_call(prompt, temperature=0.0):
+            calls.append(temperature)
+            return {"mode": "tool_request", "requests": []}
+
+        cached_call_model("prompt", 0.3, fake_call)
+        cached_call_model("prompt", 0.3, fake_call)
+
+        assert calls == [0.3, 0.3]
+        assert cache_stats()["size"] == 0
+
+    def test_errors_are_not_cached(self):
+        def failing_call(prompt, temperature=0.0):
+            raise RuntimeError("network down")
+
+        with pytest.raises(RuntimeError):
+            cached_call_model("prompt", 0.0, failing_call)
+        assert len(llm_cache._cache) == 0
+
+    def test_disk_hits_survive_memory_reset(self, tmp_path):
+        configure_disk_cache(tmp_path)
+        calls = []
+
+        def fake_call(prompt, temperature=0.0):
+            calls.append(prompt)
+            return {"mode": "tool_request", "requests": []}
+
+        cached_call_model("prompt", 0.0, fake_call)
+        clear_cache()
+        assert cached_call_model("prompt", 0.0, fake_call) == {"mode": "tool_request", "requests": []}
+        assert calls == ["prompt"]
+        assert cache_stats()["disk_hits"] == 1
+        assert cache_stats()["size"] == 1
+
+    def test_disk_tier_defers_to_client_cache(self, monkeypatch):
+        monkeypatch.setattr(llm_cache, "_disk_configured", False)
+        monkeypatch.delenv("RFSN_AGENT_LLM_CACHE", raising=False)
+        monkeypatch.setenv("RFSN_LLM_CACHE", "1")
+        assert llm_cache._get_disk_cache() is None
+
+    def test_stub_client_responses_are_not_cached(
+        self, monkeypatch, tmp_path, agent_profile, agent_state
+    ):
+        pytest.importorskip("yaml")
+        from agent import deepseek_agent
+        from agent.types import Phase
+
+        configure_disk_cache(tmp_path)
+        monkeypatch.setattr(deepseek_agent, "HAS_DEEPSEEK", False)
+        monkeypatch.setattr(deepseek_agent, "_build_prompt", lambda profile, state: "prompt")
+        monkeypatch.setattr(
+            deepseek_agent,
+            "call_model",
+            lambda prompt, temperature=0.0: {"mode": "tool_request", "requests": []},
+        )
+        state = agent_state(phase=Phase.LOCALIZE, max_rounds=5)
+        deepseek_agent.propose(agent_profile(), state)
+
+        assert cache_stats()["size"] == 0
+        assert not list(tmp_path.glob("*/*.json"))
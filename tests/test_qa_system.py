@@ -189,6 +189,168 @@ class TestQAGate:
         assert "scope_minimality_escalation" in decision.escalation_tags
 
 
+class TestEvidenceCollector:
+    """Tests for evidence collector helpers."""
+
+    def test_parse_touched_files(self):
+        """Only the b/ prefix is stripped from diff headers."""
+        from rfsn_controller.qa.evidence_collector import EvidenceCollector
+
+        diff = (
+            "diff --git a/bar.py b/bar.py\n"
+            "--- a/bar.py\n"
+            "+++ b/bar.py\n"
+            "diff --git a/pkg/b/x.py b/pkg/b/x.py\n"
+        )
+        collector = EvidenceCollector()
+        assert collector._parse_touched_files(diff) == ["bar.py", "pkg/b/x.py"]
+        assert collector._parse_touched_files("") == []
+
+    def test_collect_all_runs_tests_once_per_request_kind(self):
+        """Claims asking for the same evidence share one test run."""
+        from rfsn_controller.qa import ClaimVerdict, EvidenceCollector, Verdict
+
+        calls = []
+
+        def runner(cmd):
+            calls.append(cmd)
+            return {"exit_code": 0, "failing_tests": []}
+
+        collector = EvidenceCollector(test_runner=runner)
+        verdicts = [
+            ClaimVerdict("C1", Verdict.CHALLENGE, "?", evidence_request="test_result"),
+            ClaimVerdict("C2", Verdict.CHALLENGE, "?", evidence_request="TEST_RESULT"),
+        ]
+        result = collector.collect_all(verdicts, test_cmd="pytest")
+        assert calls == ["pytest"]
+        assert result["C1"] == result["C2"]
+        assert result["C1"] is not result["C2"]
+
+    def test_tool_results_reused_for_same_diff(self):
+        """A repeated diff and test command reuse the earlier test run."""
+        from rfsn_controller.qa import ClaimVerdict, EvidenceCollector, Verdict
+
+        calls = []
+
+        def runner(cmd):
+            calls.append(cmd)
+            return {"exit_code": 0, "failing_tests": []}
+
+        collector = EvidenceCollector(test_runner=runner)
+        verdicts = [ClaimVerdict("C1", Verdict.CHALLENGE, "?", evidence_request="test")]
+        collector.collect_all(verdicts, diff="--- a\n+++ b\n+x\n", test_cmd="pytest")
+        collector.collect_all(verdicts, diff="--- a\n+++ b\n+x\n", test_cmd="pytest")
+        assert len(calls) == 1
+        collector.collect_all(verdicts, diff="--- a\n+++ b\n+y\n", test_cmd="pytest")
+        assert len(calls) == 2
+
+    def test_empty_diff_is_never_served_from_cache(self):
+        """Without a diff, each check runs the tool against the current tree."""
+        from rfsn_controller.qa import ClaimVerdict, EvidenceCollector, Verdict
+
+        calls = []
+
+        def runner(cmd):
+            calls.append(cmd)
+            return {"exit_code": 0, "failing_tests": []}
+
+        collector = EvidenceCollector(test_runner=runner)
+        verdict = ClaimVerdict("C1", Verdict.CHALLENGE, "?", evidence_request="test")
+        collector.collect_for_verdict(verdict, test_cmd="pytest")
+        collector.collect_for_verdict(verdict, test_cmd="pytest")
+        assert len(calls) == 2
+
+    def test_runner_errors_are_not_reused(self):
+        """A timed-out or crashed test run is re-run on the next check."""
+        from rfsn_controller.qa import ClaimVerdict, EvidenceCollector, Verdict
+
+        calls = []
+
+        def runner(cmd):
+            calls.append(cmd)
+            if len(calls) == 1:
+                return {"exit_code": -1, "timed_out": True, "failing_tests": []}
+            return {"exit_code": 1, "failing_tests": ["test_x"]}
+
+        collector = EvidenceCollector(test_runner=runner)
+        verdicts = [ClaimVerdict("C1", Verdict.CHALLENGE, "?", evidence_request="test")]
+        diff = "--- a\n+++ b\n+x\n"
+        for _ in range(3):
+            collector.collect_all(verdicts, diff=diff, test_cmd="pytest")
+        # The timeout is retried; the genuine failure that follows is reused.
+        assert len(calls) == 2
+
+    def test_delta_with_test_delta_tracker(self):
+        """Delta evidence works with the list-returning TestDeltaTracker."""
+        from rfsn_controller.qa import ClaimVerdict, EvidenceCollector, Verdict
+        from rfsn_controller.verifier import TestDeltaTracker
+
+        collector = EvidenceCollector(
+            test_runner=lambda cmd: {"exit_code": 1, "failing_tests": ["t_b", "t_c"]},
+            delta_tracker=TestDeltaTracker({"t_a", "t_b"}),
+        )
+        verdict = ClaimVerdict("C1", Verdict.CHALLENGE, "?", evidence_request="test delta")
+        _, delta = collector.collect_for_verdict(verdict, test_cmd="pytest")
+        assert delta.data["fixed"] == ["t_a"]
+        assert delta.data["regressed"] == ["t_c"]
+
+    def test_diff_summary_excludes_file_headers(self):
+        """Added/removed counts skip the +++/--- lines."""
+        from rfsn_controller.qa import DiffSummary
+
+        summary = DiffSummary.from_diff(
+            "diff --git a/f.py b/f.py\n"
+            "--- a/f.py\n"
+            "+++ b/f.py\n"
+            "@@ -1 +1,2 @@\n"
+            "-x = 1\n"
+            "+x = 2\n"
+            "+y = 3\n"
+        )
+        assert summary.touched_files == ("f.py",)
+        assert (summary.added_lines, summary.removed_lines) == (2, 1)
+        assert summary.lines_changed == 3
+        assert summary.header_lines == 2
+
+    def test_diff_summary_counts_header_like_content(self):
+        """+++/--- lines inside a hunk are changes, not file headers."""
+        from rfsn_controller.qa import DiffSummary
+
+        summary = DiffSummary.from_diff(
+            "diff --git a/notes.md b/notes.md\n"
+            "--- a/notes.md\n"
+            "+++ b/notes.md\n"
+            "@@ -1,2 +1,2 @@\n"
+            "--- x\n"
+            "+++ foo\n"
+            "diff --git a/g.py b/g.py\n"
+            "new file mode 100644\n"
+            "--- /dev/null\n"
+            "+++ b/g.py\n"
+            "@@ -0,0 +1 @@\n"
+            "+z = 1\n"
+        )
+        assert summary.touched_files == ("notes.md", "g.py")
+        assert (summary.added_lines, summary.removed_lines) == (2, 1)
+        assert summary.header_lines == 4
+
+    def test_orchestrator_lines_changed_includes_file_headers(self):
+        """The critic's lines_changed keeps counting the +++/--- headers."""
+        from rfsn_controller.qa import DiffSummary
+        from rfsn_controller.qa.qa_orchestrator import QAOrchestrator
+
+        summary = DiffSummary.from_diff(
+            "diff --git a/f.py b/f.py\n"
+            "--- a/f.py\n"
+            "+++ b/f.py\n"
+            "@@ -1 +1 @@\n"
+            "-x = 1\n"
+            "+x = 2\n"
+        )
+        stats = QAOrchestrator()._parse_diff_stats(summary)
+        assert stats == {"lines_changed": 4, "files_changed": 1, "touched_files": ["f.py"]}
+
+
 class TestQAPersistence:
     """Tests for claim outcome persistence."""
 